@@ -0,0 +1,324 @@
+""" Euler tour and lowest common ancestor (LCA) index for a taxonomy
+"""
+
+from typing import List, Tuple, Union
+
+import numpy as np
+
+try:
+    from got.taxonomies.tree_arrays import TreeArrays, ID_DTYPE
+except ImportError as e:
+    from tree_arrays import TreeArrays, ID_DTYPE
+
+
+# (node ids of a level, their parents, segment of every node, parent of every segment)
+LevelSegments = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class AncestorIndex:
+    """
+    Euler tour of a taxonomy with entry / exit times, subtree leaf ranges
+    and an O(1) LCA structure. Since node ids are assigned in preorder,
+    the entry time of a node is its id and its subtree occupies the ids
+    entry[x]..exit[x]; the leaves of the subtree are the leaves with
+    positions leaf_start[x]..leaf_end[x] - 1 (in the order of
+    TreeArrays.leaf_ids).
+
+    Initial attributes
+    ------------------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    entry : np.ndarray
+        entry time of every node
+    exit : np.ndarray
+        exit time of every node: the largest id in its subtree
+    leaf_start : np.ndarray
+        position of the first leaf of the subtree of every node
+    leaf_end : np.ndarray
+        position after the last leaf of the subtree of every node
+
+    Main methods
+    ------------
+    of(arrays) (classmethod)
+        returns the index shared by all the users of the arrays
+
+    is_descendant(node_id, ancestor_id)
+        checks whether the node is in the subtree of the ancestor
+
+    subtree_size(node_id) / subtree_leaf_count(node_id)
+        returns the number of nodes / leaves in the subtree
+
+    subtree_slice(node_id) / subtree_leaf_slice(node_id)
+        returns a slice of node ids / leaf positions of the subtree
+
+    subtree_arrays(node_id)
+        returns the arrays of the subtree as a taxonomy of its own
+
+    levels() (property)
+        node ids grouped by depth
+
+    level_segments() (property)
+        the levels split into the segments of the children of a node
+
+    lca(first_id, second_id)
+        returns the lowest common ancestor of two nodes
+
+    """
+    def __init__(self, arrays: TreeArrays) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+
+        Returns
+        -------
+        None
+        """
+        self.arrays = arrays
+        count = len(arrays)
+        self.entry = arrays.preorder
+
+        # the last id of a subtree is the last id of the subtree of the last child
+        last_child = np.where(arrays.degree > 0, arrays.children[arrays.child_offsets[1:] - 1], \
+                              np.arange(count)) if count > 1 else np.zeros(count, dtype=ID_DTYPE)
+        exit_ = np.arange(count, dtype=ID_DTYPE)
+        for node_id in arrays.postorder.tolist():
+            exit_[node_id] = exit_[last_child[node_id]]
+        self.exit = exit_
+
+        is_leaf = (arrays.degree == 0).astype(ID_DTYPE)
+        leaves_before = np.zeros(count + 1, dtype=ID_DTYPE)
+        np.cumsum(is_leaf, out=leaves_before[1:])
+        self.leaf_start = leaves_before[:-1]
+        self.leaf_end = leaves_before[exit_ + 1]
+
+        self._sparse_table: Union[list, None] = None
+        self._levels: Union[Tuple[np.ndarray, np.ndarray], None] = None
+        self._level_segments: Union[List[LevelSegments], None] = None
+
+    @classmethod
+    def of(cls, arrays: TreeArrays) -> 'AncestorIndex':
+        """Returns the index shared by all the users of the arrays
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+
+        Returns
+        -------
+        AncestorIndex
+            the index
+        """
+        if arrays.ancestry is None:
+            arrays.ancestry = cls(arrays)
+        return arrays.ancestry
+
+    def is_descendant(self, node_id: Union[int, np.ndarray], \
+                      ancestor_id: Union[int, np.ndarray]) -> Union[bool, np.ndarray]:
+        """Checks whether the node is in the subtree of the ancestor (a node
+        is a descendant of itself). Works element-wise for arrays of ids
+
+        Parameters
+        ----------
+        node_id : Union[int, np.ndarray]
+            the node id(s)
+        ancestor_id : Union[int, np.ndarray]
+            the ancestor id(s)
+
+        Returns
+        -------
+        Union[bool, np.ndarray]
+            "True" if the node is in the subtree, else "False"
+        """
+        return (ancestor_id <= node_id) & (node_id <= self.exit[ancestor_id])
+
+    def subtree_size(self, node_id: int) -> int:
+        """Returns the number of nodes in the subtree
+
+        Parameters
+        ----------
+        node_id : int
+            the root of the subtree
+
+        Returns
+        -------
+        int
+            the number of nodes
+        """
+        return int(self.exit[node_id] - node_id + 1)
+
+    def subtree_leaf_count(self, node_id: int) -> int:
+        """Returns the number of leaves in the subtree
+
+        Parameters
+        ----------
+        node_id : int
+            the root of the subtree
+
+        Returns
+        -------
+        int
+            the number of leaves
+        """
+        return int(self.leaf_end[node_id] - self.leaf_start[node_id])
+
+    def subtree_slice(self, node_id: int) -> slice:
+        """Returns a slice of the node ids of the subtree
+
+        Parameters
+        ----------
+        node_id : int
+            the root of the subtree
+
+        Returns
+        -------
+        slice
+            the slice
+        """
+        return slice(int(node_id), int(self.exit[node_id]) + 1)
+
+    def subtree_leaf_slice(self, node_id: int) -> slice:
+        """Returns a slice of the leaf positions of the subtree, e.g. to take
+        the weights of the subtree leaves from a leaf weight vector
+
+        Parameters
+        ----------
+        node_id : int
+            the root of the subtree
+
+        Returns
+        -------
+        slice
+            the slice
+        """
+        return slice(int(self.leaf_start[node_id]), int(self.leaf_end[node_id]))
+
+    @property
+    def levels(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Node ids grouped by depth: the nodes of depth d are
+        order[offsets[d]:offsets[d + 1]], in preorder. Within a level,
+        the children of a node are contiguous and go in their order
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            the ids ordered by depth and the offsets of the levels
+        """
+        if self._levels is None:
+            depth = self.arrays.depth
+            order = np.argsort(depth, kind="stable").astype(ID_DTYPE)
+            offsets = np.zeros(int(depth.max()) + 2 if len(depth) else 1, dtype=ID_DTYPE)
+            np.cumsum(np.bincount(depth), out=offsets[1:])
+            self._levels = (order, offsets)
+        return self._levels
+
+    @property
+    def level_segments(self) -> List[LevelSegments]:
+        """The levels below the root, from the deepest one to the depth 1,
+        split into segments: the children of a node form a segment. For
+        every level: the ids of its nodes, their parents, the number of
+        the segment of every node and the parent of every segment
+
+        Returns
+        -------
+        List[LevelSegments]
+            the segments of the levels
+        """
+        if self._level_segments is None:
+            order, offsets = self.levels
+            segments = []
+            for depth in range(len(offsets) - 2, 0, -1):
+                level = order[offsets[depth]:offsets[depth + 1]]
+                parents = self.arrays.parent[level]
+                starts = np.flatnonzero(np.diff(parents, prepend=-1))
+                group = np.repeat(np.arange(len(starts), dtype=ID_DTYPE), \
+                                  np.diff(np.append(starts, len(level))))
+                segments.append((level, parents, group, parents[starts]))
+            self._level_segments = segments
+        return self._level_segments
+
+    def subtree_arrays(self, node_id: int) -> TreeArrays:
+        """Returns the arrays of the subtree as a taxonomy of its own (with
+        the root of the subtree as its root) in O(subtree size): the
+        subtree is a contiguous range in preorder and in postorder, so
+        the arrays are slices shifted to the new ids. The string tables
+        are shared with the whole taxonomy
+
+        Parameters
+        ----------
+        node_id : int
+            the root of the subtree
+
+        Returns
+        -------
+        TreeArrays
+            array-backed representation of the subtree
+        """
+        arrays = self.arrays
+        first, last = int(node_id), int(self.exit[node_id])
+        size = last - first + 1
+
+        parent = arrays.parent[first:last + 1] - first
+        parent[0] = -1
+        child_offsets = arrays.child_offsets[first:last + 2] - arrays.child_offsets[first]
+        children = arrays.children[arrays.child_offsets[first]:arrays.child_offsets[last + 1]] - first
+        # the position of a node in postorder is id + subtree size - 1 - depth
+        post_end = last - int(arrays.depth[first]) + 1
+        postorder = arrays.postorder[post_end - size:post_end] - first
+
+        return TreeArrays(parent, arrays.depth[first:last + 1] - arrays.depth[first],
+                          child_offsets, children, postorder,
+                          arrays.name_ids[first:last + 1], arrays.names,
+                          arrays.index_ids[first:last + 1], arrays.indices)
+
+    def _build_sparse_table(self) -> list:
+        """Builds the sparse table over the preorder: the k-th level keeps,
+        for every position i, the shallowest node among ids i..i + 2^k - 1
+
+        Returns
+        -------
+        list
+            the levels of the table
+        """
+        depth = self.arrays.depth
+        level = np.arange(len(self.arrays), dtype=np.int32)
+        table = [level]
+        width = 1
+        while 2 * width <= len(level):
+            left, right = level[:-width], level[width:]
+            level = np.where(depth[left] <= depth[right], left, right).astype(np.int32)
+            table.append(level)
+            width *= 2
+        return table
+
+    def lca(self, first_id: int, second_id: int) -> int:
+        """Returns the lowest common ancestor of two nodes in O(1): for
+        ids a < b, it is the parent of the shallowest node among the ids
+        a + 1..b, unless a is an ancestor of b
+
+        Parameters
+        ----------
+        first_id : int
+            the first node id
+        second_id : int
+            the second node id
+
+        Returns
+        -------
+        int
+            id of the lowest common ancestor
+        """
+        low, high = sorted((int(first_id), int(second_id)))
+        if high <= self.exit[low]:
+            return low
+
+        if self._sparse_table is None:
+            self._sparse_table = self._build_sparse_table()
+        level = (high - low).bit_length() - 1
+        left = self._sparse_table[level][low + 1]
+        right = self._sparse_table[level][high - (1 << level) + 1]
+        shallowest = left if self.arrays.depth[left] <= self.arrays.depth[right] else right
+        return int(self.arrays.parent[shallowest])
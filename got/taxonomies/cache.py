@@ -0,0 +1,209 @@
+""" Compiled binary form of a taxonomy stored next to its *.fvtr file
+and loaded through memory mapping
+"""
+
+import hashlib
+import json
+import os
+import struct
+from typing import Dict, Union
+
+import numpy as np
+
+try:
+    from got.taxonomies.tree_arrays import TreeArrays
+except ImportError as e:
+    from tree_arrays import TreeArrays
+
+
+CACHE_SUFFIX = ".gotc"
+MAGIC = b"GOTC"
+VERSION = 1
+ALIGNMENT = 64
+# magic, version, header length
+PREAMBLE = struct.Struct("<4sII")
+
+
+def cache_path(filename: str) -> str:
+    """Returns the name of the compiled file for a taxonomy file
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+
+    Returns
+    -------
+    str
+        name of the compiled file
+    """
+    return filename + CACHE_SUFFIX
+
+
+def file_digest(filename: str) -> str:
+    """Returns the SHA-1 digest of the file content
+
+    Parameters
+    ----------
+    filename : str
+        name of the file
+
+    Returns
+    -------
+    str
+        hex digest of the content
+    """
+    digest = hashlib.sha1()
+    with open(filename, "rb") as file_opened:
+        for chunk in iter(lambda: file_opened.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_source_stamp(filename: str, with_digest: bool = True) -> Dict[str, Union[int, str]]:
+    """Returns a stamp identifying the state of the source file
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+    with_digest : bool, default=True
+        whether to compute the content digest
+
+    Returns
+    -------
+    Dict[str, Union[int, str]]
+        size, modification time and (optionally) the content digest
+    """
+    stat = os.stat(filename)
+    stamp: Dict[str, Union[int, str]] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_digest:
+        stamp["sha1"] = file_digest(filename)
+    return stamp
+
+
+def save_compiled(arrays: TreeArrays, filename: str) -> str:
+    """Writes the compiled form of a taxonomy built from the file
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    filename : str
+        taxonomy description in *.fvtr format the arrays were built from
+
+    Returns
+    -------
+    str
+        name of the compiled file
+    """
+    fields = {}
+    offset = 0
+    arrays_dict = arrays.to_dict()
+    for name in TreeArrays.ARRAY_FIELDS:
+        array = np.ascontiguousarray(arrays_dict[name])
+        fields[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({"source": get_source_stamp(filename), "fields": fields}).encode()
+    data_start = -(-(PREAMBLE.size + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    compiled_name = cache_path(filename)
+    temporary_name = f"{compiled_name}.{os.getpid()}.tmp"
+    with open(temporary_name, "wb") as file_opened:
+        file_opened.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        file_opened.write(header)
+        for name in TreeArrays.ARRAY_FIELDS:
+            file_opened.seek(data_start + fields[name]["offset"])
+            file_opened.write(np.ascontiguousarray(arrays_dict[name]).tobytes())
+    os.replace(temporary_name, compiled_name)
+
+    return compiled_name
+
+
+def refresh_header(compiled_name: str, header: dict, header_length: int) -> bool:
+    """Rewrites the header of a compiled file in place (e.g. with a new
+    modification time of the source); the new header is padded to the
+    length of the old one, so the data does not move
+
+    Parameters
+    ----------
+    compiled_name : str
+        name of the compiled file
+    header : dict
+        the new header
+    header_length : int
+        length of the header stored in the file
+
+    Returns
+    -------
+    bool
+        "True" if the header was rewritten, "False" if it does not fit
+        or the file is not writable
+    """
+    encoded = json.dumps(header).encode()
+    if len(encoded) > header_length:
+        return False
+    try:
+        with open(compiled_name, "r+b") as file_opened:
+            file_opened.seek(PREAMBLE.size)
+            file_opened.write(encoded.ljust(header_length))
+    except OSError:
+        return False
+    return True
+
+
+def load_compiled(filename: str, refresh: bool = False) -> Union[TreeArrays, None]:
+    """Loads the compiled form of a taxonomy if it is valid for the file.
+    The compiled form is valid when the size and the modification time of
+    the file did not change; if only the modification time changed, the
+    content digest is compared. If refresh is set and the content is the
+    same, the new time is stored (so the digest is not computed again on
+    the next load); otherwise nothing is written
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+    refresh : bool, default=False
+        whether to store the new modification time of the file
+
+    Returns
+    -------
+    Union[TreeArrays, None]
+        array-backed representation of the taxonomy mapped from the
+        compiled file, or "None" if there is no valid compiled file
+    """
+    compiled_name = cache_path(filename)
+    try:
+        with open(compiled_name, "rb") as file_opened:
+            magic, version, header_length = PREAMBLE.unpack(file_opened.read(PREAMBLE.size))
+            if magic != MAGIC or version != VERSION:
+                return None
+            header = json.loads(file_opened.read(header_length))
+
+        stamp = get_source_stamp(filename, with_digest=False)
+        source = header["source"]
+        if stamp["size"] != source["size"]:
+            return None
+        if stamp["mtime_ns"] != source["mtime_ns"]:
+            if file_digest(filename) != source["sha1"]:
+                return None
+            if refresh:
+                source["mtime_ns"] = stamp["mtime_ns"]
+                refresh_header(compiled_name, header, header_length)
+
+        data_start = -(-(PREAMBLE.size + header_length) // ALIGNMENT) * ALIGNMENT
+        arrays = {}
+        for name in TreeArrays.ARRAY_FIELDS:
+            field = header["fields"][name]
+            if not field["length"]:
+                arrays[name] = np.empty(0, dtype=field["dtype"])
+                continue
+            arrays[name] = np.memmap(compiled_name, dtype=field["dtype"], mode="r",
+                                     offset=data_start + field["offset"],
+                                     shape=(field["length"],))
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+    return TreeArrays.from_dict(arrays)
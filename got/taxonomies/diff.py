@@ -0,0 +1,203 @@
+""" Differences between two versions of a taxonomy
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from got.taxonomies.tree_arrays import TreeArrays, ID_DTYPE
+    from got.taxonomies.ancestry import AncestorIndex
+except ImportError as e:
+    from tree_arrays import TreeArrays, ID_DTYPE
+    from ancestry import AncestorIndex
+
+
+class TaxonomyDiff:
+    """
+    Differences between an old and a new version of a taxonomy. Nodes are
+    matched by their indices (trailing dots ignored); a repeated index
+    is matched by the number of its occurrence in preorder. A node is
+    changed if it is new, its name or index changed or its children
+    (as matched nodes, in order) changed; a subtree is changed if any
+    of its nodes is changed, so the data computed for an unchanged
+    subtree remain valid after the ids are remapped with "id_map".
+
+    Initial attributes
+    ------------------
+    old_to_new : np.ndarray
+        the new id of every old node, -1 for the removed ones
+    new_to_old : np.ndarray
+        the old id of every new node, -1 for the added ones
+    added : np.ndarray
+        new ids of the added nodes
+    removed : np.ndarray
+        old ids of the removed nodes
+    renamed : np.ndarray
+        new ids of the matched nodes with changed names
+    moved : np.ndarray
+        new ids of the matched nodes with changed parents
+    node_changed : np.ndarray
+        boolean mask over the new ids: the node is changed
+    subtree_changed : np.ndarray
+        boolean mask over the new ids: the subtree is changed
+
+    Main methods
+    ------------
+    changed() (property)
+        checks whether the versions differ
+
+    id_map() (property)
+        the new id of every old node whose id changed
+
+    """
+    def __init__(self, old: TreeArrays, new: TreeArrays) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        old : TreeArrays
+            array-backed representation of the old version
+        new : TreeArrays
+            array-backed representation of the new version
+
+        Returns
+        -------
+        None
+        """
+        old_indices = [old.indices[i] for i in old.index_ids.tolist()]
+        new_indices = [new.indices[i] for i in new.index_ids.tolist()]
+
+        old_ids_by_key: Dict[str, List[int]] = {}
+        for old_id, index in reversed(list(enumerate(old_indices))):
+            old_ids_by_key.setdefault(index.rstrip("."), []).append(old_id)
+        new_to_old = np.full(len(new), -1, dtype=ID_DTYPE)
+        for new_id, index in enumerate(new_indices):
+            old_ids = old_ids_by_key.get(index.rstrip("."))
+            if old_ids:
+                new_to_old[new_id] = old_ids.pop()
+        matched = new_to_old >= 0
+        old_to_new = np.full(len(old), -1, dtype=ID_DTYPE)
+        old_to_new[new_to_old[matched]] = np.flatnonzero(matched)
+
+        new_matched = np.flatnonzero(matched)
+        old_matched = new_to_old[matched]
+        renamed = np.array([old.name(o) != new.name(n) for o, n in \
+                            zip(old_matched.tolist(), new_matched.tolist())], dtype=bool)
+        relabelled = renamed | np.array([old_indices[o] != new_indices[n] for o, n in \
+                                         zip(old_matched.tolist(), new_matched.tolist())], dtype=bool)
+
+        # parents compared as old ids, -1 for the root and the added parents
+        new_parent = new.parent[new_matched]
+        new_parent_as_old = np.where(new_parent >= 0, new_to_old[np.maximum(new_parent, 0)], -1)
+        moved = new_parent_as_old != old.parent[old_matched]
+
+        node_changed = ~matched
+        node_changed[new_matched[relabelled]] = True
+        node_changed[new_matched[self._children_differ(old, new, new_to_old, new_matched,
+                                                      old_matched)]] = True
+
+        # a subtree occupies the ids x..exit[x]
+        changed_before = np.zeros(len(new) + 1, dtype=ID_DTYPE)
+        np.cumsum(node_changed, out=changed_before[1:])
+        exit_ = AncestorIndex.of(new).exit
+        subtree_changed = changed_before[exit_ + 1] > changed_before[:-1]
+
+        self.old_to_new = old_to_new
+        self.new_to_old = new_to_old
+        self.added = np.flatnonzero(~matched)
+        self.removed = np.flatnonzero(old_to_new < 0)
+        self.renamed = new_matched[renamed]
+        self.moved = new_matched[moved]
+        self.node_changed = node_changed
+        self.subtree_changed = subtree_changed
+
+    @staticmethod
+    def _children_differ(old: TreeArrays, new: TreeArrays, new_to_old: np.ndarray, \
+                         new_matched: np.ndarray, old_matched: np.ndarray) -> np.ndarray:
+        """Compares the children lists of the matched nodes
+
+        Parameters
+        ----------
+        old : TreeArrays
+            array-backed representation of the old version
+        new : TreeArrays
+            array-backed representation of the new version
+        new_to_old : np.ndarray
+            the old id of every new node, -1 for the added ones
+        new_matched : np.ndarray
+            new ids of the matched nodes
+        old_matched : np.ndarray
+            old ids of the matched nodes
+
+        Returns
+        -------
+        np.ndarray
+            boolean mask over the matched nodes: the children differ
+        """
+        new_degree = new.degree[new_matched]
+        differ = new_degree != old.degree[old_matched]
+
+        # compare the children slot by slot for the nodes of the same degree
+        same = np.flatnonzero(~differ)
+        degree = new_degree[same]
+        owner = np.repeat(same, degree)
+        slot = np.arange(len(owner), dtype=ID_DTYPE) - np.repeat(np.cumsum(degree) - degree, degree)
+        new_children = new.children[new.child_offsets[new_matched[owner]] + slot]
+        old_children = old.children[old.child_offsets[old_matched[owner]] + slot]
+        differ[owner[new_to_old[new_children] != old_children]] = True
+        return differ
+
+    @property
+    def changed(self) -> bool:
+        """Checks whether the versions differ
+
+        Returns
+        -------
+        bool
+            "True" if any node is added, removed or changed, else "False"
+        """
+        return bool(len(self.removed) or self.node_changed.any())
+
+    @property
+    def id_map(self) -> Dict[int, int]:
+        """The new id of every old node whose id changed (-1 for the
+        removed nodes)
+
+        Returns
+        -------
+        Dict[int, int]
+            old id -> new id
+        """
+        changed = np.flatnonzero(self.old_to_new != np.arange(len(self.old_to_new)))
+        return dict(zip(changed.tolist(), self.old_to_new[changed].tolist()))
+
+    def __repr__(self) -> str:
+        """Summarizes the differences
+
+        Returns
+        -------
+        str
+            the summary
+        """
+        return "TaxonomyDiff(added={}, removed={}, renamed={}, moved={}, " \
+            "changed subtrees={})".format(len(self.added), len(self.removed), len(self.renamed),
+                                         len(self.moved), int(self.subtree_changed.sum()))
+
+
+def diff_taxonomies(old: TreeArrays, new: TreeArrays) -> TaxonomyDiff:
+    """Compares two versions of a taxonomy
+
+    Parameters
+    ----------
+    old : TreeArrays
+        array-backed representation of the old version
+    new : TreeArrays
+        array-backed representation of the new version
+
+    Returns
+    -------
+    TaxonomyDiff
+        the differences
+    """
+    return TaxonomyDiff(old, new)
@@ -1,12 +1,18 @@
 """ Functions for dealing with ete3 for taxonomy representations
 """
 
+import logging
 from typing import Union
 
 try:
     from got.taxonomies.taxonomy import Taxonomy, Node
+    from got.taxonomies.tree_arrays import TreeArrays
 except ImportError as e:
     from taxonomy import Taxonomy, Node
+    from tree_arrays import TreeArrays
+
+
+logger = logging.getLogger(__name__)
 
 
 def make_ete3_lifted(taxonomy_tree: Union[Node, Taxonomy], print_all: bool = True) -> str:
@@ -30,19 +36,50 @@ def make_ete3_lifted(taxonomy_tree: Union[Node, Taxonomy], print_all: bool = Tru
 
     head_subjects = set(t.index for t in taxonomy_tree.H)
 
-    def rec_ete3(node, head_subject=0):
-        output = []
-
+    def shorten(nodes):
+        return nodes if len(nodes) < 3 else [nodes[0], Node(None, "...", None), nodes[-1]]
+
+    def label(node, head_subject):
+        return [node.name, "[&&NHX:", "p=", str(round(node.p, 3)), ":", "e=", str(node.e), \
+                ":", "H={", ";".join([s.name for s in shorten(node.H or [])]), \
+                "}:u=", str(round(node.u, 3)), ":", "v=", str(round(node.v, 3)), \
+                ":G={", ";".join([s.name for s in shorten(node.G or [])]), \
+                "}:L={", ";".join([s.name for s in shorten(node.L or [])]), \
+                "}:Hd=", ("1" if node.index in head_subjects else "0"), ":Ch=", \
+                ("1" if node.is_internal else "0"), ":Sq=", ("1" if head_subject \
+                                                             else "0"), "]"]
+
+    output = []
+    # explicit stack of actions: ("node", node, head_subject), ("text", str),
+    # ("rename", node, name) and ("label", node, head_subject)
+    stack = [("node", taxonomy_tree, 0)]
+
+    while stack:
+        action, item, argument = stack.pop()
+        if action == "text":
+            output.append(item)
+            continue
+        if action == "rename":
+            item.name = argument
+            continue
+        if action == "label":
+            if item.u > 0 or print_all:
+                output.extend(label(item, argument))
+            continue
+
+        node, head_subject = item, argument
         if node.index in head_subjects and not head_subject:
             head_subject = 1
 
+        actions = []
         if node.is_internal:
-            output.append("(")
+            actions.append(("text", "(", None))
             sorted_children = sorted(node.children, key=lambda x: x.u)
             j = 0
             while not sorted_children[j].u:
                 j += 1
 
+            # zero-weighted children are merged into one item
             last_sorted_name = sorted_children[j - 1].name
             if j == 2:
                 sorted_children[j - 1].name = sorted_children[0].name + ". " \
@@ -52,84 +89,119 @@ def make_ete3_lifted(taxonomy_tree: Union[Node, Taxonomy], print_all: bool = Tru
                                                  + sorted_children[j - 1].name + \
                                                  " " +  str(j) + " items"
             if j:
-                output.extend(rec_ete3(sorted_children[j - 1], head_subject=head_subject))
-                output.append(",")
+                actions.append(("node", sorted_children[j - 1], head_subject))
+                actions.append(("text", ",", None))
 
-            sorted_children[j - 1].name = last_sorted_name
+            actions.append(("rename", sorted_children[j - 1], last_sorted_name))
 
             children_len = len(sorted_children[j:])
             for k, child in enumerate(sorted_children[j:]):
-                output.extend(rec_ete3(child, head_subject=head_subject))
+                actions.append(("node", child, head_subject))
                 if k < children_len - 1:
-                    output.append(",")
-            output.append(")")
+                    actions.append(("text", ",", None))
+            actions.append(("text", ")", None))
+
+        actions.append(("label", node, head_subject))
+        stack.extend(reversed(actions))
 
-        if node.u > 0 or print_all:
-            output.append(node.name)
-            output.extend(["[&&NHX:", "p=", str(round(node.p, 3)), ":", "e=", str(node.e), \
-                           ":", "H={", ";".join([s.name for s in ((node.H or []) if \
-                                                                  len(node.H or []) < 3 \
-                                                                  else [node.H[0], \
-                                                                        Node(None, "...", None), \
-                                                                        node.H[-1]])]), \
-                           "}:u=", str(round(node.u, 3)), ":", "v=", str(round(node.v, 3)), \
-                           ":G={", ";".join([s.name for s in ((node.G or []) \
-                                                              if len(node.G or []) < 3 \
-                                                              else [node.G[0],
-                                                                    Node(None, "...", None), \
-                                                                    node.G[-1]])]), \
-                           "}:L={", ";".join([s.name for s in ((node.L or []) \
-                                                               if len(node.L or []) < 3 \
-                                                               else [node.L[0], \
-                                                                     Node(None, "...", None), \
-                                                                     node.L[-1]])]), \
-                           "}:Hd=", ("1" if node.index in head_subjects else "0"), ":Ch=", \
-                           ("1" if node.is_internal else "0"), ":Sq=", ("1" if head_subject \
-                                                                        else "0"), "]"])
-
-        return output
-
-    output = rec_ete3(taxonomy_tree)
     output.append(";")
     return "".join(output)
 
 
-def make_ete3_raw(taxonomy_tree: Union[Node, Taxonomy]) -> str:
+def make_ete3_raw(taxonomy_tree: Union[Node, Taxonomy, TreeArrays]) -> str:
     """Returns ete3 representation of a taxonomy tree
        for raw taxonomy
 
     Parameters
     ----------
-    taxonomy_tree : Union[Node, Taxonomy]
-        the root of the taxonomy tree / sub-tree or taxonomy
+    taxonomy_tree : Union[Node, Taxonomy, TreeArrays]
+        the root of the taxonomy tree / sub-tree, taxonomy or its
+        array-backed representation
 
     Returns
     -------
     str
         resulting ete3 representation
     """
+    if isinstance(taxonomy_tree, TreeArrays):
+        return make_ete3_raw_from_arrays(taxonomy_tree)
+
     if isinstance(taxonomy_tree, Taxonomy):
         taxonomy_tree = taxonomy_tree.root
 
-    def rec_ete3(node):
-        output = []
+    output = []
+    # the second item of an entry: 0 - open the node, 1 - close the node,
+    # 2 - put a separator between siblings
+    stack = [(taxonomy_tree, 0)]
+
+    while stack:
+        node, action = stack.pop()
+        if action == 2:
+            output.append(",")
+            continue
+        if action == 1:
+            output.append(")")
+            output.append(node.name)
+            continue
 
-        if node.is_internal:
-            output.append("(")
+        if node.is_leaf:
+            output.append(node.name)
+            continue
 
-            children_len = len(node.children)
+        output.append("(")
+        stack.append((node, 1))
+        for k, child in enumerate(reversed(node.children)):
+            if k:
+                stack.append((node, 2))
+            stack.append((child, 0))
 
-            for k, child in enumerate(node.children):
-                output.extend(rec_ete3(child))
-                if k < children_len - 1:
-                    output.append(",")
+    output.append(";")
+    return "".join(output)
+
+
+def make_ete3_raw_from_arrays(arrays: TreeArrays, node_id: int = 0) -> str:
+    """Returns ete3 representation of a taxonomy tree
+       for raw taxonomy given by its array-backed representation
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    node_id : int, default=0
+        id of the root of the sub-tree to represent
 
+    Returns
+    -------
+    str
+        resulting ete3 representation
+    """
+    output = []
+    # the second item of an entry: 0 - open the node, 1 - close the node,
+    # 2 - put a separator between siblings
+    stack = [(node_id, 0)]
+
+    while stack:
+        current, action = stack.pop()
+        if action == 2:
+            output.append(",")
+            continue
+        if action == 1:
             output.append(")")
-        output.append(node.name)
+            output.append(arrays.name(current))
+            continue
+
+        children = arrays.children_of(current)
+        if not len(children):
+            output.append(arrays.name(current))
+            continue
 
-        return output
+        output.append("(")
+        stack.append((current, 1))
+        for k, child in enumerate(children[::-1]):
+            if k:
+                stack.append((current, 2))
+            stack.append((int(child), 0))
 
-    output = rec_ete3(taxonomy_tree)
     output.append(";")
     return "".join(output)
 
@@ -152,7 +224,7 @@ def save_ete3(ete3_desc: str, filename: str = "taxonomy_tree_lifted.ete") -> Non
     with open(filename, 'w') as file_opened:
         file_opened.write(ete3_desc)
 
-    print(f"ete representation saved in the file: {filename}")
+    logger.debug("ete representation saved in the file: %s", filename)
 
 
 if __name__ == '__main__':
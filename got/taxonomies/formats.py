@@ -0,0 +1,398 @@
+""" Import and export of taxonomies in JSON lines, Newick and NumPy *.npz formats
+"""
+
+import json
+import re
+from typing import Dict, Generator, List, Type, Union
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+try:
+    from got.taxonomies.taxonomy import Taxonomy, BaseNode, Node
+    from got.taxonomies.tree_arrays import TreeArrays
+except ImportError as e:
+    from taxonomy import Taxonomy, BaseNode, Node
+    from tree_arrays import TreeArrays
+
+
+# Newick tokens: brackets, separators, quoted labels, comments,
+# branch lengths and unquoted labels
+NEWICK_TOKEN_PATTERN = re.compile(r"[(),;]|'(?:[^']|'')*'|\[[^\]]*\]|:[^(),;\[]*|[^(),;:\[\]']+")
+NHX_INDEX_PATTERN = re.compile(r"[:&]index=([^:\]]*)")
+# the number of pieces of output collected before writing them
+WRITE_BATCH = 1 << 14
+
+
+def get_arrays(taxonomy_tree: Union[Taxonomy, TreeArrays]) -> TreeArrays:
+    """Returns the array-backed representation of a taxonomy
+
+    Parameters
+    ----------
+    taxonomy_tree : Union[Taxonomy, TreeArrays]
+        the taxonomy or its array-backed representation
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    if isinstance(taxonomy_tree, Taxonomy):
+        return taxonomy_tree.arrays
+    return taxonomy_tree
+
+
+def save_jsonl(taxonomy_tree: Union[Taxonomy, TreeArrays], filename: str) -> None:
+    """Writes the taxonomy in JSON lines format: one object
+    {"id": ..., "parent": ..., "index": ..., "name": ...} per node,
+    in preorder; the parent of the root is -1
+
+    Parameters
+    ----------
+    taxonomy_tree : Union[Taxonomy, TreeArrays]
+        the taxonomy or its array-backed representation
+    filename : str
+        name of the file for writing
+
+    Returns
+    -------
+    None
+    """
+    arrays = get_arrays(taxonomy_tree)
+    # every distinct string is encoded once
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    names = [encode(name) for name in arrays.names]
+    indices = [encode(index) for index in arrays.indices]
+    with open(filename, "w", encoding="utf-8") as file_opened:
+        lines = []
+        for node_id, (parent, name_id, index_id) in enumerate(zip(arrays.parent.tolist(), \
+                                                                  arrays.name_ids.tolist(), \
+                                                                  arrays.index_ids.tolist())):
+            lines.append(f'{{"id": {node_id}, "parent": {parent}, '
+                         f'"index": {indices[index_id]}, "name": {names[name_id]}}}\n')
+            if len(lines) >= WRITE_BATCH:
+                file_opened.write("".join(lines))
+                lines = []
+        file_opened.write("".join(lines))
+
+
+def load_jsonl(filename: str) -> TreeArrays:
+    """Reads a taxonomy in JSON lines format (see save_jsonl). The ids
+    may be any distinct values; the nodes may go in any order, and
+    the children of a node keep the order of the lines
+
+    Parameters
+    ----------
+    filename : str
+        name of the file to read
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    decode = json.JSONDecoder().decode
+    positions: Dict[Union[int, str], int] = {}
+    parent_refs: List[Union[int, str, None]] = []
+    indices: List[str] = []
+    names: List[str] = []
+    with open(filename, "r", encoding="utf-8") as file_opened:
+        for line in file_opened:
+            if not line.strip():
+                continue
+            record = decode(line)
+            positions[record["id"]] = len(parent_refs)
+            parent_refs.append(record.get("parent"))
+            indices.append(record.get("index") or "")
+            names.append(record.get("name", ""))
+
+    parents = [-1 if ref is None or ref == -1 else positions[ref] for ref in parent_refs]
+    if parents.count(-1) != 1:
+        raise ValueError(f"{filename}: a taxonomy must have exactly one root")
+    return TreeArrays.from_parents(parents, indices, names)
+
+
+def quote_newick_label(label: str) -> str:
+    """Returns the label quoted for Newick format
+
+    Parameters
+    ----------
+    label : str
+        the label
+
+    Returns
+    -------
+    str
+        the label in single quotes, with the quotes inside doubled
+    """
+    return "'" + label.replace("'", "''") + "'"
+
+
+def make_newick_labels(arrays: TreeArrays) -> List[str]:
+    """Returns the Newick labels of the nodes: quoted names and indices
+    in NHX comments. Every distinct name and index is quoted once
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+
+    Returns
+    -------
+    List[str]
+        the labels, by node ids
+    """
+    names = [quote_newick_label(name) for name in arrays.names]
+    indices = ["[&&NHX:index=" + quote(index, safe="./") + "]" if index else "" \
+               for index in arrays.indices]
+    return [names[name_id] + indices[index_id] for name_id, index_id \
+            in zip(arrays.name_ids.tolist(), arrays.index_ids.tolist())]
+
+
+def iter_newick(arrays: TreeArrays) -> Generator[str, None, None]:
+    """Iterates over the pieces of Newick representation of the taxonomy
+    (the traversal is iterative, so the depth of the tree is not limited)
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+
+    Returns
+    -------
+    Generator[str, None, None]
+        generator over the pieces of the representation
+    """
+    labels = make_newick_labels(arrays)
+    # the second item of an entry: 0 - open the node, 1 - close the node,
+    # 2 - put a separator between siblings
+    stack = [(0, 0)]
+    while stack:
+        current, action = stack.pop()
+        if action == 2:
+            yield ","
+            continue
+        if action == 1:
+            yield ")" + labels[current]
+            continue
+
+        children = arrays.children_of(current)
+        if not len(children):
+            yield labels[current]
+            continue
+
+        yield "("
+        stack.append((current, 1))
+        for k, child in enumerate(children[::-1]):
+            if k:
+                stack.append((current, 2))
+            stack.append((int(child), 0))
+
+    yield ";\n"
+
+
+def save_newick(taxonomy_tree: Union[Taxonomy, TreeArrays], filename: str) -> None:
+    """Writes the taxonomy in Newick format; names are quoted and indices
+    are kept in NHX comments, e.g. "('a'[&&NHX:index=1.1.])'b'[&&NHX:index=1.];"
+
+    Parameters
+    ----------
+    taxonomy_tree : Union[Taxonomy, TreeArrays]
+        the taxonomy or its array-backed representation
+    filename : str
+        name of the file for writing
+
+    Returns
+    -------
+    None
+    """
+    with open(filename, "w", encoding="utf-8") as file_opened:
+        pieces = []
+        for piece in iter_newick(get_arrays(taxonomy_tree)):
+            pieces.append(piece)
+            if len(pieces) >= WRITE_BATCH:
+                file_opened.write("".join(pieces))
+                pieces = []
+        file_opened.write("".join(pieces))
+
+
+def parse_newick(newick: str) -> TreeArrays:
+    """Parses a tree in Newick format (the first tree of the string).
+    Unquoted labels have underscores replaced with spaces; branch lengths
+    are skipped; an index is taken from an NHX comment "index=..."
+
+    Parameters
+    ----------
+    newick : str
+        the tree in Newick format
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    parents: List[int] = []
+    indices: List[str] = []
+    names: List[str] = []
+    # internal nodes opened and not closed yet
+    open_nodes: List[int] = []
+    # the node the next label, length or comment belongs to
+    current = -1
+
+    def add_node() -> int:
+        parents.append(open_nodes[-1] if open_nodes else -1)
+        indices.append("")
+        names.append("")
+        return len(parents) - 1
+
+    for match in NEWICK_TOKEN_PATTERN.finditer(newick):
+        token = match.group(0)
+        if token == "(":
+            current = -1
+            open_nodes.append(add_node())
+        elif token in ",)":
+            if current < 0:
+                add_node()
+            current = open_nodes.pop() if token == ")" else -1
+        elif token == ";":
+            break
+        else:
+            if token.isspace():
+                continue
+            if current < 0:
+                current = add_node()
+            if token[0] == "'":
+                names[current] = token[1:-1].replace("''", "'")
+            elif token[0] == "[":
+                index_found = NHX_INDEX_PATTERN.search(token)
+                if index_found:
+                    indices[current] = unquote(index_found.group(1))
+            elif token[0] != ":":
+                names[current] = token.strip().replace("_", " ")
+
+    if open_nodes:
+        raise ValueError("unbalanced brackets in Newick representation")
+    if not parents:
+        return TreeArrays.from_parents([-1], [""], ["root"])
+    return TreeArrays.from_parents(parents, indices, names)
+
+
+def load_newick(filename: str) -> TreeArrays:
+    """Reads a taxonomy in Newick format (see parse_newick)
+
+    Parameters
+    ----------
+    filename : str
+        name of the file to read
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    with open(filename, "r", encoding="utf-8") as file_opened:
+        return parse_newick(file_opened.read())
+
+
+def save_npz(taxonomy_tree: Union[Taxonomy, TreeArrays], filename: str) -> None:
+    """Writes the arrays of the taxonomy into a NumPy *.npz bundle
+
+    Parameters
+    ----------
+    taxonomy_tree : Union[Taxonomy, TreeArrays]
+        the taxonomy or its array-backed representation
+    filename : str
+        name of the file for writing
+
+    Returns
+    -------
+    None
+    """
+    with open(filename, "wb") as file_opened:
+        np.savez(file_opened, **get_arrays(taxonomy_tree).to_dict())
+
+
+def load_npz(filename: str) -> TreeArrays:
+    """Reads the arrays of a taxonomy from a NumPy *.npz bundle
+
+    Parameters
+    ----------
+    filename : str
+        name of the file to read
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    with np.load(filename) as bundle:
+        return TreeArrays.from_dict({name: bundle[name] for name in TreeArrays.ARRAY_FIELDS})
+
+
+LOADERS = {".jsonl": load_jsonl, ".nwk": load_newick, ".newick": load_newick,
+           ".npz": load_npz}
+SAVERS = {".jsonl": save_jsonl, ".nwk": save_newick, ".newick": save_newick,
+          ".npz": save_npz}
+
+
+def get_format(filename: str) -> str:
+    """Returns the format of the file by its extension
+
+    Parameters
+    ----------
+    filename : str
+        name of the file
+
+    Returns
+    -------
+    str
+        the extension, e.g. ".jsonl"
+    """
+    for extension in LOADERS:
+        if filename.lower().endswith(extension):
+            return extension
+    return ".fvtr"
+
+
+def load_taxonomy(filename: str, node_class: Type[BaseNode] = Node) -> Taxonomy:
+    """Loads a taxonomy from a file of any supported format: JSON lines
+    (*.jsonl), Newick (*.nwk, *.newick), NumPy bundle (*.npz); other
+    files are parsed as FVTR
+
+    Parameters
+    ----------
+    filename : str
+        name of the file to read
+    node_class : Type[BaseNode], default=Node
+        a class of the tree nodes
+
+    Returns
+    -------
+    Taxonomy
+        the taxonomy loaded
+    """
+    extension = get_format(filename)
+    if extension == ".fvtr":
+        return Taxonomy(filename, node_class=node_class)
+    return Taxonomy.from_arrays(LOADERS[extension](filename), filename, node_class)
+
+
+def save_taxonomy(taxonomy_tree: Union[Taxonomy, TreeArrays], filename: str) -> None:
+    """Saves a taxonomy into a file; the format is chosen by the extension
+    (*.jsonl, *.nwk, *.newick or *.npz)
+
+    Parameters
+    ----------
+    taxonomy_tree : Union[Taxonomy, TreeArrays]
+        the taxonomy or its array-backed representation
+    filename : str
+        name of the file for writing
+
+    Returns
+    -------
+    None
+    """
+    extension = get_format(filename)
+    if extension not in SAVERS:
+        raise ValueError(f"{filename}: unsupported format, use one of {', '.join(SAVERS)}")
+    SAVERS[extension](taxonomy_tree, filename)
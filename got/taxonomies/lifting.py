@@ -0,0 +1,1666 @@
+""" Non-destructive ParGenFS: lifting a cluster over an immutable taxonomy
+given by its arrays; the results of a run are kept in arrays of their own
+"""
+
+import copy
+from bisect import bisect_left, insort
+from math import sqrt
+from typing import Dict, Iterable, List, Sequence, Set, Tuple, Type, Union
+
+import numpy as np
+
+try:
+    from got.taxonomies.taxonomy import Taxonomy, BaseNode, Node
+    from got.taxonomies.tree_arrays import TreeArrays, ID_DTYPE
+    from got.taxonomies.ancestry import AncestorIndex, LevelSegments
+    from got.taxonomies.lookup import TaxonomyLookup
+except ImportError as e:
+    from taxonomy import Taxonomy, BaseNode, Node
+    from tree_arrays import TreeArrays, ID_DTYPE
+    from ancestry import AncestorIndex, LevelSegments
+    from lookup import TaxonomyLookup
+
+
+LIMIT = .15
+GAMMA = .9
+LAMBDA = .2
+# levels of at most this number of nodes are summed node by node
+NARROW_LEVEL = 8
+
+
+def add_children_sums(segments: List[LevelSegments], sums: np.ndarray) -> None:
+    """Adds the sums of the children to their parents, level by level from
+    the deepest one, so that every node gets the sum over its subtree.
+    The sums of the children of a node are accumulated in their order,
+    so the floating-point result is the same as the one of the
+    recursive computation (traversal.sum_over_subtrees); a segmented
+    reduction such as np.add.reduceat sums long segments pairwise and
+    does not keep it. Wide levels are reduced with a bincount over the
+    segments, narrow ones (e.g. in long chains) node by node
+
+    Parameters
+    ----------
+    segments : List[LevelSegments]
+        the segments of the levels (see AncestorIndex.level_segments)
+    sums : np.ndarray
+        own values of the nodes, a row per vector of values; the sums
+        over the subtrees are accumulated in place
+
+    Returns
+    -------
+    None
+    """
+    count = len(sums)
+    for level, parents, group, heads in segments:
+        if len(level) <= NARROW_LEVEL:
+            for child, parent in zip(level.tolist(), parents.tolist()):
+                sums[:, parent] += sums[:, child]
+            continue
+        # the segments of every row are numbered after the ones of the previous rows
+        groups = (group + len(heads) * np.arange(count)[:, None]).ravel() if count > 1 else group
+        sums[:, heads] += np.bincount(groups, weights=sums[:, level].ravel(), \
+                                      minlength=count * len(heads)).reshape(count, -1)
+
+
+def subtree_sums(arrays: TreeArrays, leaf_values: np.ndarray) -> np.ndarray:
+    """Computes the sums of the leaf values over all the subtrees (see
+    add_children_sums). Several vectors of values (rows of a matrix)
+    are summed at once
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    leaf_values : np.ndarray
+        the values of the leaves (in the order of TreeArrays.leaf_ids),
+        a vector or a matrix with a row per vector of values
+
+    Returns
+    -------
+    np.ndarray
+        the sum over the subtree of every node, a row per vector of
+        values for a matrix
+    """
+    values = np.asarray(leaf_values, dtype=float)
+    rows = values.reshape(-1, len(arrays.leaf_ids))
+    sums = np.zeros((len(rows), len(arrays)))
+    sums[:, arrays.leaf_ids] = rows
+    add_children_sums(AncestorIndex.of(arrays).level_segments, sums)
+    return sums if values.ndim > 1 else sums[0]
+
+
+class LiftingResult:
+    """
+    The result of lifting a cluster over a taxonomy. The taxonomy is not
+    changed: all the values are kept in arrays indexed by the node ids
+    of the taxonomy. The lifted tree is the taxonomy with the zero-weight
+    subtrees collapsed (pruned) and the edges reduced; "kept" marks its
+    nodes and "parent" gives its structure.
+
+    Initial attributes
+    ------------------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    gamma_v, lambda_v, threshold : float
+        the parameters of the run
+    leaf_weights : np.ndarray
+        normalized weights of the leaves before the truncation
+    lifted : bool
+        "False" if no weight is left after the truncation (or there was
+        no positive weight at all); the other attributes are not set then
+    u : np.ndarray
+        membership of every node after the truncation
+    root_sum : float
+        sum of the squared memberships of the leaves (after normalization)
+    score : np.ndarray
+        the original weights of the leaves, zero for internal nodes
+    kept : np.ndarray
+        boolean mask: the node is in the lifted tree
+    parent : np.ndarray
+        parent of every node in the lifted tree, -1 for the root and
+        the nodes not in the lifted tree
+    e : np.ndarray
+        layer number (depth in the lifted tree), -1 for the nodes not in
+        the lifted tree
+    v, V, p : np.ndarray
+        ParGenFS parameters of every node
+    chosen : np.ndarray
+        boolean mask: the node is its own head subject (H = [node]);
+        the head subjects of another node are the topmost chosen nodes
+        of its subtree, so H and L are built only when requested
+
+    Main methods
+    ------------
+    children_of(node_id)
+        returns the children of the node in the lifted tree
+
+    gaps(node_id) / heads(node_id) / losses(node_id)
+        returns the node ids in G / H / L of the node
+
+    to_tree(node_class)
+        builds the lifted tree of new nodes with all the parameters set
+
+    """
+    def __init__(self, arrays: TreeArrays, gamma_v: float, lambda_v: float, \
+                 threshold: float) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+        gamma_v : float
+            gamma penalty value
+        lambda_v : float
+            lambda penalty value
+        threshold : float
+            the threshold for the normalized leaf weights
+
+        Returns
+        -------
+        None
+        """
+        self.arrays = arrays
+        self.gamma_v = gamma_v
+        self.lambda_v = lambda_v
+        self.threshold = threshold
+        self.lifted = False
+        self.leaf_weights = np.zeros(len(arrays.leaf_ids))
+        self.u: Union[np.ndarray, None] = None
+        self.root_sum = .0
+        self.score: Union[np.ndarray, None] = None
+        self.kept: Union[np.ndarray, None] = None
+        self.parent: Union[np.ndarray, None] = None
+        self.e: Union[np.ndarray, None] = None
+        self.v: Union[np.ndarray, None] = None
+        self.V: Union[np.ndarray, None] = None
+        self.p: Union[np.ndarray, None] = None
+        self.chosen: Union[np.ndarray, None] = None
+        self._children: Dict[int, List[int]] = {}
+        # the gaps of a node are a slice of one sequence of gaps
+        self._gap_order: Union[np.ndarray, None] = None
+        self._gap_start: Union[np.ndarray, None] = None
+        self._gap_end: Union[np.ndarray, None] = None
+        # ids of the chosen nodes and the nearest chosen ancestor of every node
+        self._chosen_ids: Union[np.ndarray, None] = None
+        self._covering: Union[np.ndarray, None] = None
+        self._offshoots: List[int] = []
+
+    def children_of(self, node_id: int) -> List[int]:
+        """Returns the children of the node in the lifted tree
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        List[int]
+            ids of the children
+        """
+        return self._children.get(node_id, [])
+
+    def gaps(self, node_id: int) -> List[int]:
+        """Returns the gaps of the node (G)
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        List[int]
+            ids of the gaps
+        """
+        if self._gap_order is None:
+            return []
+        return self._gap_order[self._gap_start[node_id]:self._gap_end[node_id]].tolist()
+
+    def heads(self, node_id: int) -> List[int]:
+        """Returns the head subjects of the node (H)
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        List[int]
+            ids of the head subjects
+        """
+        if self.chosen is None or not self.kept[node_id]:
+            return []
+        if self.chosen[node_id]:
+            return [node_id]
+        # the chosen nodes of the subtree not covered by a chosen node below this one
+        first, last = np.searchsorted(self._chosen_ids, \
+                                      [node_id, AncestorIndex.of(self.arrays).exit[node_id] + 1])
+        candidates = self._chosen_ids[first:last]
+        return candidates[self._covering[candidates] < node_id].tolist()
+
+    def losses(self, node_id: int) -> List[int]:
+        """Returns the losses of the node (L)
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        List[int]
+            ids of the losses
+        """
+        if self.chosen is None or not self.kept[node_id]:
+            return []
+        if self.chosen[node_id]:
+            return self.gaps(node_id) if node_id in self._children else []
+        return [gap for head in self.heads(node_id) if head in self._children \
+                for gap in self.gaps(head)]
+
+    def to_tree(self, node_class: Type[BaseNode] = Node) -> BaseNode:
+        """Builds the lifted tree of new nodes with all the ParGenFS
+        parameters set, the same as pargenfs stages set them on the
+        taxonomy nodes; e.g., for make_result_table and make_ete3_lifted
+
+        Parameters
+        ----------
+        node_class : Type[BaseNode], default=Node
+            a class of the nodes
+
+        Returns
+        -------
+        BaseNode
+            the root of the lifted tree
+        """
+        arrays = self.arrays
+        nodes: Dict[int, BaseNode] = {}
+
+        def get_node(node_id: int) -> BaseNode:
+            if node_id not in nodes:
+                nodes[node_id] = node_class(arrays.index(node_id), arrays.name(node_id), None)
+            return nodes[node_id]
+
+        kept_ids = np.flatnonzero(self.kept).tolist()
+        offshoots = set(self._offshoots)
+        for node_id in kept_ids:
+            node = get_node(node_id)
+            parent_id = int(self.parent[node_id])
+            if parent_id >= 0:
+                node.parent = nodes[parent_id]
+                node.parent.children.append(node)
+            node.u = float(self.u[node_id])
+            node.score = float(self.score[node_id])
+            node.e = int(self.e[node_id])
+            node.v = float(self.v[node_id])
+            gaps = self.gaps(node_id)
+            # empty sums are integer zeros in the node-based stages
+            node.V = float(self.V[node_id]) if gaps else 0
+            node.G = [get_node(gap) for gap in gaps]
+            node.H = [get_node(head) for head in self.heads(node_id)]
+            node.L = [get_node(loss) for loss in self.losses(node_id)]
+            if node_id in self._children:
+                node.p = float(self.p[node_id])
+            else:
+                node.o = True
+                node.p = float(self.p[node_id]) if self.u[node_id] > 0 else 0
+                if node_id in offshoots:
+                    node.of = 1
+
+        return nodes[0]
+
+
+def lift(arrays: TreeArrays, leaf_weights: np.ndarray, gamma_v: float = GAMMA, \
+         lambda_v: float = LAMBDA, threshold: float = LIMIT) -> LiftingResult:
+    """Lifts a cluster over the taxonomy (ParGenFS) without changing it
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    leaf_weights : np.ndarray
+        cluster membership of the leaves (in the order of
+        TreeArrays.leaf_ids), e.g. from pargenfs.get_cluster_vector
+    gamma_v : float, default=GAMMA
+        gamma penalty value
+    lambda_v : float, default=LAMBDA
+        lambda penalty value
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    LiftingResult
+        the result of the run
+    """
+    return lift_batch(arrays, np.asarray(leaf_weights, dtype=float)[None, :], gamma_v, \
+                      lambda_v, threshold)[0]
+
+
+def lift_batch(arrays: TreeArrays, membership: np.ndarray, gamma_v: float = GAMMA, \
+               lambda_v: float = LAMBDA, threshold: float = LIMIT) -> List[LiftingResult]:
+    """Lifts every cluster of a membership matrix over the taxonomy. The
+    normalization, the truncation and the weights of the internal nodes
+    are computed for all the clusters at once; the pruning and the
+    penalties are computed per cluster. The results are the same as the
+    ones of lift for every row
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    membership : np.ndarray
+        membership matrix, size: (number_of_clusters x number_of_leaves),
+        the columns in the order of TreeArrays.leaf_ids, e.g. from
+        pargenfs.get_cluster_matrix
+    gamma_v : float, default=GAMMA
+        gamma penalty value
+    lambda_v : float, default=LAMBDA
+        lambda penalty value
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    List[LiftingResult]
+        the results, one per cluster
+    """
+    results = _prepare_batch(arrays, membership, gamma_v, lambda_v, threshold)
+    for result in results:
+        if result.lifted:
+            _set_penalties(result)
+    return results
+
+
+def _prepare_batch(arrays: TreeArrays, membership: np.ndarray, gamma_v: float, \
+                   lambda_v: float, threshold: float) -> List[LiftingResult]:
+    """Runs the stages of lift_batch which do not depend on gamma and
+    lambda: the normalization, the truncation, the weights of the
+    internal nodes, the pruning, the gaps and the reduction of the edges
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    membership : np.ndarray
+        membership matrix (see lift_batch)
+    gamma_v : float
+        gamma penalty value
+    lambda_v : float
+        lambda penalty value
+    threshold : float
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    List[LiftingResult]
+        the results without the penalties, one per cluster
+    """
+    weights = np.asarray(membership, dtype=float).reshape(-1, len(arrays.leaf_ids))
+    results = [LiftingResult(arrays, gamma_v, lambda_v, threshold) for _ in range(len(weights))]
+
+    summs = subtree_sums(arrays, weights * weights)[:, 0]
+    positive = summs > 0
+    normalized = np.zeros_like(weights)
+    normalized[positive] = weights[positive] / np.sqrt(summs[positive])[:, None]
+
+    truncated = np.where(normalized < threshold, .0, normalized)
+    summs_after_trunc = subtree_sums(arrays, truncated * truncated)[:, 0]
+    lifted = positive & (summs_after_trunc != 0)
+    leaf_u = np.zeros_like(weights)
+    leaf_u[lifted] = truncated[lifted] / np.sqrt(summs_after_trunc[lifted])[:, None]
+
+    sums = subtree_sums(arrays, leaf_u * leaf_u)
+    u = np.sqrt(sums)
+    u[:, arrays.leaf_ids] = leaf_u
+
+    for k, result in enumerate(results):
+        if positive[k]:
+            result.leaf_weights = normalized[k]
+        if not lifted[k]:
+            continue
+        score = np.zeros(len(arrays))
+        score[arrays.leaf_ids] = weights[k]
+
+        result.lifted = True
+        result.u = u[k]
+        result.root_sum = float(sums[k, 0])
+        result.score = score
+        _set_structure(result)
+    return results
+
+
+def _set_structure(result: LiftingResult) -> None:
+    """Prunes the zero-weight subtrees, sets gaps and parameters G, v, V
+    and reduces the edges (the node-based stages prune_tree,
+    set_gaps_for_tree, set_parameters and reduce_edges)
+
+    Parameters
+    ----------
+    result : LiftingResult
+        the result with memberships set
+
+    Returns
+    -------
+    None
+    """
+    arrays = result.arrays
+    u = result.u
+    count = len(arrays)
+    parent = arrays.parent
+    is_leaf = arrays.degree == 0
+
+    # the nodes left by pruning: nodes with nonzero parents (and the root);
+    # zero-weight internal ones among them are collapsed into leaves
+    visible = np.ones(count, dtype=bool)
+    visible[1:] = u[parent[1:]] > 0
+    collapsed = visible & (u == 0) & ~is_leaf
+    opened_mask = u > 0
+    opened = opened_mask.tolist()
+
+    # the gaps of a node are its zero-weight children followed by the gaps
+    # of its nonzero children, so the gaps of every node form a slice of
+    # one sequence and nothing is copied or deduplicated
+    gap_order: List[int] = []
+    gap_start = np.zeros(count, dtype=ID_DTYPE)
+    gap_end = np.zeros(count, dtype=ID_DTYPE)
+    if collapsed[0]:
+        gap_order.append(0)
+        gap_end[0] = 1
+    stack = [(0, False)] if opened[0] else []
+    while stack:
+        node_id, processed = stack.pop()
+        if processed:
+            gap_end[node_id] = len(gap_order)
+            continue
+        gap_start[node_id] = len(gap_order)
+        stack.append((node_id, True))
+        children = arrays.children_of(node_id).tolist()
+        for child in children:
+            if not opened[child]:
+                gap_start[child] = len(gap_order)
+                gap_order.append(child)
+        stack.extend((child, False) for child in reversed(children) if opened[child])
+    closed = ~opened_mask
+    gap_end[closed] = gap_start[closed] + collapsed[closed]
+
+    # V is the sum of v over the gaps: the gaps of the nonzero children
+    # come with their sums, so V is a subtree sum of v over the zero nodes
+    v = np.ones(count)
+    v[1:] = u[parent[1:]]
+    sums = np.where(opened_mask, .0, v)[None, :]
+    add_children_sums(AncestorIndex.of(arrays).level_segments, sums)
+    V = np.where(opened_mask, sums[0], np.where(collapsed, v, .0))
+
+    # reducing the edges: a node with a single child adopts its grandchildren
+    kept = np.zeros(count, dtype=bool)
+    lifted_parent = np.full(count, -1, dtype=ID_DTYPE)
+    e = np.full(count, -1, dtype=ID_DTYPE)
+    children_lists: Dict[int, List[int]] = {}
+    stack = [(0, 0)]
+    while stack:
+        node_id, layer = stack.pop()
+        kept[node_id] = True
+        e[node_id] = layer
+        children = arrays.children_of(node_id).tolist() if opened[node_id] else []
+        if len(children) == 1:
+            child = children[0]
+            children = arrays.children_of(child).tolist() if opened[child] else []
+        if children:
+            children_lists[node_id] = children
+            lifted_parent[children] = node_id
+            stack.extend((child, layer + 1) for child in reversed(children))
+
+    result.kept = kept
+    result.parent = lifted_parent
+    result.e = e
+    result.v = v
+    result.V = V
+    result._children = children_lists
+    result._gap_order = np.array(gap_order, dtype=ID_DTYPE)
+    result._gap_start = gap_start
+    result._gap_end = gap_end
+
+
+def _set_penalties(result: LiftingResult) -> None:
+    """Computes the penalties and the chosen nodes of the lifted tree (the
+    node-based stages make_init_step, make_recursive_step and
+    indicate_offshoots); the head subjects and losses are derived from
+    the chosen nodes on request
+
+    Parameters
+    ----------
+    result : LiftingResult
+        the result with the lifted tree set
+
+    Returns
+    -------
+    None
+    """
+    arrays = result.arrays
+    count = len(arrays)
+    u = result.u.tolist()
+    V = result.V.tolist()
+    p_list = [.0] * count
+    chosen = [False] * count
+    # whether H of the node is not empty
+    has_heads = [False] * count
+
+    # the nodes of the lifted tree keep the preorder, so decreasing ids
+    # give children before parents
+    kept_ids = np.flatnonzero(result.kept).tolist()
+    for node_id in reversed(kept_ids):
+        children = result._children.get(node_id)
+        if children is None:
+            if u[node_id] > 0:
+                chosen[node_id] = has_heads[node_id] = True
+                p_list[node_id] = result.gamma_v * u[node_id]
+            continue
+
+        sum_penalty = .0
+        for child in children:
+            sum_penalty += p_list[child]
+        penalty = u[node_id] + result.lambda_v * V[node_id]
+        if penalty < sum_penalty:
+            chosen[node_id] = has_heads[node_id] = True
+            p_list[node_id] = penalty
+        else:
+            has_heads[node_id] = any(has_heads[child] for child in children)
+            p_list[node_id] = sum_penalty
+
+    # the nearest chosen ancestor of every node in the lifted tree
+    lifted_parent = result.parent.tolist()
+    covering = [-1] * count
+    for node_id in kept_ids[1:]:
+        parent = lifted_parent[node_id]
+        covering[node_id] = parent if chosen[parent] else covering[parent]
+
+    # offshoots: leaves whose parents in the taxonomy have no head subjects
+    parent = arrays.parent.tolist()
+    offshoots = [node_id for node_id in kept_ids
+                 if node_id not in result._children and parent[node_id] >= 0
+                 and not has_heads[parent[node_id]]]
+
+    result.p = np.array(p_list)
+    result.chosen = np.array(chosen, dtype=bool)
+    result._chosen_ids = np.flatnonzero(result.chosen)
+    result._covering = np.array(covering, dtype=ID_DTYPE)
+    result._offshoots = offshoots
+
+
+class ParameterSweep:
+    """
+    Lifting of a cluster over a taxonomy for a grid of gamma and lambda
+    values. The stages which do not depend on the penalty values (the
+    normalization, the truncation, the pruning, the gaps and the
+    reduction of the edges) are run once; only the penalties are
+    computed for every pair of values.
+
+    Initial attributes
+    ------------------
+    gammas, lambdas : np.ndarray
+        the values of gamma and lambda
+    prepared : LiftingResult
+        the result of the stages not depending on gamma and lambda
+    lifted : bool
+        "False" if no weight is left after the truncation; the grid is
+        empty then
+    penalties : np.ndarray
+        the penalty of the root (p) for every pair of values, size:
+        (number_of_gammas x number_of_lambdas)
+    head_subjects : List[List[List[int]]]
+        ids of the head subjects of the root (H) for every pair of
+        values, indexed in the same way as "penalties"
+
+    Main methods
+    ------------
+    result(i, j)
+        returns the lifting result for the i-th gamma and the j-th lambda
+
+    """
+    def __init__(self, prepared: LiftingResult, gammas: Sequence[float], \
+                 lambdas: Sequence[float]) -> None:
+        """Constructor: computes the grid
+
+        Parameters
+        ----------
+        prepared : LiftingResult
+            the result of the stages not depending on gamma and lambda
+        gammas : Sequence[float]
+            gamma penalty values
+        lambdas : Sequence[float]
+            lambda penalty values
+
+        Returns
+        -------
+        None
+        """
+        self.gammas = np.asarray(gammas, dtype=float)
+        self.lambdas = np.asarray(lambdas, dtype=float)
+        self.prepared = prepared
+        self.lifted = prepared.lifted
+        self.penalties = np.zeros((len(self.gammas), len(self.lambdas)))
+        self.head_subjects: List[List[List[int]]] = \
+            [[[] for _ in self.lambdas] for _ in self.gammas]
+        if not self.lifted:
+            return
+        for i in range(len(self.gammas)):
+            for j in range(len(self.lambdas)):
+                result = self.result(i, j)
+                self.penalties[i, j] = result.p[0]
+                self.head_subjects[i][j] = result.heads(0)
+
+    def result(self, i: int, j: int) -> LiftingResult:
+        """Returns the lifting result for a pair of values; only the
+        penalties are computed, the rest is shared with the prepared
+        result
+
+        Parameters
+        ----------
+        i : int
+            the number of the gamma value
+        j : int
+            the number of the lambda value
+
+        Returns
+        -------
+        LiftingResult
+            the result of the run
+        """
+        result = copy.copy(self.prepared)
+        result.gamma_v = float(self.gammas[i])
+        result.lambda_v = float(self.lambdas[j])
+        if result.lifted:
+            _set_penalties(result)
+        return result
+
+
+def lift_sweep(arrays: TreeArrays, leaf_weights: np.ndarray, gammas: Sequence[float], \
+               lambdas: Sequence[float], threshold: float = LIMIT) -> ParameterSweep:
+    """Lifts a cluster over the taxonomy for every pair of gamma and
+    lambda values (see ParameterSweep)
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    leaf_weights : np.ndarray
+        cluster membership of the leaves (in the order of
+        TreeArrays.leaf_ids)
+    gammas : Sequence[float]
+        gamma penalty values
+    lambdas : Sequence[float]
+        lambda penalty values
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    ParameterSweep
+        the penalties and the head subjects of the root for every pair
+    """
+    prepared = _prepare_batch(arrays, np.asarray(leaf_weights, dtype=float)[None, :], \
+                              GAMMA, LAMBDA, threshold)[0]
+    return ParameterSweep(prepared, gammas, lambdas)
+
+
+class _IncrementalLifting:
+    """
+    The state of lifting a cluster which is updated leaf by leaf: the
+    memberships (not normalized), the number of nonzero leaves, the
+    zero-weight children, V and the penalties of every node, kept in
+    lists indexed by the node ids. The lifted tree depends on the
+    weights only through the zero-weight nodes: a node with a single
+    child adopts the children of the child, which is skipped, so the
+    lifted parents and children are set once.
+
+    Initial attributes
+    ------------------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    gamma_v, lambda_v : float
+        the parameters of the run
+
+    """
+    def __init__(self, arrays: TreeArrays, gamma_v: float, lambda_v: float) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+        gamma_v : float
+            gamma penalty value
+        lambda_v : float
+            lambda penalty value
+
+        Returns
+        -------
+        None
+        """
+        self.arrays = arrays
+        self.gamma_v = gamma_v
+        self.lambda_v = lambda_v
+
+    def _start(self, weights: np.ndarray) -> None:
+        """Lifts the cluster for the given weights of the leaves, keeping
+        the state the updates start from
+
+        Parameters
+        ----------
+        weights : np.ndarray
+            the weights of the leaves after the truncation (nonnegative,
+            possibly not normalized)
+
+        Returns
+        -------
+        None
+        """
+        arrays = self.arrays
+        count = len(arrays)
+        parent = arrays.parent.tolist()
+        degree = arrays.degree.tolist()
+        children = arrays.children.tolist()
+        offsets = arrays.child_offsets.tolist()
+
+        # the lifted tree does not depend on the threshold but through the
+        # zero-weight nodes: a node with a single child adopts the children
+        # of the child, so the child is skipped
+        visited = [True] * count
+        lifted_parent = [-1] * count
+        lifted_children: Dict[int, List[int]] = {}
+        for node_id in range(1, count):
+            parent_id = parent[node_id]
+            if visited[parent_id]:
+                visited[node_id] = degree[parent_id] != 1
+                lifted_parent[node_id] = parent_id
+            else:
+                lifted_parent[node_id] = parent[parent_id]
+        for node_id in range(count):
+            if visited[node_id] and degree[node_id]:
+                first, last = offsets[node_id], offsets[node_id + 1]
+                if degree[node_id] == 1:
+                    first, last = offsets[children[first]], offsets[children[first] + 1]
+                if first < last:
+                    lifted_children[node_id] = children[first:last]
+
+        leaf_values = np.zeros((2, len(weights)))
+        leaf_values[0] = weights * weights
+        leaf_values[1] = weights > 0
+        sums = subtree_sums(arrays, leaf_values)
+        opened_mask = sums[1] > 0
+        U = np.sqrt(sums[0])
+        U[arrays.leaf_ids] = weights
+        # the gaps of a node are the zero-weight children of the nonzero
+        # nodes of its subtree, and v of a gap is u of its parent
+        zero_children = np.bincount(parent[1:], weights=~opened_mask[1:], minlength=count)
+        # own value first, then the sum of the children in their order, the
+        # same way the updates recompute V of a node
+        V = np.where(opened_mask, zero_children * U, .0).tolist()
+        for node_id in reversed(range(count)):
+            if degree[node_id]:
+                gap_sum = .0
+                for child in children[offsets[node_id]:offsets[node_id + 1]]:
+                    gap_sum += V[child]
+                V[node_id] += gap_sum
+
+        self._parent = parent
+        self._visited = visited
+        self._lifted_parent = lifted_parent
+        self._lifted_children = lifted_children
+        self._leaf_count = sums[1].astype(ID_DTYPE).tolist()
+        self._S = sums[0].tolist()
+        self._U = U.tolist()
+        self._zero_children = zero_children.astype(ID_DTYPE).tolist()
+        self._V = V
+        self._p = [.0] * count
+        self._children_sum = [.0] * count
+        chosen = [False] * count
+
+        opened = opened_mask.tolist()
+        for node_id in reversed(range(count)):
+            kept = visited[node_id] and (node_id == 0 or opened[lifted_parent[node_id]])
+            if not kept or not opened[node_id]:
+                continue
+            node_children = lifted_children.get(node_id)
+            if node_children is None:
+                chosen[node_id] = True
+                self._p[node_id] = self.gamma_v * self._U[node_id]
+                continue
+            sum_penalty = .0
+            for child in node_children:
+                sum_penalty += self._p[child]
+            self._children_sum[node_id] = sum_penalty
+            penalty = self._U[node_id] + self.lambda_v * self._V[node_id]
+            chosen[node_id] = penalty < sum_penalty
+            self._p[node_id] = penalty if chosen[node_id] else sum_penalty
+
+        self._chosen_now = chosen
+        self._chosen = np.array(chosen, dtype=bool)
+
+    def _root_penalty(self) -> float:
+        """Returns the penalty of the root for the normalized memberships
+
+        Returns
+        -------
+        float
+            the penalty
+        """
+        return self._p[0] / self._S[0] ** .5
+
+    def _topmost(self, chosen: np.ndarray) -> List[int]:
+        """Returns the topmost chosen nodes: the head subjects of the root
+
+        Parameters
+        ----------
+        chosen : np.ndarray
+            boolean mask of the chosen nodes
+
+        Returns
+        -------
+        List[int]
+            ids of the head subjects
+        """
+        exit_ = AncestorIndex.of(self.arrays).exit
+        heads = []
+        last = -1
+        for node_id in np.flatnonzero(chosen).tolist():
+            if node_id > last:
+                heads.append(node_id)
+                last = int(exit_[node_id])
+        return heads
+
+
+class ThresholdPath(_IncrementalLifting):
+    """
+    Lifting of a cluster over a taxonomy for every distinct truncation
+    threshold. The k-th threshold is the k-th smallest positive
+    normalized leaf weight: any threshold above the previous one and
+    not above this one gives the same lifting. The leaves are sorted
+    once and truncated one by one in the order of their weights; a
+    truncated leaf changes the memberships, the gaps and the penalties
+    of its ancestors only, so only they are updated, and the whole path
+    costs about as much as one lift unless the taxonomy is very deep.
+    The memberships are not normalized along the path (the choice of
+    head subjects does not depend on the scale of the memberships) and
+    the sums are updated by differences, so the penalties may differ
+    from the ones of lift in the last digits.
+
+    Initial attributes
+    ------------------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    gamma_v, lambda_v : float
+        the parameters of the run
+    leaf_weights : np.ndarray
+        cluster membership of the leaves (in the order of
+        TreeArrays.leaf_ids)
+    thresholds : np.ndarray
+        the distinct thresholds in increasing order, empty if there is
+        no positive weight
+    leaf_counts : np.ndarray
+        the number of leaves left after the truncation at every threshold
+    penalties : np.ndarray
+        the penalty of the root (p) at every threshold
+    removed : List[List[int]]
+        ids of the leaves truncated when passing to every threshold from
+        the previous one (none for the first threshold)
+    pruned : List[List[int]]
+        ids of the nodes whose subtrees get zero weight (and are
+        collapsed) when passing to every threshold
+    changes : List[List[int]]
+        ids of the nodes which become or cease to be chosen (their own
+        head subjects, see LiftingResult.chosen) when passing to every
+        threshold
+
+    Main methods
+    ------------
+    chosen_at(k)
+        returns the chosen nodes at the k-th threshold
+
+    head_subjects(k)
+        returns the head subjects of the root (H) at the k-th threshold
+
+    result(k)
+        lifts the cluster at the k-th threshold (see lift)
+
+    """
+    def __init__(self, arrays: TreeArrays, leaf_weights: np.ndarray, gamma_v: float, \
+                 lambda_v: float) -> None:
+        """Constructor: computes the path
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+        leaf_weights : np.ndarray
+            cluster membership of the leaves (in the order of
+            TreeArrays.leaf_ids)
+        gamma_v : float
+            gamma penalty value
+        lambda_v : float
+            lambda penalty value
+
+        Returns
+        -------
+        None
+        """
+        super().__init__(arrays, gamma_v, lambda_v)
+        self.leaf_weights = np.asarray(leaf_weights, dtype=float)
+        self.thresholds = np.zeros(0)
+        self.leaf_counts = np.zeros(0, dtype=ID_DTYPE)
+        self.penalties = np.zeros(0)
+        self.removed: List[List[int]] = []
+        self.pruned: List[List[int]] = []
+        self.changes: List[List[int]] = []
+        self._chosen: Union[np.ndarray, None] = None
+        # the last chosen nodes replayed, so that thresholds go one by one
+        self._replayed: Union[Tuple[int, np.ndarray], None] = None
+
+        # the same normalization as in lift_batch, so that the thresholds
+        # are exactly the normalized weights lift compares with
+        summ = subtree_sums(arrays, self.leaf_weights * self.leaf_weights)[0]
+        if not summ > 0:
+            return
+        normalized = self.leaf_weights / np.sqrt(summ)
+        positive = normalized > 0
+        if not positive.any():
+            return
+        weights = np.where(positive, normalized, .0)
+        order = np.argsort(weights, kind="stable")[len(weights) - int(positive.sum()):]
+        self.thresholds, starts = np.unique(weights[order], return_index=True)
+        self._start(weights)
+
+        leaf_ids = arrays.leaf_ids[order].tolist()
+        steps = len(self.thresholds)
+        leaf_counts = [len(leaf_ids)] * steps
+        penalties = [self._root_penalty()] * steps
+        self.removed = [[] for _ in range(steps)]
+        self.pruned = [[] for _ in range(steps)]
+        self.changes = [[] for _ in range(steps)]
+        bounds = starts.tolist() + [len(leaf_ids)]
+        for k in range(1, steps):
+            # the leaves of the previous threshold are truncated at this one
+            changes: Set[int] = set()
+            for leaf_id in leaf_ids[bounds[k - 1]:bounds[k]]:
+                self._remove_leaf(leaf_id, self.pruned[k], changes)
+            self.changes[k] = sorted(changes)
+            self.removed[k] = leaf_ids[bounds[k - 1]:bounds[k]]
+            leaf_counts[k] = len(leaf_ids) - bounds[k]
+            penalties[k] = self._root_penalty()
+        self.leaf_counts = np.array(leaf_counts, dtype=ID_DTYPE)
+        self.penalties = np.array(penalties)
+
+    def _remove_leaf(self, leaf_id: int, pruned: List[int], changes: Set[int]) -> None:
+        """Truncates a leaf and updates its ancestors
+
+        Parameters
+        ----------
+        leaf_id : int
+            the leaf id
+        pruned : List[int]
+            the nodes whose subtrees get zero weight are added here
+        changes : Set[int]
+            the nodes which become or cease to be chosen are toggled here
+
+        Returns
+        -------
+        None
+        """
+        parent, leaf_count, S, U = self._parent, self._leaf_count, self._S, self._U
+        zero_children, V, p, chosen = self._zero_children, self._V, self._p, self._chosen_now
+        children_sum, lifted_parent = self._children_sum, self._lifted_parent
+        square = U[leaf_id] * U[leaf_id]
+
+        # the nodes left with no leaves form the lower part of the path
+        path = []
+        node_id = leaf_id
+        while node_id >= 0:
+            path.append(node_id)
+            node_id = parent[node_id]
+        zeroed = 0
+        for node_id in path:
+            leaf_count[node_id] -= 1
+            if leaf_count[node_id] == 0:
+                zeroed += 1
+
+        # they stop contributing to V of the nodes above; the topmost of
+        # them becomes a gap of its parent
+        top = path[zeroed - 1]
+        delta = .0
+        for node_id in path[:zeroed]:
+            delta -= zero_children[node_id] * U[node_id]
+            S[node_id] = U[node_id] = V[node_id] = .0
+            if chosen[node_id]:
+                chosen[node_id] = False
+                changes ^= {node_id}
+        pruned.append(top)
+        children_sum[lifted_parent[top]] -= p[top]
+        for node_id in path[:zeroed]:
+            p[node_id] = .0
+
+        zero_children_before = zero_children[parent[top]]
+        zero_children[parent[top]] += 1
+        for node_id in path[zeroed:]:
+            own = zero_children[node_id] * U[node_id]
+            if node_id == parent[top]:
+                own = zero_children_before * U[node_id]
+            S[node_id] = max(S[node_id] - square, .0)
+            U[node_id] = S[node_id] ** .5
+            delta += zero_children[node_id] * U[node_id] - own
+            V[node_id] += delta
+
+        for node_id in path[zeroed:]:
+            if not self._visited[node_id]:
+                continue
+            if node_id in self._lifted_children:
+                penalty = U[node_id] + self.lambda_v * V[node_id]
+                is_chosen = penalty < children_sum[node_id]
+                new_penalty = penalty if is_chosen else children_sum[node_id]
+            else:
+                is_chosen = True
+                new_penalty = self.gamma_v * U[node_id]
+            if is_chosen != chosen[node_id]:
+                chosen[node_id] = is_chosen
+                changes ^= {node_id}
+            if node_id:
+                children_sum[lifted_parent[node_id]] += new_penalty - p[node_id]
+            p[node_id] = new_penalty
+
+    def chosen_at(self, k: int) -> np.ndarray:
+        """Returns the chosen nodes at the k-th threshold
+
+        Parameters
+        ----------
+        k : int
+            the number of the threshold
+
+        Returns
+        -------
+        np.ndarray
+            boolean mask: the node is its own head subject
+        """
+        first, chosen = self._replayed if self._replayed is not None \
+            and self._replayed[0] <= k else (0, self._chosen)
+        chosen = chosen.copy()
+        for changes in self.changes[first + 1:k + 1]:
+            chosen[changes] = ~chosen[changes]
+        self._replayed = (k, chosen)
+        return chosen.copy()
+
+    def head_subjects(self, k: int) -> List[int]:
+        """Returns the head subjects of the root at the k-th threshold:
+        the topmost chosen nodes
+
+        Parameters
+        ----------
+        k : int
+            the number of the threshold
+
+        Returns
+        -------
+        List[int]
+            ids of the head subjects
+        """
+        return self._topmost(self.chosen_at(k))
+
+    def result(self, k: int) -> LiftingResult:
+        """Lifts the cluster at the k-th threshold
+
+        Parameters
+        ----------
+        k : int
+            the number of the threshold
+
+        Returns
+        -------
+        LiftingResult
+            the result of the run
+        """
+        return lift(self.arrays, self.leaf_weights, self.gamma_v, self.lambda_v, \
+                    float(self.thresholds[k]))
+
+
+def lift_threshold_path(arrays: TreeArrays, leaf_weights: np.ndarray, gamma_v: float = GAMMA, \
+                        lambda_v: float = LAMBDA) -> ThresholdPath:
+    """Lifts a cluster over the taxonomy for every distinct truncation
+    threshold (see ThresholdPath)
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    leaf_weights : np.ndarray
+        cluster membership of the leaves (in the order of
+        TreeArrays.leaf_ids)
+    gamma_v : float, default=GAMMA
+        gamma penalty value
+    lambda_v : float, default=LAMBDA
+        lambda penalty value
+
+    Returns
+    -------
+    ThresholdPath
+        the thresholds and the changes of the lifting along them
+    """
+    return ThresholdPath(arrays, leaf_weights, gamma_v, lambda_v)
+
+
+class LiftingSession(_IncrementalLifting):
+    """
+    Lifting of a cluster whose membership changes a few leaves at a time.
+    An update changes the weights of some leaves; the normalization
+    changes the weights of all the leaves by one factor, so the state is
+    kept in the memberships which are not normalized, and only the
+    leaves crossing the truncation threshold change besides the updated
+    ones. The nodes on the paths from the changed leaves to the root are
+    recomputed from their children, in the same order of floating-point
+    additions as lift sums them, so the state after any updates is the
+    same as the one of a new session over the current weights, and the
+    truncation is the same as the one of lift. The penalties are those
+    of lift up to the normalization.
+
+    Initial attributes
+    ------------------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    gamma_v, lambda_v, threshold : float
+        the parameters of the run
+    leaf_weights : np.ndarray
+        the current cluster membership of the leaves (in the order of
+        TreeArrays.leaf_ids)
+    lifted : bool
+        "False" if no weight is left after the truncation
+    penalty : float
+        the penalty of the root (p), zero if the cluster is not lifted
+    changes : List[int]
+        ids of the nodes which became or ceased to be chosen (their own
+        head subjects, see LiftingResult.chosen) by the last update
+
+    Main methods
+    ------------
+    update(weights)
+        sets the weights of some leaves and updates the lifting
+
+    chosen()
+        returns the chosen nodes
+
+    head_subjects()
+        returns the head subjects of the root (H)
+
+    result()
+        lifts the cluster anew (see lift)
+
+    """
+    def __init__(self, arrays: TreeArrays, leaf_weights: np.ndarray, gamma_v: float = GAMMA, \
+                 lambda_v: float = LAMBDA, threshold: float = LIMIT) -> None:
+        """Constructor: lifts the cluster
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+        leaf_weights : np.ndarray
+            cluster membership of the leaves (in the order of
+            TreeArrays.leaf_ids)
+        gamma_v : float, default=GAMMA
+            gamma penalty value
+        lambda_v : float, default=LAMBDA
+            lambda penalty value
+        threshold : float, default=LIMIT
+            the threshold for the normalized leaf weights
+
+        Returns
+        -------
+        None
+        """
+        super().__init__(arrays, gamma_v, lambda_v)
+        self.threshold = threshold
+        self.leaf_weights = np.array(leaf_weights, dtype=float)
+        self.changes: List[int] = []
+        self._leaf_ids = arrays.leaf_ids.tolist()
+        self._children = arrays.children.tolist()
+        self._offsets = arrays.child_offsets.tolist()
+
+        # the sums of the squared weights before the truncation give the
+        # normalization; the leaves are sorted by the weights, so that the
+        # leaves crossing the threshold are found by bisection
+        self._W = subtree_sums(arrays, self.leaf_weights * self.leaf_weights).tolist()
+        weights = self.leaf_weights.tolist()
+        self._sorted = sorted(zip(weights, range(len(weights))))
+        scale = sqrt(self._W[0])
+        self._start(np.array([self._truncated(weight, scale) for weight in weights]))
+        self._set_outcome()
+
+    def _truncated(self, weight: float, scale: float) -> float:
+        """Returns the weight of a leaf after the truncation (not normalized)
+
+        Parameters
+        ----------
+        weight : float
+            the weight of the leaf
+        scale : float
+            the normalization: the square root of the sum of the squared
+            weights of the leaves
+
+        Returns
+        -------
+        float
+            the weight or zero
+        """
+        return weight if weight > 0 and not weight / scale < self.threshold else .0
+
+    def _first_kept(self, scale: float) -> int:
+        """Returns the position of the first leaf left after the truncation
+        in the leaves sorted by their weights
+
+        Parameters
+        ----------
+        scale : float
+            the normalization (see _truncated)
+
+        Returns
+        -------
+        int
+            the position
+        """
+        low, high = 0, len(self._sorted)
+        if not scale > 0:
+            return high
+        while low < high:
+            middle = (low + high) // 2
+            if self._truncated(self._sorted[middle][0], scale):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _paths(self, node_ids: Iterable[int]) -> List[int]:
+        """Returns the nodes on the paths from the given nodes to the root,
+        children before parents
+
+        Parameters
+        ----------
+        node_ids : Iterable[int]
+            the node ids
+
+        Returns
+        -------
+        List[int]
+            the node ids in decreasing order
+        """
+        parent = self._parent
+        nodes: Set[int] = set()
+        for node_id in node_ids:
+            while node_id >= 0 and node_id not in nodes:
+                nodes.add(node_id)
+                node_id = parent[node_id]
+        return sorted(nodes, reverse=True)
+
+    def _refresh(self, node_id: int) -> None:
+        """Recomputes the state of the node from the state of its children
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        None
+        """
+        S, U, V, leaf_count = self._S, self._U, self._V, self._leaf_count
+        first, last = self._offsets[node_id], self._offsets[node_id + 1]
+        if first == last:
+            S[node_id] = U[node_id] * U[node_id]
+            leaf_count[node_id] = int(U[node_id] > 0)
+        else:
+            square_sum = .0
+            count = 0
+            zero_children = 0
+            gap_sum = .0
+            for child in self._children[first:last]:
+                square_sum += S[child]
+                count += leaf_count[child]
+                zero_children += leaf_count[child] == 0
+                gap_sum += V[child]
+            S[node_id] = square_sum
+            U[node_id] = sqrt(square_sum)
+            leaf_count[node_id] = count
+            self._zero_children[node_id] = zero_children
+            V[node_id] = (zero_children * U[node_id] if count else .0) + gap_sum
+
+        if not self._visited[node_id]:
+            return
+        node_children = self._lifted_children.get(node_id)
+        if not leaf_count[node_id]:
+            is_chosen = False
+            penalty = .0
+        elif node_children is None:
+            is_chosen = True
+            penalty = self.gamma_v * U[node_id]
+        else:
+            sum_penalty = .0
+            for child in node_children:
+                sum_penalty += self._p[child]
+            self._children_sum[node_id] = sum_penalty
+            penalty = U[node_id] + self.lambda_v * V[node_id]
+            is_chosen = penalty < sum_penalty
+            if not is_chosen:
+                penalty = sum_penalty
+        self._p[node_id] = penalty
+        if is_chosen != self._chosen_now[node_id]:
+            self._chosen_now[node_id] = is_chosen
+            self.changes.append(node_id)
+
+    def _set_outcome(self) -> None:
+        """Sets the attributes describing the current lifting
+
+        Returns
+        -------
+        None
+        """
+        self.lifted = self._leaf_count[0] > 0
+        self.penalty = self._root_penalty() if self.lifted else .0
+
+    def update(self, weights: Dict[int, float]) -> None:
+        """Sets the weights of some leaves and updates the lifting
+
+        Parameters
+        ----------
+        weights : Dict[int, float]
+            the new weights by the numbers of the leaves (positions in
+            TreeArrays.leaf_ids)
+
+        Returns
+        -------
+        None
+        """
+        leaf_ids, W = self._leaf_ids, self._W
+        scale_before = sqrt(W[0])
+        for number, weight in weights.items():
+            weight = float(weight)
+            old = (float(self.leaf_weights[number]), number)
+            del self._sorted[bisect_left(self._sorted, old)]
+            insort(self._sorted, (weight, number))
+            self.leaf_weights[number] = weight
+            W[leaf_ids[number]] = weight * weight
+        offsets, children = self._offsets, self._children
+        for node_id in self._paths(leaf_ids[number] for number in weights):
+            first, last = offsets[node_id], offsets[node_id + 1]
+            if first < last:
+                square_sum = .0
+                for child in children[first:last]:
+                    square_sum += W[child]
+                W[node_id] = square_sum
+
+        # besides the updated leaves, the leaves between the positions of
+        # the threshold before and after the normalization changed
+        scale = sqrt(W[0])
+        low, high = sorted([self._first_kept(scale_before), self._first_kept(scale)])
+        numbers = set(weights)
+        numbers.update(number for _, number in self._sorted[low:high])
+        changed = []
+        for number in numbers:
+            truncated = self._truncated(float(self.leaf_weights[number]), scale)
+            if truncated != self._U[leaf_ids[number]]:
+                self._U[leaf_ids[number]] = truncated
+                changed.append(leaf_ids[number])
+
+        self.changes = []
+        for node_id in self._paths(changed):
+            self._refresh(node_id)
+        self.changes.sort()
+        self._set_outcome()
+
+    def chosen(self) -> np.ndarray:
+        """Returns the chosen nodes
+
+        Returns
+        -------
+        np.ndarray
+            boolean mask: the node is its own head subject
+        """
+        return np.array(self._chosen_now, dtype=bool)
+
+    def head_subjects(self) -> List[int]:
+        """Returns the head subjects of the root: the topmost chosen nodes
+
+        Returns
+        -------
+        List[int]
+            ids of the head subjects
+        """
+        return self._topmost(self.chosen())
+
+    def result(self) -> LiftingResult:
+        """Lifts the cluster with the current weights anew
+
+        Returns
+        -------
+        LiftingResult
+            the result of the run
+        """
+        return lift(self.arrays, self.leaf_weights, self.gamma_v, self.lambda_v, self.threshold)
+
+
+def _support_arrays(arrays: TreeArrays, leaf_ids: np.ndarray) -> Tuple[TreeArrays, np.ndarray]:
+    """Builds the part of the taxonomy lifting a cluster depends on: the
+    given leaves with their ancestors (the support) and the children of
+    the internal nodes of the support. The subtrees of the other
+    children have zero weight and are not entered: an internal child is
+    given a single leaf instead of its subtree, so that it is still
+    collapsed as a gap. The nodes keep the order of their ids
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    leaf_ids : np.ndarray
+        ids of the leaves with nonzero weights
+
+    Returns
+    -------
+    Tuple[TreeArrays, np.ndarray]
+        the arrays of the part and the id in the taxonomy of every node
+        of the part, -1 for the leaves standing for the subtrees
+    """
+    parent = arrays.parent
+    support: Set[int] = set()
+    for node_id in leaf_ids.tolist():
+        while node_id >= 0 and node_id not in support:
+            support.add(node_id)
+            node_id = int(parent[node_id])
+    support_ids = np.array(sorted(support), dtype=ID_DTYPE)
+
+    offsets = arrays.child_offsets
+    internal = support_ids[offsets[support_ids + 1] > offsets[support_ids]]
+    children = [arrays.children[offsets[node_id]:offsets[node_id + 1]] \
+                for node_id in internal.tolist()]
+    nodes = np.union1d(support_ids, np.concatenate(children)) if children else support_ids
+    cut = (offsets[nodes + 1] > offsets[nodes]) & ~np.isin(nodes, support_ids)
+
+    # every cut node is followed by its single leaf
+    count = len(nodes) + int(cut.sum())
+    new_id = np.arange(len(nodes), dtype=ID_DTYPE)
+    new_id[1:] += np.cumsum(cut[:-1])
+    original = np.full(count, -1, dtype=ID_DTYPE)
+    original[new_id] = nodes
+    stub_ids = new_id[cut] + 1
+    part_parent = np.full(count, -1, dtype=ID_DTYPE)
+    part_parent[new_id[1:]] = new_id[np.searchsorted(nodes, arrays.parent[nodes[1:]])]
+    part_parent[stub_ids] = new_id[cut]
+    stub_source = np.zeros(count, dtype=ID_DTYPE)
+    stub_source[new_id] = nodes
+    stub_source[stub_ids] = nodes[cut]
+    depth = arrays.depth[stub_source]
+    depth[stub_ids] += 1
+
+    child_order = np.argsort(part_parent[1:], kind="stable").astype(ID_DTYPE) + 1
+    child_offsets = np.zeros(count + 1, dtype=ID_DTYPE)
+    np.cumsum(np.bincount(part_parent[1:], minlength=count), out=child_offsets[1:])
+    # the position of a node in postorder is id + subtree size - 1 - depth
+    size = np.ones(count, dtype=ID_DTYPE)
+    size_list = size.tolist()
+    part_parent_list = part_parent.tolist()
+    for node_id in range(count - 1, 0, -1):
+        size_list[part_parent_list[node_id]] += size_list[node_id]
+    postorder = np.empty(count, dtype=ID_DTYPE)
+    postorder[np.arange(count) + np.array(size_list, dtype=ID_DTYPE) - 1 - (depth - depth[0])] = \
+        np.arange(count, dtype=ID_DTYPE)
+
+    part = TreeArrays(part_parent, depth - depth[0], child_offsets, child_order, postorder,
+                      arrays.name_ids[stub_source], arrays.names,
+                      arrays.index_ids[stub_source], arrays.indices)
+    return part, original
+
+
+def _expand_result(part_result: LiftingResult, arrays: TreeArrays, original: np.ndarray, \
+                   leaf_positions: np.ndarray, part_positions: np.ndarray) -> LiftingResult:
+    """Turns the result of lifting over a part of the taxonomy (see
+    _support_arrays) into the result over the whole taxonomy
+
+    Parameters
+    ----------
+    part_result : LiftingResult
+        the result over the part
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    original : np.ndarray
+        the id in the taxonomy of every node of the part, -1 for the
+        leaves standing for the subtrees
+    leaf_positions : np.ndarray
+        positions of the leaves with nonzero weights in the taxonomy
+    part_positions : np.ndarray
+        positions of the same leaves in the part
+
+    Returns
+    -------
+    LiftingResult
+        the result over the taxonomy
+    """
+    count = len(arrays)
+    result = LiftingResult(arrays, part_result.gamma_v, part_result.lambda_v, \
+                           part_result.threshold)
+    result.leaf_weights[leaf_positions] = part_result.leaf_weights[part_positions]
+    if not part_result.lifted:
+        return result
+
+    real = original >= 0
+    ids = original[real]
+
+    def spread(values: np.ndarray, fill: Union[float, int, bool]) -> np.ndarray:
+        full = np.full(count, fill, dtype=values.dtype)
+        full[ids] = values[real]
+        return full
+
+    def to_ids(part_ids: np.ndarray) -> np.ndarray:
+        return np.where(part_ids >= 0, original[np.maximum(part_ids, 0)], -1).astype(ID_DTYPE)
+
+    result.lifted = True
+    result.root_sum = part_result.root_sum
+    for field in ("u", "score", "v", "V", "p"):
+        setattr(result, field, spread(getattr(part_result, field), 0))
+    result.kept = spread(part_result.kept, False)
+    result.chosen = spread(part_result.chosen, False)
+    result.e = spread(part_result.e, -1)
+    result.parent = spread(to_ids(part_result.parent), -1)
+    result._gap_start = spread(part_result._gap_start, 0)
+    result._gap_end = spread(part_result._gap_end, 0)
+    result._gap_order = original[part_result._gap_order]
+    result._covering = spread(to_ids(part_result._covering), -1)
+    result._chosen_ids = original[part_result._chosen_ids]
+    result._offshoots = original[np.array(part_result._offshoots, dtype=ID_DTYPE)].tolist()
+    result._children = {int(original[node_id]): original[children].tolist() \
+                        for node_id, children in part_result._children.items()}
+    return result
+
+
+def lift_sparse(arrays: TreeArrays, leaf_positions: np.ndarray, leaf_weights: np.ndarray, \
+                gamma_v: float = GAMMA, lambda_v: float = LAMBDA, \
+                threshold: float = LIMIT) -> LiftingResult:
+    """Lifts a cluster given by its nonzero leaf weights only. The zero
+    weight subtrees hanging off the ancestors of these leaves are the
+    gaps: they are taken whole, by their roots, and are not entered, so
+    the cost depends on the nonzero leaves, their ancestors and the
+    children of the ancestors rather than on the size of the taxonomy
+    (besides filling the arrays of the result). The result is the same
+    as the one of lift
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    leaf_positions : np.ndarray
+        positions of the leaves (in the order of TreeArrays.leaf_ids)
+    leaf_weights : np.ndarray
+        cluster membership of these leaves; the other leaves have zero
+        membership
+    gamma_v : float, default=GAMMA
+        gamma penalty value
+    lambda_v : float, default=LAMBDA
+        lambda penalty value
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    LiftingResult
+        the result of the run
+    """
+    positions = np.asarray(leaf_positions, dtype=ID_DTYPE)
+    weights = np.asarray(leaf_weights, dtype=float)
+    nonzero = weights != 0
+    positions, weights = positions[nonzero], weights[nonzero]
+    if not len(positions):
+        return LiftingResult(arrays, gamma_v, lambda_v, threshold)
+
+    leaf_ids = TaxonomyLookup.of(arrays).leaf_ids[positions]
+    part, original = _support_arrays(arrays, leaf_ids)
+    # a leaf standing for a subtree goes right after the root of the subtree
+    part_ids = np.searchsorted(np.maximum.accumulate(original), leaf_ids)
+    part_positions = np.searchsorted(part.leaf_ids, part_ids)
+    part_weights = np.zeros(len(part.leaf_ids))
+    part_weights[part_positions] = weights
+    part_result = lift(part, part_weights, gamma_v, lambda_v, threshold)
+    return _expand_result(part_result, arrays, original, positions, part_positions)
+
+
+def lift_taxonomy(taxonomy_tree: Taxonomy, cluster: Dict[str, float], gamma_v: float = GAMMA, \
+                  lambda_v: float = LAMBDA, threshold: float = LIMIT) -> LiftingResult:
+    """Lifts a cluster given by the weights of the leaf names over the
+    taxonomy without changing it. The leaves are found by their names,
+    so only the named leaves and their ancestors are visited (see
+    lift_sparse)
+
+    Parameters
+    ----------
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+    cluster : Dict[str, float]
+        the cluster: weights of the leaves by their names
+    gamma_v : float, default=GAMMA
+        gamma penalty value
+    lambda_v : float, default=LAMBDA
+        lambda penalty value
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    LiftingResult
+        the result of the run
+    """
+    arrays = taxonomy_tree.arrays
+    lookup = TaxonomyLookup.of(arrays)
+    positions = [np.empty(0, dtype=ID_DTYPE)]
+    weights = [np.empty(0)]
+    for name, weight in cluster.items():
+        found = lookup.leaf_positions_by_name(name)
+        positions.append(found)
+        weights.append(np.full(len(found), weight, dtype=float))
+    return lift_sparse(arrays, np.concatenate(positions), np.concatenate(weights), gamma_v, \
+                       lambda_v, threshold)
@@ -0,0 +1,279 @@
+""" Name, index and leaf-position lookup indexes for a taxonomy
+"""
+
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+try:
+    from got.taxonomies.tree_arrays import TreeArrays, ID_DTYPE
+except ImportError as e:
+    from tree_arrays import TreeArrays, ID_DTYPE
+
+
+def group_by_key(keys: np.ndarray, number_of_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Groups positions by their keys (CSR layout)
+
+    Parameters
+    ----------
+    keys : np.ndarray
+        non-negative integer key of every position
+    number_of_keys : int
+        the number of possible keys
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        positions ordered by key (stable) and offsets: the positions
+        with the key k are order[offsets[k]:offsets[k + 1]]
+    """
+    order = np.argsort(keys, kind="stable").astype(ID_DTYPE)
+    offsets = np.zeros(number_of_keys + 1, dtype=ID_DTYPE)
+    np.cumsum(np.bincount(keys, minlength=number_of_keys), out=offsets[1:])
+    return order, offsets
+
+
+class TaxonomyLookup:
+    """
+    Lookup indexes over the array-backed representation of a taxonomy.
+    Every index is built on the first use; the lookup object itself is
+    cached on the arrays, so all the consumers sharing the arrays share
+    the indexes.
+
+    Initial attributes
+    ------------------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+
+    Main methods
+    ------------
+    of(arrays) (classmethod)
+        returns the lookup shared by all the users of the arrays
+
+    ids_by_name(name)
+        returns the ids of all the nodes with the name
+
+    ids_by_index(index) / id_by_index(index)
+        returns the ids of the nodes with the index / the first of them
+
+    leaf_ids() (property)
+        ids of the leaves
+
+    leaf_position() (property)
+        position of every node among the leaves, -1 for internal nodes
+
+    leaf_positions_by_name(name)
+        returns the positions of all the leaves with the name
+
+    align_names(names)
+        matches a list of names with the leaf positions
+
+    """
+    def __init__(self, arrays: TreeArrays) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+
+        Returns
+        -------
+        None
+        """
+        self.arrays = arrays
+        self._name_to_name_id: Union[Dict[str, int], None] = None
+        self._name_groups: Union[Tuple[np.ndarray, np.ndarray], None] = None
+        self._leaf_name_groups: Union[Tuple[np.ndarray, np.ndarray], None] = None
+        self._index_to_ids: Union[Dict[str, List[int]], None] = None
+        self._leaf_ids: Union[np.ndarray, None] = None
+        self._leaf_position: Union[np.ndarray, None] = None
+        self._aligned: Union[Tuple[Tuple[str, ...], Tuple[np.ndarray, np.ndarray]], None] = None
+
+    @classmethod
+    def of(cls, arrays: TreeArrays) -> 'TaxonomyLookup':
+        """Returns the lookup shared by all the users of the arrays
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+
+        Returns
+        -------
+        TaxonomyLookup
+            the lookup
+        """
+        if arrays.lookup is None:
+            arrays.lookup = cls(arrays)
+        return arrays.lookup
+
+    def _name_id(self, name: str) -> int:
+        """Returns the id of the name in the names table, -1 if there is
+        no such a name
+
+        Parameters
+        ----------
+        name : str
+            the name
+
+        Returns
+        -------
+        int
+            the name id
+        """
+        if self._name_to_name_id is None:
+            self._name_to_name_id = {value: i for i, value in enumerate(self.arrays.names)}
+        return self._name_to_name_id.get(name, -1)
+
+    def ids_by_name(self, name: str) -> np.ndarray:
+        """Returns the ids of all the nodes with the name (names are not
+        unique, e.g. "boosting" may be both a leaf and an internal node)
+
+        Parameters
+        ----------
+        name : str
+            the name
+
+        Returns
+        -------
+        np.ndarray
+            ids of the nodes in preorder
+        """
+        name_id = self._name_id(name)
+        if name_id < 0:
+            return np.empty(0, dtype=ID_DTYPE)
+        if self._name_groups is None:
+            self._name_groups = group_by_key(self.arrays.name_ids, len(self.arrays.names))
+        order, offsets = self._name_groups
+        return order[offsets[name_id]:offsets[name_id + 1]]
+
+    def ids_by_index(self, index: str) -> List[int]:
+        """Returns the ids of the nodes with the index; trailing dots are
+        ignored, i.e. "1.2" and "1.2." are the same index
+
+        Parameters
+        ----------
+        index : str
+            the index
+
+        Returns
+        -------
+        List[int]
+            ids of the nodes in preorder
+        """
+        if self._index_to_ids is None:
+            index_to_ids: Dict[str, List[int]] = {}
+            index_ids = self.arrays.index_ids.tolist()
+            for node_id, index_id in enumerate(index_ids):
+                key = self.arrays.indices[index_id].rstrip(".")
+                index_to_ids.setdefault(key, []).append(node_id)
+            self._index_to_ids = index_to_ids
+        return self._index_to_ids.get(index.rstrip("."), [])
+
+    def id_by_index(self, index: str) -> Union[int, None]:
+        """Returns the id of the first node with the index
+
+        Parameters
+        ----------
+        index : str
+            the index
+
+        Returns
+        -------
+        Union[int, None]
+            the node id or "None" if there is no such a node
+        """
+        ids = self.ids_by_index(index)
+        return ids[0] if ids else None
+
+    @property
+    def leaf_ids(self) -> np.ndarray:
+        """Ids of the leaves in the order of TreeArrays.leaf_ids, kept so
+        that leaf positions are turned into ids without a pass over the
+        taxonomy
+
+        Returns
+        -------
+        np.ndarray
+            leaf ids
+        """
+        if self._leaf_ids is None:
+            self._leaf_ids = self.arrays.leaf_ids
+        return self._leaf_ids
+
+    @property
+    def leaf_position(self) -> np.ndarray:
+        """Position of every node among the leaves (in the order of
+        TreeArrays.leaf_ids), -1 for internal nodes
+
+        Returns
+        -------
+        np.ndarray
+            the positions
+        """
+        if self._leaf_position is None:
+            leaf_ids = self.leaf_ids
+            position = np.full(len(self.arrays), -1, dtype=ID_DTYPE)
+            position[leaf_ids] = np.arange(len(leaf_ids), dtype=ID_DTYPE)
+            self._leaf_position = position
+        return self._leaf_position
+
+    def leaf_positions_by_name(self, name: str) -> np.ndarray:
+        """Returns the positions of all the leaves with the name
+
+        Parameters
+        ----------
+        name : str
+            the name
+
+        Returns
+        -------
+        np.ndarray
+            positions of the leaves
+        """
+        name_id = self._name_id(name)
+        if name_id < 0:
+            return np.empty(0, dtype=ID_DTYPE)
+        if self._leaf_name_groups is None:
+            leaf_name_ids = self.arrays.name_ids[self.leaf_ids]
+            self._leaf_name_groups = group_by_key(leaf_name_ids, len(self.arrays.names))
+        order, offsets = self._leaf_name_groups
+        return order[offsets[name_id]:offsets[name_id + 1]]
+
+    def align_names(self, names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Matches a list of names (e.g., taxonomy leaves from a *.txt file)
+        with the leaf positions. If a name occurs in the list several
+        times, its last occurrence is used. The result for the last
+        list aligned is cached by its contents (a list changed in place
+        is aligned anew), so aligning the same names for every cluster
+        costs one comparison
+
+        Parameters
+        ----------
+        names : List[str]
+            the names
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            pairs (position in the list, leaf position) as two arrays
+        """
+        key = tuple(names)
+        if self._aligned is not None and self._aligned[0] == key:
+            return self._aligned[1]
+
+        last_row = {name: row for row, name in enumerate(names)}
+        rows: List[int] = []
+        positions: List[np.ndarray] = []
+        for name, row in last_row.items():
+            leaf_positions = self.leaf_positions_by_name(name)
+            rows.extend([row] * len(leaf_positions))
+            positions.append(leaf_positions)
+
+        if positions:
+            aligned = np.array(rows, dtype=ID_DTYPE), np.concatenate(positions)
+        else:
+            aligned = np.empty(0, dtype=ID_DTYPE), np.empty(0, dtype=ID_DTYPE)
+        self._aligned = (key, aligned)
+        return aligned
@@ -0,0 +1,286 @@
+""" Lifting clusters over taxonomies in a pool of worker processes
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Generator, Iterable, List, Tuple, Union
+
+import numpy as np
+
+try:
+    from got.taxonomies.taxonomy import Taxonomy
+    from got.taxonomies.tree_arrays import TreeArrays
+    from got.taxonomies.ancestry import AncestorIndex
+    from got.taxonomies.shared import SharedDescriptor, SharedTaxonomy, publish_taxonomy, \
+        attach_taxonomy
+    from got.taxonomies.lifting import LiftingResult, lift, LIMIT
+except ImportError as e:
+    from taxonomy import Taxonomy
+    from tree_arrays import TreeArrays
+    from ancestry import AncestorIndex
+    from shared import SharedDescriptor, SharedTaxonomy, publish_taxonomy, attach_taxonomy
+    from lifting import LiftingResult, lift, LIMIT
+
+
+# (taxonomy, cluster membership of its leaves, gamma, lambda)
+LiftingJob = Tuple[Union[Taxonomy, TreeArrays], np.ndarray, float, float]
+
+# the taxonomies attached by a worker process, by the names of their blocks
+_worker_taxonomies: Dict[str, TreeArrays] = {}
+
+
+def _get_arrays(taxonomy_tree: Union[Taxonomy, TreeArrays]) -> TreeArrays:
+    """Returns the arrays of a taxonomy
+
+    Parameters
+    ----------
+    taxonomy_tree : Union[Taxonomy, TreeArrays]
+        the taxonomy or its arrays
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    return taxonomy_tree.arrays if isinstance(taxonomy_tree, Taxonomy) else taxonomy_tree
+
+
+def _attach(descriptor: SharedDescriptor) -> TreeArrays:
+    """Returns a published taxonomy in a worker process; the worker
+    attaches to it and builds its indices on the first request only
+
+    Parameters
+    ----------
+    descriptor : SharedDescriptor
+        descriptor of the published taxonomy
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    block_name = descriptor[0]
+    if block_name not in _worker_taxonomies:
+        arrays = attach_taxonomy(descriptor)
+        # the levels are the only index lifting needs
+        AncestorIndex.of(arrays).levels
+        _worker_taxonomies[block_name] = arrays
+    return _worker_taxonomies[block_name]
+
+
+def _init_worker(descriptors: List[SharedDescriptor]) -> None:
+    """Attaches a worker process to the published taxonomies and builds
+    their indices, so that the jobs start warm
+
+    Parameters
+    ----------
+    descriptors : List[SharedDescriptor]
+        descriptors of the published taxonomies
+
+    Returns
+    -------
+    None
+    """
+    for descriptor in descriptors:
+        _attach(descriptor)
+
+
+def _lift_job(descriptor: SharedDescriptor, leaf_weights: np.ndarray, gamma_v: float, \
+              lambda_v: float, threshold: float) -> LiftingResult:
+    """Lifts a cluster in a worker process. The result is sent back
+    without the arrays of the taxonomy
+
+    Parameters
+    ----------
+    descriptor : SharedDescriptor
+        descriptor of the published taxonomy
+    leaf_weights : np.ndarray
+        cluster membership of the leaves
+    gamma_v : float
+        gamma penalty value
+    lambda_v : float
+        lambda penalty value
+    threshold : float
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    LiftingResult
+        the result of the run
+    """
+    result = lift(_attach(descriptor), leaf_weights, gamma_v, lambda_v, threshold)
+    result.arrays = None
+    return result
+
+
+class LiftingPool:
+    """
+    A pool of worker processes lifting clusters, kept between runs. Every
+    taxonomy is published into shared memory once, on its first job, and
+    every worker attaches to it once (the workers attach to the
+    taxonomies published before they start right away), so the workers
+    stay warm for all the runs of the pool. The pool owns the workers and
+    the shared memory: it should be closed when it is no longer needed
+    (or used as a context manager).
+
+    Initial attributes
+    ------------------
+    processes : int
+        the number of worker processes
+
+    Main methods
+    ------------
+    publish(taxonomy_tree)
+        publishes the taxonomy for the workers (once)
+
+    lift(jobs, threshold)
+        runs lifting jobs, yields the results in the order of completion
+
+    close()
+        stops the workers and releases the shared memory
+
+    """
+    def __init__(self, processes: Union[int, None] = None) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        processes : Union[int, None], default=None
+            the number of worker processes, os.cpu_count() if "None"; the
+            workers are started with the first run
+
+        Returns
+        -------
+        None
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self._executor: Union[ProcessPoolExecutor, None] = None
+        # the published taxonomies (with their arrays) by the ids of the arrays
+        self._published: Dict[int, Tuple[TreeArrays, SharedTaxonomy]] = {}
+
+    def publish(self, taxonomy_tree: Union[Taxonomy, TreeArrays]) -> SharedDescriptor:
+        """Publishes the taxonomy into shared memory unless it is published
+        already
+
+        Parameters
+        ----------
+        taxonomy_tree : Union[Taxonomy, TreeArrays]
+            the taxonomy or its arrays
+
+        Returns
+        -------
+        SharedDescriptor
+            descriptor of the published taxonomy
+        """
+        arrays = _get_arrays(taxonomy_tree)
+        if id(arrays) not in self._published:
+            self._published[id(arrays)] = (arrays, publish_taxonomy(arrays))
+        return self._published[id(arrays)][1].descriptor
+
+    def lift(self, jobs: Iterable[LiftingJob], \
+             threshold: float = LIMIT) -> Generator[Tuple[int, LiftingResult], None, None]:
+        """Runs lifting jobs in the workers; a job only carries its cluster
+        vector and the descriptor of its taxonomy. The results are yielded
+        as soon as they are ready, in the order of completion
+
+        Parameters
+        ----------
+        jobs : Iterable[LiftingJob]
+            the jobs: (taxonomy, cluster membership of its leaves in the
+            order of TreeArrays.leaf_ids, gamma, lambda)
+        threshold : float, default=LIMIT
+            the threshold for the normalized leaf weights
+
+        Returns
+        -------
+        Generator[Tuple[int, LiftingResult], None, None]
+            generator over pairs (the number of the job, its result)
+        """
+        jobs = list(jobs)
+        descriptors = [self.publish(taxonomy_tree) for taxonomy_tree, _, _, _ in jobs]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.processes, initializer=_init_worker,
+                initargs=([shared.descriptor for _, shared in self._published.values()],))
+
+        futures = {}
+        try:
+            for number, (_, leaf_weights, gamma_v, lambda_v) in enumerate(jobs):
+                future = self._executor.submit(_lift_job, descriptors[number], \
+                                               np.asarray(leaf_weights, dtype=float), gamma_v, \
+                                               lambda_v, threshold)
+                futures[future] = number
+
+            for future in as_completed(futures):
+                number = futures[future]
+                result = future.result()
+                result.arrays = _get_arrays(jobs[number][0])
+                yield number, result
+        finally:
+            # the jobs not started yet are dropped if the results are abandoned
+            for future in futures:
+                future.cancel()
+
+    def close(self) -> None:
+        """Stops the workers and releases the shared memory
+
+        Returns
+        -------
+        None
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for _, shared in self._published.values():
+            shared.close()
+        self._published.clear()
+
+    def __enter__(self) -> 'LiftingPool':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def lift_parallel(jobs: Iterable[LiftingJob], processes: Union[int, None] = None, \
+                  threshold: float = LIMIT, pool: Union[LiftingPool, None] = None \
+                  ) -> Generator[Tuple[int, LiftingResult], None, None]:
+    """Runs lifting jobs in a pool of worker processes (see LiftingPool).
+    The workers of the given pool are used and kept; without a pool, a
+    pool is started for the jobs and closed when they are done. The
+    results are yielded as soon as they are ready, in the order of
+    completion
+
+    Parameters
+    ----------
+    jobs : Iterable[LiftingJob]
+        the jobs: (taxonomy, cluster membership of its leaves in the
+        order of TreeArrays.leaf_ids, gamma, lambda)
+    processes : Union[int, None], default=None
+        the number of worker processes if no pool is given,
+        os.cpu_count() if "None"; with a single process the jobs are
+        run in this process, in order
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+    pool : Union[LiftingPool, None], default=None
+        a pool kept between the runs
+
+    Returns
+    -------
+    Generator[Tuple[int, LiftingResult], None, None]
+        generator over pairs (the number of the job, its result)
+    """
+    jobs = list(jobs)
+    if pool is not None:
+        yield from pool.lift(jobs, threshold)
+        return
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for number, (taxonomy_tree, leaf_weights, gamma_v, lambda_v) in enumerate(jobs):
+            yield number, lift(_get_arrays(taxonomy_tree), leaf_weights, gamma_v, lambda_v, \
+                               threshold)
+        return
+
+    with LiftingPool(min(processes, len(jobs)) or 1) as pool:
+        yield from pool.lift(jobs, threshold)
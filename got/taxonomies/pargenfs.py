@@ -1,22 +1,42 @@
-""" ParGenFS algorithm with accessory functions
+""" ParGenFS algorithm with accessory functions. The functions running
+the algorithm return their results and print nothing; the print_*
+functions and run() do the console output for the command line tool
 """
 
 import argparse
+import logging
+import re
 from operator import itemgetter
 from math import sqrt
-from typing import Dict, List, Set, Union
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple, Union
+
+import numpy as np
 
 try:
-    from got.taxonomies.taxonomy import Taxonomy, Node
+    from got.taxonomies.taxonomy import Taxonomy, Node, CompactNode
+    from got.taxonomies.tree_arrays import TreeArrays
+    from got.taxonomies.lookup import TaxonomyLookup
+    from got.taxonomies.traversal import iter_preorder, iter_postorder, iter_leaves, \
+        iter_with_layers, sum_over_subtrees
     from got.taxonomies.ete3_functions import make_ete3_lifted, save_ete3
+    from got.taxonomies.sections import LazyTaxonomy
+    from got.taxonomies.lifting import LiftingResult, ParameterSweep, ThresholdPath, \
+        lift_taxonomy, lift_batch, lift_sweep, lift_threshold_path, LIMIT, GAMMA, LAMBDA
+    from got.taxonomies.parallel import LiftingPool, lift_parallel
 except ImportError as e:
-    from taxonomy import Taxonomy, Node
+    from taxonomy import Taxonomy, Node, CompactNode
+    from tree_arrays import TreeArrays
+    from lookup import TaxonomyLookup
+    from traversal import iter_preorder, iter_postorder, iter_leaves, \
+        iter_with_layers, sum_over_subtrees
     from ete3_functions import make_ete3_lifted, save_ete3
+    from sections import LazyTaxonomy
+    from lifting import LiftingResult, ParameterSweep, ThresholdPath, lift_taxonomy, lift_batch, \
+        lift_sweep, lift_threshold_path, LIMIT, GAMMA, LAMBDA
+    from parallel import LiftingPool, lift_parallel
 
 
-LIMIT = .15
-GAMMA = .9
-LAMBDA = .2
+logger = logging.getLogger(__name__)
 
 
 def enumerate_tree_layers(node: Node, current_layer: int = 0) -> None:
@@ -33,9 +53,8 @@ def enumerate_tree_layers(node: Node, current_layer: int = 0) -> None:
     -------
     None
     """
-    node.e = current_layer
-    for child in node:
-        enumerate_tree_layers(child, current_layer=current_layer+1)
+    for current, layer in iter_with_layers(node, current_layer):
+        current.e = layer
 
 
 def get_cluster_k(tree_leaves: List[Node], node_names: List[str], \
@@ -63,6 +82,60 @@ def get_cluster_k(tree_leaves: List[Node], node_names: List[str], \
     return cluster
 
 
+def get_cluster_vector(arrays: TreeArrays, node_names: List[str], \
+                       membership_matrix: List[List[float]], k: int) -> np.ndarray:
+    """Return a membership vector corresponding to a k-th cluster aligned
+    with the taxonomy leaves (in the order of TreeArrays.leaf_ids). The
+    alignment of the names with the leaves is cached by the taxonomy lookup
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    node_names : List[str]
+        string names of nodes
+    membership_matrix : List[List[float]]
+        membership matrix, size: (number_of_clusters x number_of_node_names)
+    k : int
+        index of a cluster
+    Returns
+    -------
+    np.ndarray
+        membership vector corresponding to a k-th cluster
+    """
+    rows, positions = TaxonomyLookup.of(arrays).align_names(node_names)
+    cluster = np.zeros(len(arrays.leaf_ids))
+    cluster[positions] = np.asarray(membership_matrix, dtype=float)[rows, k]
+
+    return cluster
+
+
+def get_cluster_matrix(arrays: TreeArrays, node_names: List[str], \
+                       membership_matrix: List[List[float]]) -> np.ndarray:
+    """Return the membership vectors of all the clusters aligned with the
+    taxonomy leaves (see get_cluster_vector)
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+    node_names : List[str]
+        string names of nodes
+    membership_matrix : List[List[float]]
+        membership matrix, size: (number_of_clusters x number_of_node_names)
+    Returns
+    -------
+    np.ndarray
+        membership matrix, size: (number_of_clusters x number_of_leaves)
+    """
+    rows, positions = TaxonomyLookup.of(arrays).align_names(node_names)
+    matrix = np.asarray(membership_matrix, dtype=float)
+    clusters = np.zeros((matrix.shape[1] if matrix.ndim > 1 else 0, len(arrays.leaf_ids)))
+    clusters[:, positions] = matrix[rows].T
+
+    return clusters
+
+
 def annotate_with_sum(node: Node, cluster: Dict[str, float]) -> float:
     """Annotates a tree with the cluster weights
 
@@ -78,21 +151,18 @@ def annotate_with_sum(node: Node, cluster: Dict[str, float]) -> float:
     float
         a not-normalized sum of squared weights
     """
-    summ = .0
+    def annotate(current: Node) -> float:
+        if current.is_leaf:
+            membership = cluster.get(current.name, .0)
+            current.score = membership
+            current.u = membership
+            return membership * membership
 
-    if node.is_leaf:
-        membership = cluster.get(node.name, .0)
-        node.score = membership
-        node.u = membership
-        summ += membership ** 2
-    else:
-        node.score = .0
-        node.u = .0
-
-    for i in node:
-        summ += annotate_with_sum(i, cluster)
+        current.score = .0
+        current.u = .0
+        return .0
 
-    return summ
+    return sum_over_subtrees(node, annotate)
 
 
 def normalize_and_return_leaf_weights(node: Node, summ: float) -> List[List[Union[str, float]]]:
@@ -111,13 +181,11 @@ def normalize_and_return_leaf_weights(node: Node, summ: float) -> List[List[Unio
         a list of weights normalized
     """
     leaf_weights: List[List[Union[str, float]]] = []
+    norm = sqrt(summ)
 
-    if node.is_leaf:
-        node.u /= sqrt(summ)
-        leaf_weights.append([node.u, node.name])
-
-    for i in node:
-        leaf_weights.extend(normalize_and_return_leaf_weights(i, summ))
+    for leaf in iter_leaves(node):
+        leaf.u /= norm
+        leaf_weights.append([leaf.u, leaf.name])
 
     return leaf_weights
 
@@ -138,17 +206,15 @@ def truncate_weights(node: Node, threshold: float) -> float:
     float
         summ of the resulting squared weights
     """
-    summ = .0
-    if node.is_leaf:
-        if node.u < threshold:
-            node.u = 0
-        else:
-            summ += node.u ** 2
-
-    for child in node:
-        summ += truncate_weights(child, threshold)
+    def truncate(current: Node) -> float:
+        if current.is_leaf:
+            if current.u < threshold:
+                current.u = 0
+            else:
+                return current.u * current.u
+        return .0
 
-    return summ
+    return sum_over_subtrees(node, truncate)
 
 
 def set_internal_weights(node: Node) -> float:
@@ -164,18 +230,18 @@ def set_internal_weights(node: Node) -> float:
     float
         summ of the resulting squared weights
     """
-    if node.is_leaf:
-        return node.u ** 2
+    def set_weight(current: Node, summ: float) -> None:
+        if current.is_internal:
+            current.u = sqrt(summ)
 
-    summ = .0
-    for child in node:
-        summ += set_internal_weights(child)
-        node.u = sqrt(summ)
-    return summ
+    return sum_over_subtrees(node, lambda current: current.u * current.u if current.is_leaf else .0,
+                             set_weight)
 
 
 def prune_tree(node: Node) -> None:
-    """Prunes the tree / sub-tree
+    """Prunes the tree / sub-tree: zero-weight internal nodes lose their
+    children and become their own gaps. The traversal does not enter
+    the subtrees dropped, so every node left is visited once
 
     Parameters
     ----------
@@ -186,18 +252,12 @@ def prune_tree(node: Node) -> None:
     -------
     None
     """
-    if node.is_internal:
-        for child in node:
-            prune_tree(child)
-
-        if not node.u:
-            g_label = 0
-            if node.is_internal and not any([t.children for t in node]):
-                g_label = 1
-            node.children = []
-
-            if g_label:
-                node.G = [node]
+    for current in iter_preorder(node):
+        if current.is_internal and not current.u:
+            # a nonzero internal child would have kept its children
+            if not any(child.u and child.children for child in current):
+                current.G = [current]
+            current.children = []
 
 
 def set_gaps_for_tree(node: Node) -> None:
@@ -212,16 +272,108 @@ def set_gaps_for_tree(node: Node) -> None:
     -------
     None
     """
-    gaps = [child for child in node if child.u == 0]
-    if not node.G:
-        node.G = gaps
+    for current in iter_preorder(node):
+        gaps = [child for child in current if child.u == 0]
+        if not current.G:
+            current.G = gaps
 
-    for child in node:
-        set_gaps_for_tree(child)
+
+class GapSlice(Sequence):
+    """
+    The gaps of a node: a slice of one sequence of gaps shared by the
+    whole tree (see set_parameters). The nodes are taken from the
+    sequence only when they are read
+
+    Initial attributes
+    ------------------
+    gaps : List[Node]
+        the sequence of gaps
+    start : int
+        position of the first gap of the node
+    end : int
+        position after the last gap of the node
+
+    """
+    __slots__ = ("gaps", "start", "end")
+
+    def __init__(self, gaps: List[Node], start: int, end: int) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        gaps : List[Node]
+            the sequence of gaps
+        start : int
+            position of the first gap of the node
+        end : int
+            position after the last gap of the node
+
+        Returns
+        -------
+        None
+        """
+        self.gaps = gaps
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        """Returns the number of gaps
+
+        Returns
+        -------
+        int
+            the number of gaps
+        """
+        return self.end - self.start
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[Node, List[Node]]:
+        """Returns a gap or a list of gaps
+
+        Parameters
+        ----------
+        item : Union[int, slice]
+            the position (or the positions) of the gaps in the slice
+
+        Returns
+        -------
+        Union[Node, List[Node]]
+            the gap or the list of gaps
+        """
+        if isinstance(item, slice):
+            return [self.gaps[self.start + i] for i in range(*item.indices(len(self)))]
+        position = item + len(self) if item < 0 else item
+        if not 0 <= position < len(self):
+            raise IndexError("gap index out of range")
+        return self.gaps[self.start + position]
+
+    def __iter__(self) -> Iterator[Node]:
+        """Iterates over the gaps
+
+        Returns
+        -------
+        Iterator[Node]
+            the gaps
+        """
+        return (self.gaps[i] for i in range(self.start, self.end))
+
+    def __repr__(self) -> str:
+        """Returns the representation of the list of gaps
+
+        Returns
+        -------
+        str
+            the representation
+        """
+        return repr(list(self))
 
 
 def set_parameters(node: Node) -> None:
-    """Sets parameters G, v, V for the tree / sub-tree
+    """Sets parameters G, v, V for the tree / sub-tree. The gaps of a node
+    are its own gaps followed by the gaps of its children (a node is
+    taken once). They are laid out in one sequence in preorder, so the
+    gaps of every node are a slice of it (GapSlice) and no list of gaps
+    is copied; V sums v over the zero-weight children and V over the
+    other children. Both take linear time overall
 
     Parameters
     ----------
@@ -232,24 +384,41 @@ def set_parameters(node: Node) -> None:
     -------
     None
     """
-    for child in node:
-        set_parameters(child)
-
-    g_set = sum([child.G for child in node], node.G or [])
-    added: Set[str] = set()
-    g_result = []
-    for gap in g_set:
-        if gap.name not in added:
-            g_result.append(gap)
-            added |= {gap.name}
+    gaps: List[Node] = []
+    # positions of the gaps in the sequence
+    position: Dict[int, int] = {}
+    # the nodes to visit and the visited ones (with the start of their gaps)
+    stack: List[Tuple[Node, Union[int, None]]] = [(node, None)]
+    while stack:
+        current, start = stack.pop()
+        if start is None:
+            own = current.G or []
+            if len(own) == 1 and own[0] is current and id(current) in position:
+                # a pruned node is its own gap, already taken by its parent
+                start = position[id(current)]
+                current.G = GapSlice(gaps, start, start + 1)
+            else:
+                stack.append((current, len(gaps)))
+                for gap in own:
+                    position[id(gap)] = len(gaps)
+                    gaps.append(gap)
+                stack.extend((child, None) for child in reversed(current.children))
+                continue
+        else:
+            current.G = GapSlice(gaps, start, len(gaps))
 
-    node.G = g_result
-    node.v = node.parent.u if node.parent else 1.
-    node.V = sum(g.v if g.v is not None else 0 for g in node.G)
+        current.v = current.parent.u if current.parent else 1.
+        if current.children:
+            current.V = sum(child.v if child.u == 0 else child.V for child in current)
+        else:
+            current.V = sum(gap.v for gap in current.G)
 
 
 def reduce_edges(node: Node) -> None:
-    """Reduces tree edges for the tree / sub-tree
+    """Reduces tree edges for the tree / sub-tree: a node with a single
+    child adopts the children of the child. The layer numbers of the
+    children of a node are set once its children are final, counting
+    from the layer number of the root
 
     Parameters
     ----------
@@ -260,20 +429,12 @@ def reduce_edges(node: Node) -> None:
     -------
     None
     """
-    if len(node) == 1:
-        temp = node.children[0].children
-        node.children = temp
-
-        def update_layer_number(t_node):
-            t_node.e -= 1
-            for child in t_node:
-                update_layer_number(child)
-
-        for child in node:
-            update_layer_number(child)
-
-    for child in node:
-        reduce_edges(child)
+    node.e = node.e or 0
+    for current in iter_preorder(node):
+        if len(current) == 1:
+            current.children = current.children[0].children
+        for child in current:
+            child.e = current.e + 1
 
 
 def make_init_step(node: Node, gamma_v: float) -> None:
@@ -290,20 +451,17 @@ def make_init_step(node: Node, gamma_v: float) -> None:
     -------
     None
     """
-    if node.is_internal:
-        for child in node:
-            make_init_step(child, gamma_v)
-    else:
-        if node.u > 0:
-            node.H = [node]
-            node.L = []
-            node.p = gamma_v * node.u
+    for leaf in iter_leaves(node):
+        if leaf.u > 0:
+            leaf.H = [leaf]
+            leaf.L = []
+            leaf.p = gamma_v * leaf.u
         else:
-            node.H = []
-            node.L = []
-            node.p = 0
+            leaf.H = []
+            leaf.L = []
+            leaf.p = 0
 
-        node.o = True
+        leaf.o = True
 
 
 def make_recursive_step(node: Node, gamma_v: float, lambda_v: float) -> None:
@@ -322,21 +480,18 @@ def make_recursive_step(node: Node, gamma_v: float, lambda_v: float) -> None:
     -------
     None
     """
-    if node.is_internal:
-        for child in node:
-            make_recursive_step(child, gamma_v, lambda_v)
-
-        if not node.o:
-            sum_penalty = sum([t.p if t.p is not None else 0 for t in node], .0)
-
-            if node.u + lambda_v * node.V < sum_penalty:
-                node.H = [node]
-                node.L = node.G
-                node.p = node.u + lambda_v * node.V
+    for current in iter_postorder(node):
+        if current.is_internal and not current.o:
+            sum_penalty = sum([t.p if t.p is not None else 0 for t in current], .0)
+
+            if current.u + lambda_v * current.V < sum_penalty:
+                current.H = [current]
+                current.L = current.G
+                current.p = current.u + lambda_v * current.V
             else:
-                node.H = sum((t.H if t.H is not None else [] for t in node), [])
-                node.L = sum((t.L if t.L is not None else [] for t in node), [])
-                node.p = sum((t.p if t.p is not None else 0 for t in node), .0)
+                current.H = [head for t in current for head in t.H or []]
+                current.L = [loss for t in current for loss in t.L or []]
+                current.p = sum((t.p if t.p is not None else 0 for t in current), .0)
 
 
 def indicate_offshoots(node: Node) -> None:
@@ -351,15 +506,11 @@ def indicate_offshoots(node: Node) -> None:
     -------
     None
     """
-
-    if node.is_internal:
-        for child in node:
-            indicate_offshoots(child)
-    else:
-        if node.parent:
-            heads = [t.name for t in node.parent.H]
+    for leaf in iter_leaves(node):
+        if leaf.parent:
+            heads = [t.name for t in leaf.parent.H]
             if not heads:
-                node.of = 1
+                leaf.of = 1
 
 
 def make_result_table(node: Node) -> List[List[str]]:
@@ -375,18 +526,14 @@ def make_result_table(node: Node) -> List[List[str]]:
     List[List[str]]
         resulting table for printing / saving in a file
     """
-
     table = []
 
-    if node.is_internal:
-        for child in node:
-            table.extend(make_result_table(child))
-
-    table.append([node.index.rstrip(".") or "", node.name, str(round(node.u, 3)),
-                  str(round(node.p, 3)), str(round(node.V, 3)),
-                  "; ".join([" ".join([s.index, s.name]) for s in (node.G or [])]),
-                  "; ".join([" ".join([s.index, s.name]) for s in (node.H or [])]),
-                  "; ".join([" ".join([s.index, s.name]) for s in (node.L or [])])])
+    for current in iter_postorder(node):
+        table.append([current.index.rstrip(".") or "", current.name, str(round(current.u, 3)),
+                      str(round(current.p, 3)), str(round(current.V, 3)),
+                      "; ".join([" ".join([s.index, s.name]) for s in (current.G or [])]),
+                      "; ".join([" ".join([s.index, s.name]) for s in (current.H or [])]),
+                      "; ".join([" ".join([s.index, s.name]) for s in (current.L or [])])])
 
     return table
 
@@ -413,16 +560,168 @@ def save_result_table(result_table: List[List[str]], filename: str = "table.csv"
         for table_row in result_table:
             file_opened.write('\t'.join(table_row) + '\n')
 
-    print(f"Table saved in the file: {filename}")
+    logger.debug("Table saved in the file: %s", filename)
+
+
+def save_batch_result_table(result_tables: Dict[int, List[List[str]]], \
+                            filename: str = "table.csv") -> None:
+    """Writes resulting tables of several clusters in one file; the first
+    column is the number of the cluster
+
+    Parameters
+    ----------
+    result_tables : Dict[int, List[List[str]]]
+        tables for saving by the numbers of the clusters
+    filename : str, default="table.csv"
+        name of the file for writing
+
+    Returns
+    -------
+    None
+    """
+
+    with open(filename, 'w') as file_opened:
+        file_opened.write('\t'.join(["cluster", "index", "name", "u", "p", "V", "G", "H", "L"]) + '\n')
+        for k, result_table in sorted(result_tables.items()):
+            for table_row in sorted(result_table, key=lambda x: (len(x), x)):
+                file_opened.write('\t'.join([str(k)] + table_row) + '\n')
+
+    logger.debug("Table saved in the file: %s", filename)
+
+
+class ParGenFSResult:
+    """
+    The result of a ParGenFS run (see pargenfs). The lifted tree, the
+    result table and the ete3 representation are built on the first
+    request only, and nothing is written unless asked.
+
+    Initial attributes
+    ------------------
+    lifting : LiftingResult
+        the result of lifting the cluster
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+    lifted : bool
+        "False" if no weight is left after the truncation; there is no
+        lifted tree then
+
+    Main methods
+    ------------
+    tree (property)
+        the lifted tree
+
+    table()
+        returns the result table (see make_result_table)
+
+    ete3()
+        returns the ete3 representation of the lifted tree
+
+    save_table(filename) / save_ete3(filename)
+        writes the table / the ete3 representation in a file
+
+    """
+    def __init__(self, lifting: LiftingResult, taxonomy_tree: Taxonomy) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        lifting : LiftingResult
+            the result of lifting the cluster
+        taxonomy_tree : Taxonomy
+            the taxonomy tree
+
+        Returns
+        -------
+        None
+        """
+        self.lifting = lifting
+        self.taxonomy_tree = taxonomy_tree
+        self.lifted = lifting.lifted
+        self._tree: Union[Node, None] = None
+        self._table: Union[List[List[str]], None] = None
+        self._ete3: Union[str, None] = None
+
+    @property
+    def tree(self) -> Node:
+        """The lifted tree, built on the first request
+
+        Returns
+        -------
+        Node
+            the root of the lifted tree
+        """
+        if not self.lifted:
+            raise ValueError("the cluster is not lifted: no weight is left after the truncation")
+        if self._tree is None:
+            self._tree = self.lifting.to_tree(self.taxonomy_tree.node_class)
+        return self._tree
+
+    def table(self) -> List[List[str]]:
+        """Returns the result table, built on the first request
+
+        Returns
+        -------
+        List[List[str]]
+            the table
+        """
+        if self._table is None:
+            self._table = make_result_table(self.tree)
+        return self._table
+
+    def ete3(self) -> str:
+        """Returns the ete3 representation of the lifted tree, built on
+        the first request
+
+        Returns
+        -------
+        str
+            the ete3 representation
+        """
+        if self._ete3 is None:
+            self._ete3 = make_ete3_lifted(self.tree)
+        return self._ete3
+
+    def save_table(self, filename: str = "table.csv") -> None:
+        """Writes the result table in a file
+
+        Parameters
+        ----------
+        filename : str, default="table.csv"
+            name of the file for writing
+
+        Returns
+        -------
+        None
+        """
+        save_result_table(self.table(), filename)
+
+    def save_ete3(self, filename: str = "taxonomy_tree_lifted.ete") -> None:
+        """Writes the ete3 representation in a file
+
+        Parameters
+        ----------
+        filename : str, default="taxonomy_tree_lifted.ete"
+            name of the file for writing
+
+        Returns
+        -------
+        None
+        """
+        save_ete3(self.ete3(), filename)
 
 
 def pargenfs(cluster: Dict[str, float], taxonomy_tree: Taxonomy, \
-             gamma_v: float = .2, lambda_v: float = .2) -> None:
-    """Runs ParGenFS algorithm over a taxonomy tree
+             gamma_v: float = .2, lambda_v: float = .2, threshold: float = LIMIT, \
+             table_file: Union[str, None] = None, \
+             ete3_file: Union[str, None] = None) -> ParGenFSResult:
+    """Runs ParGenFS algorithm over a taxonomy tree. The taxonomy is not
+    changed (see lifting.lift), so one parsed taxonomy serves any number
+    of runs. Nothing is printed: the progress is logged at the debug
+    level, and the outputs are written only if their files are given
 
     Parameters
     ----------
-    cluster : List[float]
+    cluster : Dict[str, float]
         the cluster to generalize
     taxonomy_tree : Taxonomy
         the taxonomy tree
@@ -430,16 +729,59 @@ def pargenfs(cluster: Dict[str, float], taxonomy_tree: Taxonomy, \
         gamma penalty value
     lambda_v : float, default=.2
         lambda penalty value
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+    table_file : Union[str, None], default=None
+        name of the file for the result table, not written if "None"
+    ete3_file : Union[str, None], default=None
+        name of the file for the ete3 representation, not written if "None"
 
     Returns
     -------
-    None
+    ParGenFSResult
+        the result of the run
     """
 
-    enumerate_tree_layers(taxonomy_tree.root)
+    logger.debug("Lifting a cluster of %d leaves", len(cluster))
+    result = ParGenFSResult(lift_taxonomy(taxonomy_tree, cluster, gamma_v, lambda_v, threshold), \
+                            taxonomy_tree)
+    if not result.lifted:
+        logger.debug("The threshold is too large: no weight is left after the truncation")
+        return result
+
+    logger.debug("Membership in root: %.5f", result.lifting.root_sum)
+    if table_file is not None:
+        result.save_table(table_file)
+    if ete3_file is not None:
+        result.save_ete3(ete3_file)
+    logger.debug("Done")
+    return result
+
+
+def print_result(result: ParGenFSResult, table_file: str = "table.csv", \
+                 ete3_file: str = "taxonomy_tree_lifted.ete") -> None:
+    """Prints the course of a ParGenFS run (the leaf weights before and
+    after the truncation) and saves its outputs, as the command line
+    tool does
+
+    Parameters
+    ----------
+    result : ParGenFSResult
+        the result of the run
+    table_file : str, default="table.csv"
+        name of the file for the result table
+    ete3_file : str, default="taxonomy_tree_lifted.ete"
+        name of the file for the ete3 representation
 
-    summ = annotate_with_sum(taxonomy_tree.root, cluster)
-    leaf_weights = normalize_and_return_leaf_weights(taxonomy_tree.root, summ)
+    Returns
+    -------
+    None
+    """
+
+    lifting = result.lifting
+    arrays = result.taxonomy_tree.arrays
+    leaf_names = [arrays.name(i) for i in arrays.leaf_ids.tolist()]
+    leaf_weights = [[weight, name] for weight, name in zip(lifting.leaf_weights.tolist(), leaf_names)]
     print(f"Number of leaves: {len(leaf_weights)}")
     print("All positive weights:")
 
@@ -448,13 +790,12 @@ def pargenfs(cluster: Dict[str, float], taxonomy_tree: Taxonomy, \
             break
         print(f"{i:<60} {weight:.5f}")
 
-    summ_after_trunc = truncate_weights(taxonomy_tree.root, LIMIT)
-
-    if summ_after_trunc == 0:
+    if not result.lifted:
         print("The threshold is too large. Try a smaller one.")
         return
 
-    updated_leaf_weights = normalize_and_return_leaf_weights(taxonomy_tree.root, summ_after_trunc)
+    updated_leaf_weights = [[weight, name] for weight, name in \
+                            zip(lifting.u[arrays.leaf_ids].tolist(), leaf_names)]
     print("After transformation:")
     for weight, i in sorted(updated_leaf_weights, key=itemgetter(0), reverse=True):
         if not weight:
@@ -462,36 +803,332 @@ def pargenfs(cluster: Dict[str, float], taxonomy_tree: Taxonomy, \
         print(f"{i:<60} {weight:.5f}")
 
     print("Setting weights for internal nodes")
-    root_u = set_internal_weights(taxonomy_tree.root)
-    print(f"Membership in root: {root_u:.5f}")
+    print(f"Membership in root: {lifting.root_sum:.5f}")
     print("Pruning tree...")
-    prune_tree(taxonomy_tree.root)
-
     print("Setting gaps...")
-    set_gaps_for_tree(taxonomy_tree.root)
-
     print("Other parameters setting...")
-    set_parameters(taxonomy_tree.root)
-    reduce_edges(taxonomy_tree.root)
-
     print("ParGenFS main steps...")
-    make_init_step(taxonomy_tree.root, gamma_v)
-    make_recursive_step(taxonomy_tree.root, gamma_v, lambda_v)
-
-    indicate_offshoots(taxonomy_tree.root)
 
     print("Done. Saving...")
-    result_table = make_result_table(taxonomy_tree.root)
-    save_result_table(result_table)
+    result.save_table(table_file)
+    print(f"Table saved in the file: {table_file}")
 
-    ete3_desc = make_ete3_lifted(taxonomy_tree.root)
-    save_ete3(ete3_desc)
+    result.save_ete3(ete3_file)
+    print(f"ete representation saved in the file: {ete3_file}")
     print("ete representation saved.")
-    #print(ete3_desc)
     print("Done.")
 
 
-def run(taxonomy_file: str, taxonomy_leaves: str, clusters: str, cluster_number: int) -> None:
+def iter_pargenfs_batch(membership: np.ndarray, taxonomy_tree: Taxonomy, gamma_v: float = .2, \
+                        lambda_v: float = .2, processes: int = 1, threshold: float = LIMIT, \
+                        pool: Union[LiftingPool, None] = None \
+                        ) -> Iterator[Tuple[int, ParGenFSResult]]:
+    """Runs ParGenFS algorithm for every cluster of a membership matrix at
+    once (see lifting.lift_batch), or in a pool of worker processes
+    (see parallel.lift_parallel), and yields the results as they are done
+
+    Parameters
+    ----------
+    membership : np.ndarray
+        membership matrix, size: (number_of_clusters x number_of_leaves),
+        e.g. from get_cluster_matrix
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+    gamma_v : float, default=.2
+        gamma penalty value
+    lambda_v : float, default=.2
+        lambda penalty value
+    processes : int, default=1
+        the number of worker processes; the clusters come in the order
+        of completion if it is not 1
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+    pool : Union[LiftingPool, None], default=None
+        a pool of worker processes kept between the runs (see
+        parallel.LiftingPool), used instead of starting one; the
+        clusters come in the order of completion then
+
+    Yields
+    ------
+    Tuple[int, ParGenFSResult]
+        the number of the cluster and its result
+    """
+
+    if processes == 1 and pool is None:
+        completed = enumerate(lift_batch(taxonomy_tree.arrays, membership, gamma_v, lambda_v, \
+                                         threshold))
+    else:
+        completed = lift_parallel(((taxonomy_tree, cluster, gamma_v, lambda_v) \
+                                   for cluster in membership), processes, threshold, pool)
+
+    for k, lifting in completed:
+        logger.debug("Cluster %d lifted", k)
+        yield k, ParGenFSResult(lifting, taxonomy_tree)
+
+
+def pargenfs_batch(membership: np.ndarray, taxonomy_tree: Taxonomy, gamma_v: float = .2, \
+                   lambda_v: float = .2, processes: int = 1, threshold: float = LIMIT, \
+                   table_file: Union[str, None] = None, ete3_file: Union[str, None] = None, \
+                   pool: Union[LiftingPool, None] = None) -> List[ParGenFSResult]:
+    """Runs ParGenFS algorithm for every cluster of a membership matrix
+    (see iter_pargenfs_batch). Nothing is printed; the outputs are
+    written only if their files are given: the tables of all the lifted
+    clusters go to one file, the ete3 representation of the k-th cluster
+    goes to ete3_file.format(k=k)
+
+    Parameters
+    ----------
+    membership : np.ndarray
+        membership matrix, size: (number_of_clusters x number_of_leaves),
+        e.g. from get_cluster_matrix
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+    gamma_v : float, default=.2
+        gamma penalty value
+    lambda_v : float, default=.2
+        lambda penalty value
+    processes : int, default=1
+        the number of worker processes
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+    table_file : Union[str, None], default=None
+        name of the file for the result table, not written if "None"
+    ete3_file : Union[str, None], default=None
+        pattern of the names of the files for the ete3 representations
+        (e.g. "taxonomy_tree_lifted_{k}.ete"), not written if "None"
+    pool : Union[LiftingPool, None], default=None
+        a pool of worker processes kept between the runs
+
+    Returns
+    -------
+    List[ParGenFSResult]
+        the results, one per cluster
+    """
+
+    results: List[Union[ParGenFSResult, None]] = [None] * len(membership)
+    for k, result in iter_pargenfs_batch(membership, taxonomy_tree, gamma_v, lambda_v, \
+                                         processes, threshold, pool):
+        results[k] = result
+        if ete3_file is not None and result.lifted:
+            result.save_ete3(ete3_file.format(k=k))
+
+    if table_file is not None:
+        save_batch_result_table({k: result.table() for k, result in enumerate(results) \
+                                 if result.lifted}, table_file)
+    return results
+
+
+def print_batch_result(results: Iterable[Tuple[int, ParGenFSResult]], taxonomy_tree: Taxonomy, \
+                       number_of_clusters: int, table_file: str = "table.csv", \
+                       ete3_file: str = "taxonomy_tree_lifted_{k}.ete") -> None:
+    """Prints the results of a batch run as they come (see
+    iter_pargenfs_batch) and saves their outputs, as the command line
+    tool does
+
+    Parameters
+    ----------
+    results : Iterable[Tuple[int, ParGenFSResult]]
+        the numbers of the clusters and their results
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+    number_of_clusters : int
+        the number of clusters
+    table_file : str, default="table.csv"
+        name of the file for the result table
+    ete3_file : str, default="taxonomy_tree_lifted_{k}.ete"
+        pattern of the names of the files for the ete3 representations
+
+    Returns
+    -------
+    None
+    """
+
+    print(f"Number of leaves: {len(taxonomy_tree.arrays.leaf_ids)}")
+    print(f"Number of clusters: {number_of_clusters}")
+
+    result_tables = {}
+    for k, result in results:
+        if not result.lifted:
+            print(f"Cluster {k}: the threshold is too large. Try a smaller one.")
+            continue
+
+        print(f"Cluster {k}: membership in root: {result.lifting.root_sum:.5f}, "
+              f"head subjects: {len(result.lifting.heads(0))}")
+        result_tables[k] = result.table()
+        result.save_ete3(ete3_file.format(k=k))
+        print(f"ete representation saved in the file: {ete3_file.format(k=k)}")
+
+    print("Done. Saving...")
+    save_batch_result_table(result_tables, table_file)
+    print(f"Table saved in the file: {table_file}")
+    print("Done.")
+
+
+def get_leaf_weights(cluster: Dict[str, float], arrays: TreeArrays) -> np.ndarray:
+    """Returns the membership values of a cluster aligned with the leaves
+    of the taxonomy (in the order of TreeArrays.leaf_ids)
+
+    Parameters
+    ----------
+    cluster : Dict[str, float]
+        the cluster
+    arrays : TreeArrays
+        array-backed representation of the taxonomy
+
+    Returns
+    -------
+    np.ndarray
+        membership value of every leaf, 0 for the leaves not in the cluster
+    """
+    return np.array([cluster.get(arrays.name(leaf_id), .0) \
+                     for leaf_id in arrays.leaf_ids.tolist()], dtype=float)
+
+
+def pargenfs_sweep(cluster: Dict[str, float], taxonomy_tree: Taxonomy, \
+                   gammas: Sequence[float], lambdas: Sequence[float], \
+                   threshold: float = LIMIT) -> ParameterSweep:
+    """Runs ParGenFS algorithm over a taxonomy tree for every pair of gamma
+    and lambda values (see lifting.lift_sweep). Nothing is printed (see
+    print_sweep)
+
+    Parameters
+    ----------
+    cluster : Dict[str, float]
+        the cluster to generalize
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+    gammas : Sequence[float]
+        gamma penalty values
+    lambdas : Sequence[float]
+        lambda penalty values
+    threshold : float, default=LIMIT
+        the threshold for the normalized leaf weights
+
+    Returns
+    -------
+    ParameterSweep
+        the penalties and the head subjects of the root for every pair
+    """
+
+    logger.debug("Sweeping %d gamma and %d lambda values", len(gammas), len(lambdas))
+    return lift_sweep(taxonomy_tree.arrays, get_leaf_weights(cluster, taxonomy_tree.arrays), \
+                      gammas, lambdas, threshold)
+
+
+def print_sweep(sweep: ParameterSweep, taxonomy_tree: Taxonomy) -> None:
+    """Prints the penalty and the head subjects of the root for every pair
+    of gamma and lambda values of a sweep as a tab-separated table
+
+    Parameters
+    ----------
+    sweep : ParameterSweep
+        the sweep
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+
+    Returns
+    -------
+    None
+    """
+
+    if not sweep.lifted:
+        print("The threshold is too large. Try a smaller one.")
+        return
+
+    arrays = taxonomy_tree.arrays
+    print('\t'.join(["gamma", "lambda", "p", "H"]))
+    for i, gamma_v in enumerate(sweep.gammas.tolist()):
+        for j, lambda_v in enumerate(sweep.lambdas.tolist()):
+            heads = "; ".join([" ".join([arrays.index(head), arrays.name(head)]) \
+                               for head in sweep.head_subjects[i][j]])
+            print('\t'.join([str(gamma_v), str(lambda_v), str(round(sweep.penalties[i, j], 3)),
+                             heads]))
+
+
+def pargenfs_threshold_path(cluster: Dict[str, float], taxonomy_tree: Taxonomy, \
+                            gamma_v: float = .2, lambda_v: float = .2) -> ThresholdPath:
+    """Runs ParGenFS algorithm over a taxonomy tree for every distinct
+    truncation threshold (see lifting.lift_threshold_path). Nothing is
+    printed (see print_threshold_path)
+
+    Parameters
+    ----------
+    cluster : Dict[str, float]
+        the cluster to generalize
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+    gamma_v : float, default=.2
+        gamma penalty value
+    lambda_v : float, default=.2
+        lambda penalty value
+
+    Returns
+    -------
+    ThresholdPath
+        the thresholds and the changes of the lifting along them
+    """
+
+    logger.debug("Lifting a cluster of %d leaves along the thresholds", len(cluster))
+    return lift_threshold_path(taxonomy_tree.arrays, \
+                               get_leaf_weights(cluster, taxonomy_tree.arrays), gamma_v, lambda_v)
+
+
+def print_threshold_path(path: ThresholdPath, taxonomy_tree: Taxonomy) -> None:
+    """Prints the number of leaves left, the penalty and the head subjects
+    of the root for every threshold of a path as a tab-separated table
+
+    Parameters
+    ----------
+    path : ThresholdPath
+        the path
+    taxonomy_tree : Taxonomy
+        the taxonomy tree
+
+    Returns
+    -------
+    None
+    """
+
+    if not len(path.thresholds):
+        print("No positive weights.")
+        return
+
+    arrays = taxonomy_tree.arrays
+    print('\t'.join(["threshold", "leaves", "p", "H"]))
+    for k, threshold in enumerate(path.thresholds.tolist()):
+        heads = "; ".join([" ".join([arrays.index(head), arrays.name(head)]) \
+                           for head in path.head_subjects(k)])
+        print('\t'.join([str(round(threshold, 5)), str(path.leaf_counts[k]),
+                         str(round(path.penalties[k], 3)), heads]))
+
+
+def select_subtree(taxonomy_tree: Union[Taxonomy, LazyTaxonomy], subtree: str) -> Taxonomy:
+    """Returns the subtree of the taxonomy given by the index or the name
+    of its root as a taxonomy of its own; lifting over it skips the rest
+    of the taxonomy entirely
+
+    Parameters
+    ----------
+    taxonomy_tree : Union[Taxonomy, LazyTaxonomy]
+        the taxonomy tree, possibly loaded lazily
+    subtree : str
+        the index (e.g. "1.2.") or the name of the subtree root
+
+    Returns
+    -------
+    Taxonomy
+        the subtree
+    """
+    if re.fullmatch(r"[\d\.]+", subtree):
+        return taxonomy_tree.subtree(index=subtree)
+    return taxonomy_tree.subtree(name=subtree)
+
+
+def run(taxonomy_file: str, taxonomy_leaves: str, clusters: str, \
+        cluster_number: Union[int, None] = None, subtree: Union[str, None] = None, \
+        processes: int = 1, gammas: Union[List[float], None] = None, \
+        lambdas: Union[List[float], None] = None, threshold_path: bool = False, \
+        use_cache: bool = False) -> None:
     """Obtains cluster and runs ParGenFS algorithm over a taxonomy tree
 
     Parameters
@@ -502,8 +1139,24 @@ def run(taxonomy_file: str, taxonomy_leaves: str, clusters: str, cluster_number:
         taxonomy leaves in *.txt format
     clusters : str
         clusters' membership table in *.dat format
-    cluster_number : int
-        number of cluster for lifting
+    cluster_number : Union[int, None], default=None
+        number of cluster for lifting, all the clusters if "None"
+    subtree : Union[str, None], default=None
+        the index or the name of the root of the subtree to lift the
+        cluster over, the whole taxonomy if "None"
+    processes : int, default=1
+        the number of worker processes lifting the clusters (if all the
+        clusters are lifted)
+    gammas : Union[List[float], None], default=None
+        gamma penalty values to sweep over (with "lambdas") for the
+        cluster; no sweep if both are "None"
+    lambdas : Union[List[float], None], default=None
+        lambda penalty values to sweep over
+    threshold_path : bool, default=False
+        lift the cluster for every distinct truncation threshold
+    use_cache : bool, default=False
+        whether to store the compiled taxonomy (and the section index)
+        next to the taxonomy file; stored ones are loaded anyway
 
     Returns
     -------
@@ -512,7 +1165,11 @@ def run(taxonomy_file: str, taxonomy_leaves: str, clusters: str, cluster_number:
 
     gamma_val = GAMMA
     lambda_val = LAMBDA
-    taxonomy_tree = Taxonomy(taxonomy_file)
+    if subtree is not None:
+        # only the section of the file containing the subtree is parsed
+        taxonomy_tree = select_subtree(LazyTaxonomy(taxonomy_file, CompactNode, use_cache), subtree)
+    else:
+        taxonomy_tree = Taxonomy(taxonomy_file, use_cache, CompactNode)
 
     node_names = []
     with open(taxonomy_leaves, 'r') as file_opened:
@@ -532,9 +1189,24 @@ def run(taxonomy_file: str, taxonomy_leaves: str, clusters: str, cluster_number:
                 membership_vector = list(map(float, line.split(' ')))
             membership_matrix.append(membership_vector)
 
+    if cluster_number is None:
+        membership = get_cluster_matrix(taxonomy_tree.arrays, node_names, membership_matrix)
+        print_batch_result(iter_pargenfs_batch(membership, taxonomy_tree, gamma_v=gamma_val,
+                                               lambda_v=lambda_val, processes=processes),
+                           taxonomy_tree, len(membership))
+        return
+
     tree_leaves = taxonomy_tree.leaves
     cluster = get_cluster_k(tree_leaves, node_names, membership_matrix, cluster_number)
-    pargenfs(cluster, taxonomy_tree, gamma_v=gamma_val, lambda_v=lambda_val)
+    if threshold_path:
+        print_threshold_path(pargenfs_threshold_path(cluster, taxonomy_tree, gamma_v=gamma_val,
+                                                     lambda_v=lambda_val), taxonomy_tree)
+        return
+    if gammas is not None or lambdas is not None:
+        print_sweep(pargenfs_sweep(cluster, taxonomy_tree, gammas or [gamma_val],
+                                   lambdas or [lambda_val]), taxonomy_tree)
+        return
+    print_result(pargenfs(cluster, taxonomy_tree, gamma_v=gamma_val, lambda_v=lambda_val))
 
 
 if __name__ == '__main__':
@@ -546,9 +1218,28 @@ if __name__ == '__main__':
                         help="taxonomy leaves in *.txt format")
     parser.add_argument("clusters", type=str,
                         help="clusters' membership table in *.dat format")
-    parser.add_argument("cluster_number", type=int,
-                        help="number of cluster for lifting")
+    parser.add_argument("cluster_number", type=int, nargs="?", default=None,
+                        help="number of cluster for lifting, all the clusters if omitted")
+    parser.add_argument("--subtree", type=str, default=None,
+                        help="index or name of the root of the subtree to lift over")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of processes lifting the clusters (if all the "
+                        "clusters are lifted)")
+    parser.add_argument("--gammas", type=float, nargs="+", default=None,
+                        help="gamma values to sweep over (for the given cluster)")
+    parser.add_argument("--lambdas", type=float, nargs="+", default=None,
+                        help="lambda values to sweep over (for the given cluster)")
+    parser.add_argument("--threshold-path", action="store_true",
+                        help="lift the given cluster for every distinct truncation threshold")
+    parser.add_argument("--cache", action="store_true",
+                        help="store the compiled taxonomy and the section index next to the "
+                        "taxonomy file; stored ones are loaded on the next runs")
 
     args = parser.parse_args()
+    if args.cluster_number is None and (args.gammas or args.lambdas):
+        parser.error("the sweep over gamma and lambda needs a cluster number")
+    if args.cluster_number is None and args.threshold_path:
+        parser.error("the threshold path needs a cluster number")
 
-    run(args.taxonomy_file, args.taxonomy_leaves, args.clusters, args.cluster_number)
+    run(args.taxonomy_file, args.taxonomy_leaves, args.clusters, args.cluster_number,
+        args.subtree, args.processes, args.gammas, args.lambdas, args.threshold_path, args.cache)
@@ -0,0 +1,531 @@
+""" Byte-offset index of the upper sections of a taxonomy file and lazy
+loading of the subtrees
+"""
+
+import json
+import os
+from typing import Dict, List, Type, Union
+
+try:
+    from got.taxonomies.taxonomy import Taxonomy, BaseNode, Node, parse_fvtr_line, \
+        parse_fvtr_chunk, index_key
+    from got.taxonomies.tree_arrays import TreeArrays
+    from got.taxonomies.cache import get_source_stamp, file_digest
+except ImportError as e:
+    from taxonomy import Taxonomy, BaseNode, Node, parse_fvtr_line, parse_fvtr_chunk, index_key
+    from tree_arrays import TreeArrays
+    from cache import get_source_stamp, file_digest
+
+
+SECTION_INDEX_SUFFIX = ".goti"
+SECTION_INDEX_VERSION = 2
+# the number of index levels below the first node that are indexed
+SECTION_LEVELS = 2
+
+
+class SectionIndex:
+    """
+    Byte offsets of the upper sections of a taxonomy file: the first node
+    and the nodes of the next SECTION_LEVELS levels of the indices (e.g.
+    the top-level and second-level sections of a file with a single
+    root). A section occupies the bytes start..end - 1 of the file. The
+    index is usable when every section is contiguous: all the lines
+    under a section follow it without interruption.
+
+    Initial attributes
+    ------------------
+    keys : List[str]
+        section keys (indices without trailing dots), in file order
+    indices : List[str]
+        section indices
+    names : List[str]
+        section names
+    starts : List[int]
+        byte offset of every section
+    ends : List[int]
+        byte offset after every section
+    contiguous : bool
+        whether all the sections are contiguous and their keys unique
+    unique : List[bool]
+        whether the name of every section occurs only once in the file
+
+    Main methods
+    ------------
+    build(filename) (classmethod)
+        scans the file and builds the index
+
+    save(filename) / load(filename) (classmethod)
+        writes the index next to the file / reads it if it is valid
+
+    position_by_name(name)
+        returns the position of the section with a name unique in the file
+
+    find(index)
+        returns the smallest section containing the node with the index
+
+    """
+    def __init__(self, keys: List[str], indices: List[str], names: List[str], \
+                 starts: List[int], ends: List[int], contiguous: bool, \
+                 unique: List[bool]) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        keys : List[str]
+            section keys
+        indices : List[str]
+            section indices
+        names : List[str]
+            section names
+        starts : List[int]
+            byte offsets of the sections
+        ends : List[int]
+            byte offsets after the sections
+        contiguous : bool
+            whether the sections are contiguous
+        unique : List[bool]
+            whether the section names occur only once in the file
+
+        Returns
+        -------
+        None
+        """
+        self.keys = keys
+        self.indices = indices
+        self.names = names
+        self.starts = starts
+        self.ends = ends
+        self.contiguous = contiguous
+        self.unique = unique
+        self._positions: Dict[str, int] = {key: i for i, key in enumerate(keys)}
+
+    @classmethod
+    def build(cls, filename: str) -> 'SectionIndex':
+        """Scans the file and builds the index
+
+        Parameters
+        ----------
+        filename : str
+            taxonomy description in *.fvtr format
+
+        Returns
+        -------
+        SectionIndex
+            the index
+        """
+        keys: List[str] = []
+        indices: List[str] = []
+        names: List[str] = []
+        starts: List[int] = []
+        ends: List[int] = []
+        contiguous = True
+        max_depth = None
+        # sections not closed yet (positions), innermost last, and closed keys
+        open_sections: List[int] = []
+        closed = set()
+        # the number of occurrences of every name in the file
+        name_counts: Dict[str, int] = {}
+
+        with open(filename, 'rb') as file_opened:
+            position = 0
+            for line in file_opened:
+                line_start = position
+                position += len(line)
+                parsed = parse_fvtr_line(line.decode(errors="replace"))
+                if parsed is None:
+                    continue
+                index, name = parsed
+                key = index_key(index)
+                name_counts[name] = name_counts.get(name, 0) + 1
+                depth = key.count(".")
+                if max_depth is None:
+                    max_depth = depth + SECTION_LEVELS
+
+                while open_sections and not is_under(key, keys[open_sections[-1]], strict=True):
+                    section = open_sections.pop()
+                    ends[section] = line_start
+                    closed.add(keys[section])
+
+                prefix = key
+                while contiguous:
+                    if prefix in closed:
+                        contiguous = False
+                    dot = prefix.rfind(".")
+                    if dot < 0:
+                        break
+                    prefix = prefix[:dot]
+
+                if depth <= max_depth:
+                    open_sections.append(len(keys))
+                    keys.append(key)
+                    indices.append(index)
+                    names.append(name)
+                    starts.append(line_start)
+                    ends.append(line_start)
+
+            for section in open_sections:
+                ends[section] = position
+
+        unique = [name_counts[name] == 1 for name in names]
+        return cls(keys, indices, names, starts, ends, contiguous, unique)
+
+    def to_dict(self) -> dict:
+        """Converts the index to a dict (for JSON)
+
+        Returns
+        -------
+        dict
+            the index
+        """
+        return {"keys": self.keys, "indices": self.indices, "names": self.names,
+                "starts": self.starts, "ends": self.ends, "contiguous": self.contiguous,
+                "unique": self.unique}
+
+    def save(self, filename: str) -> str:
+        """Writes the index next to the file
+
+        Parameters
+        ----------
+        filename : str
+            taxonomy description in *.fvtr format the index was built from
+
+        Returns
+        -------
+        str
+            name of the index file
+        """
+        return self._write(filename, get_source_stamp(filename))
+
+    def _write(self, filename: str, source: Dict[str, Union[int, str]]) -> str:
+        """Writes the index next to the file with the given stamp of the file
+
+        Parameters
+        ----------
+        filename : str
+            taxonomy description in *.fvtr format
+        source : Dict[str, Union[int, str]]
+            the stamp of the file (see cache.get_source_stamp)
+
+        Returns
+        -------
+        str
+            name of the index file
+        """
+        index_name = filename + SECTION_INDEX_SUFFIX
+        temporary_name = f"{index_name}.{os.getpid()}.tmp"
+        with open(temporary_name, 'w', encoding="utf-8") as file_opened:
+            json.dump({"version": SECTION_INDEX_VERSION, "source": source,
+                       "index": self.to_dict()}, file_opened, ensure_ascii=False)
+        os.replace(temporary_name, index_name)
+        return index_name
+
+    @classmethod
+    def load(cls, filename: str, refresh: bool = False) -> Union['SectionIndex', None]:
+        """Reads the index of the file if it is valid for the file (see
+        cache.load_compiled; the new modification time is stored if
+        refresh is set)
+
+        Parameters
+        ----------
+        filename : str
+            taxonomy description in *.fvtr format
+        refresh : bool, default=False
+            whether to store the new modification time of the file
+
+        Returns
+        -------
+        Union[SectionIndex, None]
+            the index or "None" if there is no valid index
+        """
+        try:
+            with open(filename + SECTION_INDEX_SUFFIX, 'r', encoding="utf-8") as file_opened:
+                stored = json.load(file_opened)
+            if stored["version"] != SECTION_INDEX_VERSION:
+                return None
+            stamp = get_source_stamp(filename, with_digest=False)
+            source = stored["source"]
+            if stamp["size"] != source["size"]:
+                return None
+            if stamp["mtime_ns"] == source["mtime_ns"]:
+                return cls(**stored["index"])
+            if file_digest(filename) != source["sha1"]:
+                return None
+            section_index = cls(**stored["index"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        if refresh:
+            source["mtime_ns"] = stamp["mtime_ns"]
+            try:
+                section_index._write(filename, source)
+            except OSError:
+                pass
+        return section_index
+
+    def __len__(self) -> int:
+        """Returns the number of sections
+
+        Returns
+        -------
+        int
+            the number of sections
+        """
+        return len(self.keys)
+
+    def position(self, index: str) -> Union[int, None]:
+        """Returns the position of the section with the index
+
+        Parameters
+        ----------
+        index : str
+            the index, trailing dots are ignored
+
+        Returns
+        -------
+        Union[int, None]
+            the position or "None" if it is not a section
+        """
+        return self._positions.get(index_key(index))
+
+    def position_by_name(self, name: str) -> Union[int, None]:
+        """Returns the position of the section with the name if no other
+        node of the file has this name
+
+        Parameters
+        ----------
+        name : str
+            the name
+
+        Returns
+        -------
+        Union[int, None]
+            the position or "None" if it is not a section name or the
+            name is not unique
+        """
+        if name not in self.names:
+            return None
+        position = self.names.index(name)
+        return position if self.unique[position] else None
+
+    def find(self, index: str) -> Union[int, None]:
+        """Returns the smallest section containing the node with the index
+
+        Parameters
+        ----------
+        index : str
+            the node index
+
+        Returns
+        -------
+        Union[int, None]
+            position of the section or "None" if there is no such a section
+        """
+        key = index_key(index)
+        while True:
+            if key in self._positions:
+                return self._positions[key]
+            dot = key.rfind(".")
+            if dot < 0:
+                return None
+            key = key[:dot]
+
+
+def is_under(key: str, section_key: str, strict: bool = False) -> bool:
+    """Checks whether the key is in the section (by whole components)
+
+    Parameters
+    ----------
+    key : str
+        the node key
+    section_key : str
+        the section key
+    strict : bool, default=False
+        whether the section itself is excluded
+
+    Returns
+    -------
+    bool
+        "True" if the key is in the section, else "False"
+    """
+    if key == section_key:
+        return not strict
+    return key.startswith(section_key + ".")
+
+
+def get_section_index(filename: str, use_cache: bool = False) -> SectionIndex:
+    """Returns the section index of the file. The stored index is used if
+    it is valid, otherwise the index is built; it is stored next to the
+    file (or its stamp is refreshed) only if use_cache is set
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+    use_cache : bool, default=False
+        whether to write the index next to the file
+
+    Returns
+    -------
+    SectionIndex
+        the index
+    """
+    section_index = SectionIndex.load(filename, refresh=use_cache)
+    if section_index is None:
+        section_index = SectionIndex.build(filename)
+        if use_cache:
+            try:
+                section_index.save(filename)
+            except OSError:
+                pass
+    return section_index
+
+
+class LazyTaxonomy:
+    """
+    A taxonomy whose subtrees are parsed on demand. Opening it reads the
+    stored section index (or builds it in one scan of the file, keeping
+    no nodes); a subtree is built from the bytes of the smallest
+    indexed section containing it, so the memory is proportional to the
+    sections touched. If the sections of the file are not contiguous,
+    the whole file is loaded (as Taxonomy) on the first request.
+
+    Initial attributes
+    ------------------
+    filename : str
+        taxonomy description in *.fvtr format
+    node_class : Type[BaseNode]
+        a class of the tree nodes
+    sections : SectionIndex
+        the section index
+    use_cache : bool
+        whether the index and the compiled taxonomy are stored next to
+        the file (see get_section_index and Taxonomy)
+
+    Main methods
+    ------------
+    load_section(position)
+        returns the section as a taxonomy of its own
+
+    subtree(index, name)
+        returns a subtree as a taxonomy of its own
+
+    release(index)
+        drops the parsed sections
+
+    """
+    def __init__(self, filename: str, node_class: Type[BaseNode] = Node, \
+                 use_cache: bool = False) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        filename : str
+            taxonomy description in *.fvtr format
+        node_class : Type[BaseNode], default=Node
+            a class of the tree nodes
+        use_cache : bool, default=False
+            whether to write the section index (and the compiled
+            taxonomy) next to the file; valid stored ones are read anyway
+
+        Returns
+        -------
+        None
+        """
+        self.filename = filename
+        self.node_class = node_class
+        self.use_cache = use_cache
+        self.sections = get_section_index(filename, use_cache)
+        self._loaded: Dict[int, Taxonomy] = {}
+        self._taxonomy: Union[Taxonomy, None] = None
+
+    @property
+    def taxonomy(self) -> Taxonomy:
+        """The whole taxonomy (loaded on the first access)
+
+        Returns
+        -------
+        Taxonomy
+            the taxonomy
+        """
+        if self._taxonomy is None:
+            self._taxonomy = Taxonomy(self.filename, self.use_cache, self.node_class)
+        return self._taxonomy
+
+    def load_section(self, position: int) -> Taxonomy:
+        """Returns the section as a taxonomy of its own; it is parsed from
+        its bytes on the first request
+
+        Parameters
+        ----------
+        position : int
+            position of the section in the index
+
+        Returns
+        -------
+        Taxonomy
+            the section
+        """
+        if position not in self._loaded:
+            start, end = self.sections.starts[position], self.sections.ends[position]
+            indices, names, parents, _, _ = parse_fvtr_chunk(self.filename, start, end, "")
+            # the section node is the first one, all the others are under it
+            arrays = TreeArrays.from_parents([-1] + parents[1:], indices, names)
+            self._loaded[position] = Taxonomy.from_arrays(
+                arrays, f"{self.filename}#{self.sections.indices[position]}", self.node_class)
+        return self._loaded[position]
+
+    def subtree(self, index: Union[str, None] = None, name: Union[str, None] = None) -> Taxonomy:
+        """returns the subtree rooted at the node with the index or the
+        name as a taxonomy of its own (see Taxonomy.subtree). Only the
+        section containing the subtree is parsed; names are looked up
+        among the section names occurring only once in the file, other
+        names need the whole taxonomy (the first node with the name in
+        preorder is taken then)
+
+        Parameters
+        ----------
+        index : Union[str, None], default=None
+            the index of the subtree root, e.g. "1.2."
+        name : Union[str, None], default=None
+            the name of the subtree root (used if no index is given)
+
+        Returns
+        -------
+        Taxonomy
+            the subtree
+        """
+        if not self.sections.contiguous:
+            return self.taxonomy.subtree(index, name)
+
+        if index is None:
+            name = (name or "").lower()
+            position = self.sections.position_by_name(name)
+            if position is None:
+                return self.taxonomy.subtree(index, name)
+            index = self.sections.indices[position]
+
+        position = self.sections.find(index)
+        if position is None:
+            raise KeyError(f"No node with index {index!r}")
+        section = self.load_section(position)
+        if self.sections.keys[position] == index_key(index):
+            return section
+        return section.subtree(index=index)
+
+    def release(self, index: Union[str, None] = None) -> None:
+        """Drops the parsed sections (all of them, or the one with the
+        index) to free memory
+
+        Parameters
+        ----------
+        index : Union[str, None], default=None
+            the index of a section, all the sections if "None"
+
+        Returns
+        -------
+        None
+        """
+        if index is None:
+            self._loaded.clear()
+        else:
+            self._loaded.pop(self.sections.position(index), None)
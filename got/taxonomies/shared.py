@@ -0,0 +1,186 @@
+""" Publishing a parsed taxonomy into shared memory for worker processes
+"""
+
+import sys
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+
+try:
+    from got.taxonomies.tree_arrays import TreeArrays
+except ImportError as e:
+    from tree_arrays import TreeArrays
+
+
+ALIGNMENT = 64
+
+# (block name, {field: (dtype, offset, length)})
+SharedDescriptor = Tuple[str, Dict[str, Tuple[str, int, int]]]
+
+
+class SharedTaxonomy:
+    """
+    A taxonomy published into a block of shared memory. The publishing
+    process owns the block: it should call close() when the workers are
+    done (or use the object as a context manager). Workers attach to the
+    block by the descriptor, which is small and cheap to pickle.
+
+    Initial attributes
+    ------------------
+    descriptor : SharedDescriptor
+        the name of the block and the layout of the arrays in it
+
+    Main methods
+    ------------
+    __init__(arrays)
+        copies the arrays into a new block of shared memory
+
+    attach()
+        returns read-only arrays backed by the block
+
+    close()
+        releases and removes the block
+
+    """
+    def __init__(self, arrays: TreeArrays) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy to publish
+
+        Returns
+        -------
+        None
+        """
+        arrays_dict = arrays.to_dict()
+        layout = {}
+        size = 0
+        for name in TreeArrays.ARRAY_FIELDS:
+            array = np.ascontiguousarray(arrays_dict[name])
+            layout[name] = (array.dtype.str, size, len(array))
+            size += -(-max(array.nbytes, 1) // ALIGNMENT) * ALIGNMENT
+
+        self._block = shared_memory.SharedMemory(create=True, size=size)
+        for name in TreeArrays.ARRAY_FIELDS:
+            dtype, offset, length = layout[name]
+            target = np.ndarray((length,), dtype=dtype, buffer=self._block.buf, offset=offset)
+            target[:] = arrays_dict[name]
+            del target
+
+        self.descriptor: SharedDescriptor = (self._block.name, layout)
+
+    def attach(self) -> TreeArrays:
+        """Returns read-only arrays backed by the block (in the publishing
+        process)
+
+        Returns
+        -------
+        TreeArrays
+            array-backed representation of the taxonomy
+        """
+        return _view_arrays(self._block, self.descriptor[1])
+
+    def close(self) -> None:
+        """Releases and removes the block. Arrays attached in the publishing
+        process must not be used afterwards
+
+        Returns
+        -------
+        None
+        """
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def __enter__(self) -> 'SharedTaxonomy':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def publish_taxonomy(arrays: TreeArrays) -> SharedTaxonomy:
+    """Publishes the taxonomy into shared memory
+
+    Parameters
+    ----------
+    arrays : TreeArrays
+        array-backed representation of the taxonomy, e.g. Taxonomy.arrays
+
+    Returns
+    -------
+    SharedTaxonomy
+        the published taxonomy; pass its descriptor to the workers
+    """
+    return SharedTaxonomy(arrays)
+
+
+def attach_taxonomy(descriptor: SharedDescriptor) -> TreeArrays:
+    """Attaches to a taxonomy published into shared memory. No data is
+    copied and no nodes are built: the arrays are read-only views of the
+    shared block, and the names are decoded on the first access
+
+    Parameters
+    ----------
+    descriptor : SharedDescriptor
+        descriptor of the published taxonomy (SharedTaxonomy.descriptor)
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    block_name, layout = descriptor
+    return _view_arrays(_open_block(block_name), layout)
+
+
+def _open_block(block_name: str) -> shared_memory.SharedMemory:
+    """Opens an existing block of shared memory without taking ownership.
+    Before Python 3.13 the block is registered with the resource tracker;
+    this is harmless for worker processes started by the publishing
+    process, since they share its tracker
+
+    Parameters
+    ----------
+    block_name : str
+        name of the block
+
+    Returns
+    -------
+    shared_memory.SharedMemory
+        the block
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=block_name, track=False)
+    return shared_memory.SharedMemory(name=block_name)
+
+
+def _view_arrays(block: shared_memory.SharedMemory, \
+                 layout: Dict[str, Tuple[str, int, int]]) -> TreeArrays:
+    """Builds read-only arrays viewing the block
+
+    Parameters
+    ----------
+    block : shared_memory.SharedMemory
+        the block
+    layout : Dict[str, Tuple[str, int, int]]
+        dtype, offset and length of every array
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    arrays = {}
+    for name, (dtype, offset, length) in layout.items():
+        array = np.ndarray((length,), dtype=dtype, buffer=block.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[name] = array
+
+    tree_arrays = TreeArrays.from_dict(arrays)
+    tree_arrays.buffer_owner = block
+    return tree_arrays
@@ -1,14 +1,146 @@
 """ A class for taxonomy representing
 """
 
+import io
+import os
 import re
 import argparse
 
 from collections.abc import Collection
-from typing import List, Generator, Union, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Generator, Type, Union, Tuple
+
+try:
+    from got.taxonomies.tree_arrays import TreeArrays
+    from got.taxonomies.cache import load_compiled, save_compiled
+    from got.taxonomies.lookup import TaxonomyLookup
+    from got.taxonomies.ancestry import AncestorIndex
+    from got.taxonomies.diff import TaxonomyDiff, diff_taxonomies
+except ImportError as e:
+    from tree_arrays import TreeArrays
+    from cache import load_compiled, save_compiled
+    from lookup import TaxonomyLookup
+    from ancestry import AncestorIndex
+    from diff import TaxonomyDiff, diff_taxonomies
+
+
+# FVTR line patterns: "1.2.,,Name," and the loose form "1.2. Name"
+INDEX_PATTERN = re.compile(r"(^[\.\d]+)[*, ]")
+NAME_PATTERN = re.compile(r",([A-Za-zА-Яа-я 102\-']+),?")
+LOOSE_INDEX_PATTERN = re.compile(r"([\.\d]+.?) ")
+LOOSE_NAME_PATTERN = re.compile(r" ([A-Za-zА-Яа-я 102\-']+),?")
+
+
+class BaseNode(Collection):
+    """
+    A base class for taxonomy tree nodes: the methods shared by Node and
+    CompactNode. A subclass defines the attributes "index", "name",
+    "parent" and "children".
+
+    Main methods
+    ------------
+    __contains__(item)
+        checks whether the item is a direct decsendant of the node,
+        one may use "in" operator to check the property above
+
+    __iter__()
+        iterates over all descendants of the node, this is a
+        syntactic sugar for iteration over "node.children"
 
+    __len__()
+        returns the outgoing degree of the node, i.e., the
+        number of node's children
+
+    is_leaf() (property)
+        checks whether the node is a leaf node
+
+    is_internal() (property)
+        checks whether the node is an internal node (i.e., is
+        not a leaf)
+
+    is_root() (property)
+        checks whether the node is a root of the tree
 
-class Node(Collection):
+    """
+    __slots__ = ()
+
+    def __contains__(self, item: Union['Node', object]) -> bool:
+        """Checks whether the item is a direct descendant of the node
+
+        Parameters
+        ----------
+        item : Union['Node', object]
+            a node to check
+
+        Returns
+        -------
+        bool
+            "True" if the item is a direct descendant of the node,
+            else "False"
+        """
+        return item in self.children
+
+    def __iter__(self) -> Generator['Node', None, None]:
+        """Iterates over all the descendants of the node
+
+        Returns
+        -------
+        Generator['Node', None, None]
+            generator over all the descendants
+        """
+        for item in self.children:
+            yield item
+
+    def __len__(self) -> int:
+        """Returns an outgoing degree of the node, i.e., a
+        number of node's children
+
+        Returns
+        -------
+        int
+            an outgoing degree of the node
+        """
+        return len(self.children)
+
+    @property
+    def is_leaf(self) -> bool:
+        """Checks whether the node is a leaf node
+
+        Returns
+        -------
+        bool
+            "True" if the node is a leaf node,
+            else "False"
+        """
+        return not self.children
+
+    @property
+    def is_internal(self) -> bool:
+        """Checks whether the node is an internal node (i.e., is
+        not a leaf)
+
+        Returns
+        -------
+        bool
+            "True" if the node is an internal node,
+            else "False"
+        """
+        return bool(self.children)
+
+    @property
+    def is_root(self) -> bool:
+        """Checks whether the node is a root of the tree
+
+        Returns
+        -------
+        bool
+            "True" if the node is a root node,
+            else "False"
+        """
+        return self.parent is None
+
+
+class Node(BaseNode):
     """
     A class used to represent a Tree node with the all descendants.
     This is a basic data structure for a taxonomy representing.
@@ -112,44 +244,6 @@ class Node(Collection):
         self.p: float = .0
         self.H: List['Node'] = []
 
-    def __contains__(self, item: Union['Node', object]) -> bool:
-        """Checks whether the item is a direct descendant of the node
-
-        Parameters
-        ----------
-        item : Union['Node', object]
-            a node to check
-
-        Returns
-        -------
-        bool
-            "True" if the item is a direct descendant of the node,
-            else "False"
-        """
-        return item in self.children
-
-    def __iter__(self) -> Generator['Node', None, None]:
-        """Iterates over all the descendants of the node
-
-        Returns
-        -------
-        Generator['Node', None, None]
-            generator over all the descendants
-        """
-        for item in self.children:
-            yield item
-
-    def __len__(self) -> int:
-        """Returns an outgoing degree of the node, i.e., a
-        number of node's children
-
-        Returns
-        -------
-        int
-            an outgoing degree of the node
-        """
-        return len(self.children)
-
     def __setattr__(self, name: str, value: Union[list, dict, str, bool, int, \
                                                   float]) -> None:
         """Allows to set any custom attribute, this is useful for
@@ -186,42 +280,70 @@ class Node(Collection):
             return None
         return self.__dict__[name]
 
-    @property
-    def is_leaf(self) -> bool:
-        """Checks whether the node is a leaf node
 
-        Returns
-        -------
-        bool
-            "True" if the node is a leaf node,
-            else "False"
-        """
-        return not self.children
+class CompactNode(BaseNode):
+    """
+    A compact taxonomy tree node with a fixed set of attributes stored
+    in slots (no per-node "__dict__"). It has the same attributes as
+    Node, plus the ones set by ParGenFS; unlike Node, it does not
+    accept custom attributes. Select it with
+    Taxonomy(filename, node_class=CompactNode).
 
-    @property
-    def is_internal(self) -> bool:
-        """Checks whether the node is an internal node (i.e., is
-        not a leaf)
+    Initial attributes
+    ------------------
+    index, name, parent, children, u, score, v, V, G, L, p, H
+        the same as for Node
+    e : int or None
+        node's layer number
+    o : bool or None
+        label: whether the ParGenFS init step was done for the node
+    of : int or None
+        label: whether the node is an offshoot
 
-        Returns
-        -------
-        bool
-            "True" if the node is an internal node,
-            else "False"
-        """
-        return bool(self.children)
+    Main methods
+    ------------
+    __init__(index, name, parent, children)
+        constructor
 
-    @property
-    def is_root(self) -> bool:
-        """Checks whether the node is a root of the tree
+    """
+    __slots__ = ("index", "name", "parent", "children", "u", "score", "G", "L",
+                 "V", "v", "p", "H", "e", "o", "of")
+
+    def __init__(self, index: str, name: str, parent: Union['CompactNode', None], \
+                 children: List['CompactNode'] = None) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        index : str
+            a string representing the node index, for example 1.2.3.
+        name : str
+            the name of the node
+        parent : Union['CompactNode', None]
+            the parent of the node
+        children : List['CompactNode'], default=None
+            a list of the all direct descendants (children) of the node
 
         Returns
         -------
-        bool
-            "True" if the node is a root node,
-            else "False"
+        None
         """
-        return self.parent is None
+        self.index = index
+        self.name = name
+        self.parent = parent
+        self.children = [] if children is None else children
+
+        self.u: float = .0
+        self.score: float = .0
+        self.G: List['CompactNode'] = []
+        self.L: List['CompactNode'] = []
+        self.V: float = .0
+        self.v: float = .0
+        self.p: float = .0
+        self.H: List['CompactNode'] = []
+        self.e: Union[int, None] = None
+        self.o: Union[bool, None] = None
+        self.of: Union[int, None] = None
 
 
 class Taxonomy:
@@ -233,18 +355,27 @@ class Taxonomy:
     built_from : str
         a string representing the filename using for taxonomy
         building
-    _root : Node
-        a root of the taxonomy tree
+    _root : Node or None
+        a root of the taxonomy tree, built on the first access when
+        the taxonomy is loaded from its compiled form
     leaves_extracted : bool
         label: whether leaves were extracted for the taxonomy or not
     _leaves : List[None]
         containts all the leaves of the taxonomy
+    _arrays : TreeArrays or None
+        array-backed (CSR) representation of the taxonomy, built
+        on demand
+    node_class : Type[BaseNode]
+        a class of the tree nodes: Node or CompactNode
 
     Main methods
     ------------
-    __init__(filename)
+    __init__(filename, use_cache, node_class)
         constructor
 
+    from_arrays(arrays, built_from, node_class) (classmethod)
+        builds the taxonomy from its array-backed representation
+
     __repr__()
         represents basic info about the taxonomy
 
@@ -257,12 +388,37 @@ class Taxonomy:
     root() (property)
         returns the root of the taxonomy
 
+    arrays() (property)
+        returns the array-backed representation of the taxonomy
+
+    nodes() (property)
+        returns all the nodes ordered by their ids in the arrays
+
+    lookup() (property)
+        returns the lookup indexes of the taxonomy
+
+    ancestry() (property)
+        returns the Euler tour / LCA index of the taxonomy
+
+    find_by_name(name)
+        returns all the nodes with the name
+
+    find_by_index(index)
+        returns the node with the index
+
+    reload(filename, use_cache)
+        updates the taxonomy from a new version of the file
+
+    subtree(index, name)
+        returns a subtree as a taxonomy of its own
+
     get_index_and_name(node_repr) (staticmethod)
         returns str representations for index and name of node
 
     """
 
-    def __init__(self, filename: str) -> None:
+    def __init__(self, filename: str, use_cache: bool = False, \
+                 node_class: Type[BaseNode] = Node, processes: int = 1) -> None:
         """Constructor
 
         Parameters
@@ -270,14 +426,69 @@ class Taxonomy:
         filename : str
             a string representing the name of the file for
             taxonomy constructing
+        use_cache : bool, default=False
+            whether to write the compiled form of the taxonomy next to
+            the file after parsing it; a valid compiled form is loaded
+            instead of parsing in any case (see cache.py)
+        node_class : Type[BaseNode], default=Node
+            a class of the tree nodes; CompactNode takes less memory and
+            has faster attribute access
+        processes : int, default=1
+            the number of processes parsing the file; with more than one
+            process the file is parsed in chunks (see parse_fvtr_parallel)
 
         Returns
         -------
         None
         """
-        self._root = self.get_taxonomy_tree(filename)
+        self.node_class = node_class
+        self._root: Union[Node, None] = None
+        self._arrays: Union[TreeArrays, None] = None
         self.leaves_extracted: bool = False
         self._leaves: List[Node] = []
+        self._nodes: Union[List[Node], None] = None
+        self.built_from = filename
+
+        self._arrays = load_compiled(filename, refresh=use_cache)
+        if self._arrays is None:
+            if processes > 1:
+                self._arrays = parse_fvtr_parallel(filename, processes)
+            else:
+                self._root = self.get_taxonomy_tree(filename)
+            if use_cache:
+                try:
+                    save_compiled(self.arrays, filename)
+                except OSError:
+                    pass
+
+    @classmethod
+    def from_arrays(cls, arrays: TreeArrays, built_from: str = "", \
+                    node_class: Type[BaseNode] = Node) -> 'Taxonomy':
+        """Builds the taxonomy from its array-backed representation
+
+        Parameters
+        ----------
+        arrays : TreeArrays
+            array-backed representation of the taxonomy
+        built_from : str, default=""
+            a string representing the source of the taxonomy
+        node_class : Type[BaseNode], default=Node
+            a class of the tree nodes
+
+        Returns
+        -------
+        Taxonomy
+            the taxonomy built
+        """
+        taxonomy = cls.__new__(cls)
+        taxonomy.node_class = node_class
+        taxonomy._root = None
+        taxonomy.built_from = built_from
+        taxonomy.leaves_extracted = False
+        taxonomy._leaves = []
+        taxonomy._nodes = None
+        taxonomy._arrays = arrays
+        return taxonomy
 
     def _repr__(self) -> str:
         """Represents information about the taxonomy
@@ -304,8 +515,202 @@ class Taxonomy:
         Node
             the root of the tree
         """
+        if self._root is None:
+            self._root, self._nodes = self._arrays.to_tree(self.node_class)
         return self._root
 
+    @property
+    def arrays(self) -> TreeArrays:
+        """returns the array-backed (CSR) representation of the taxonomy.
+        The representation is built once; it does not reflect changes
+        made to the nodes afterwards
+
+        Parameters
+        ----------
+
+        Returns
+        -------
+        TreeArrays
+            the array-backed representation
+        """
+        if self._arrays is None:
+            self._arrays = TreeArrays.from_tree(self.root)
+        return self._arrays
+
+    @property
+    def nodes(self) -> List[Node]:
+        """returns all the nodes ordered by their ids in the arrays
+        (i.e., in preorder)
+
+        Parameters
+        ----------
+
+        Returns
+        -------
+        List[Node]
+            the nodes
+        """
+        if self._nodes is None:
+            nodes = []
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                nodes.append(node)
+                stack.extend(reversed(node.children))
+            self._nodes = nodes
+        return self._nodes
+
+    @property
+    def lookup(self) -> TaxonomyLookup:
+        """returns the lookup indexes of the taxonomy (built on demand and
+        shared by all the users of the taxonomy arrays)
+
+        Parameters
+        ----------
+
+        Returns
+        -------
+        TaxonomyLookup
+            the lookup indexes
+        """
+        return TaxonomyLookup.of(self.arrays)
+
+    @property
+    def ancestry(self) -> AncestorIndex:
+        """returns the Euler tour / LCA index of the taxonomy (built on demand
+        and shared by all the users of the taxonomy arrays)
+
+        Parameters
+        ----------
+
+        Returns
+        -------
+        AncestorIndex
+            the index
+        """
+        return AncestorIndex.of(self.arrays)
+
+    def find_by_name(self, name: str) -> List[Node]:
+        """returns all the nodes with the name, in preorder
+
+        Parameters
+        ----------
+        name : str
+            the node name
+
+        Returns
+        -------
+        List[Node]
+            the nodes found
+        """
+        nodes = self.nodes
+        return [nodes[i] for i in self.lookup.ids_by_name(name)]
+
+    def find_by_index(self, index: str) -> Union[Node, None]:
+        """returns the node with the index (the first one if the index
+        is repeated); trailing dots are ignored
+
+        Parameters
+        ----------
+        index : str
+            the node index, e.g. "1.2.3."
+
+        Returns
+        -------
+        Union[Node, None]
+            the node found or "None"
+        """
+        node_id = self.lookup.id_by_index(index)
+        return self.nodes[node_id] if node_id is not None else None
+
+    def subtree(self, index: Union[str, None] = None, name: Union[str, None] = None) -> 'Taxonomy':
+        """returns the subtree rooted at the node with the index or the name
+        (the first one in preorder) as a taxonomy of its own. It is built
+        from the arrays in O(subtree size); the nodes of the rest of the
+        taxonomy are not touched (nor built)
+
+        Parameters
+        ----------
+        index : Union[str, None], default=None
+            the index of the subtree root, e.g. "1.2."
+        name : Union[str, None], default=None
+            the name of the subtree root (used if no index is given)
+
+        Returns
+        -------
+        Taxonomy
+            the subtree
+        """
+        if index is not None:
+            node_id = self.lookup.id_by_index(index)
+        else:
+            node_ids = self.lookup.ids_by_name((name or "").lower())
+            node_id = int(node_ids[0]) if len(node_ids) else None
+        if node_id is None:
+            raise KeyError(f"No node with index {index!r}" if index is not None \
+                           else f"No node with name {name!r}")
+
+        return Taxonomy.from_arrays(self.ancestry.subtree_arrays(node_id),
+                                    f"{self.built_from}#{self.arrays.index(node_id)}",
+                                    self.node_class)
+
+    def reload(self, filename: Union[str, None] = None, use_cache: bool = False) -> TaxonomyDiff:
+        """Updates the taxonomy from a new version of the file. The nodes
+        of the unchanged subtrees are kept as they are (with all their
+        attributes); changed nodes are patched, added nodes are created
+        and removed nodes are dropped. If nothing changed, the arrays
+        and the indexes built on them are kept as well
+
+        Parameters
+        ----------
+        filename : Union[str, None], default=None
+            the new version of the file, the file the taxonomy was built
+            from if "None"
+        use_cache : bool, default=False
+            whether to write the compiled form of the file (see __init__)
+
+        Returns
+        -------
+        TaxonomyDiff
+            the differences, including the ids of the moved nodes
+        """
+        filename = filename if filename is not None else self.built_from
+        new_arrays = Taxonomy(filename, use_cache, self.node_class).arrays
+        diff = diff_taxonomies(self.arrays, new_arrays)
+        self.built_from = filename
+        if not diff.changed:
+            return diff
+
+        if self._root is not None:
+            old_nodes = self.nodes
+            node_changed = diff.node_changed.tolist()
+            nodes = []
+            for node_id, (old_id, parent_id) in enumerate(zip(diff.new_to_old.tolist(), \
+                                                              new_arrays.parent.tolist())):
+                parent_node = nodes[parent_id] if parent_id >= 0 else None
+                if old_id < 0:
+                    node = self.node_class(new_arrays.index(node_id), new_arrays.name(node_id), \
+                                           parent_node)
+                else:
+                    node = old_nodes[old_id]
+                    if node_changed[node_id]:
+                        node.index = new_arrays.index(node_id)
+                        node.name = new_arrays.name(node_id)
+                        node.children = []
+                # the children of a changed node are collected anew
+                if parent_node is None:
+                    node.parent = None
+                elif node_changed[parent_id]:
+                    node.parent = parent_node
+                    parent_node.children.append(node)
+                nodes.append(node)
+            self._root, self._nodes = nodes[0], nodes
+
+        self._arrays = new_arrays
+        self.leaves_extracted = False
+        self._leaves = []
+        return diff
+
     @staticmethod
     def get_index_and_name(node_repr: Tuple[re.Match, re.Match]) \
         -> Tuple[str, str]:
@@ -322,14 +727,13 @@ class Taxonomy:
             node index and name
         """
         index_s, name_s = node_repr
-        return index_s.group(0)[:-1], \
-            name_s.group(0)[1:].lower() \
-            if (name_s.group(0)[-1].isalpha() or \
-                name_s.group(0)[-1] == "'") \
-                else name_s.group(0)[1:-1].lower()
+        return get_index_and_name(index_s.group(0), name_s.group(0))
 
     def get_taxonomy_tree(self, filename: str) -> Node:
-        """Builds the taxonomy from its description in the file
+        """Builds the taxonomy from its description in the file.
+        The file is parsed in a single pass; the parent of each node is
+        the closest node seen before whose index is a prefix (by whole
+        components) of the node index
 
         Parameters
         ----------
@@ -342,47 +746,35 @@ class Taxonomy:
         Node
             the root of the taxonomy built
         """
-        nodes = []
-        with open(filename, 'r') as file_opened:
-            for line in file_opened:
-                index_s = re.search(r"(^[\.\d]+)[*, ]", line)
-                name_s = re.search(r",([A-Za-zА-Яа-я 102\-']+),?", line)
-                if not index_s:
-                    index_s = re.search(r"([\.\d]+.?) ", line)
-                    name_s = re.search(r" ([A-Za-zА-Яа-я 102\-']+),?", line)
-                if index_s and name_s:
-                    nodes.append((index_s, name_s))
-
-        root_found = True
-        root_index = nodes[0][0].group(0)[:-1]
-
-        for index_s, _ in nodes[1:]:
-            if not index_s.group(0)[:-1].startswith(root_index):
-                root_found = False
-                break
-
-        if root_found:
-            index, name = self.get_index_and_name(nodes[0])
-            tree = Node(index, name, None)
-            nodes = nodes[1:]
-        else:
-            tree = Node("", "root", None)
+        tree = None
+        root_index = None
+        nodes_by_key: Dict[str, BaseNode] = {}
 
-        curr_parent = tree
-
-        for node in nodes:
-            index, name = self.get_index_and_name(node)
-            while curr_parent.index not in index:
-                if curr_parent.parent is not None:
-                    curr_parent = curr_parent.parent
-
-            current_node = Node(index, name, curr_parent)
-            curr_parent.children.append(current_node)
-            curr_parent = current_node
+        with open(filename, 'r') as file_opened:
+            for index, name in iter_fvtr(file_opened):
+                if tree is None:
+                    tree = self.node_class(index, name, None)
+                    root_index = index
+                    nodes_by_key[index_key(index)] = tree
+                    continue
+
+                if root_index is not None and not index.startswith(root_index):
+                    # the first node is not a common root: add an artificial one
+                    first_node = tree
+                    tree = self.node_class("", "root", None, [first_node])
+                    first_node.parent = tree
+                    root_index = None
+
+                parent = find_parent(index, nodes_by_key)
+                if parent is None:
+                    parent = tree
+                current_node = self.node_class(index, name, parent)
+                parent.children.append(current_node)
+                nodes_by_key[index_key(index)] = current_node
 
         self.built_from = filename
         self.leaves_extracted = False
-        return tree
+        return tree if tree is not None else self.node_class("", "root", None)
 
     @property
     def leaves(self) -> List[Node]:
@@ -401,7 +793,8 @@ class Taxonomy:
         if self.leaves_extracted:
             return self._leaves
 
-        leaves = extract_leaves(self._root)
+        nodes = self.nodes
+        leaves = [nodes[i] for i in self.arrays.leaf_ids]
         self._leaves = leaves
         self.leaves_extracted = True
 
@@ -423,6 +816,323 @@ class Taxonomy:
         self._leaves = leaves_list
 
 
+def get_index_and_name(index_found: str, name_found: str) -> Tuple[str, str]:
+    """returns str representations of index and name found by the
+    FVTR line patterns (with the delimiters captured)
+
+    Parameters
+    ----------
+    index_found : str
+        index found by the pattern
+    name_found : str
+        name found by the pattern
+
+    Returns
+    -------
+    Tuple[str, str]
+        node index and name
+    """
+    return index_found[:-1], \
+        name_found[1:].lower() \
+        if (name_found[-1].isalpha() or name_found[-1] == "'") \
+        else name_found[1:-1].lower()
+
+
+def parse_fvtr_line(line: str) -> Union[Tuple[str, str], None]:
+    """Parses a line of a file in flat-view taxonomy representation
+    (FVTR) format
+
+    Parameters
+    ----------
+    line : str
+        the line to parse
+
+    Returns
+    -------
+    Union[Tuple[str, str], None]
+        node index and name, or "None" if the line does not describe
+        a node
+    """
+    index_s = INDEX_PATTERN.search(line)
+    name_s = NAME_PATTERN.search(line)
+    if not index_s:
+        index_s = LOOSE_INDEX_PATTERN.search(line)
+        name_s = LOOSE_NAME_PATTERN.search(line)
+    if index_s and name_s:
+        return get_index_and_name(index_s.group(0), name_s.group(0))
+    return None
+
+
+def iter_fvtr(lines: Iterable[str]) -> Generator[Tuple[str, str], None, None]:
+    """Iterates over the nodes described by the lines in FVTR format
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        the lines to parse, e.g. an opened file
+
+    Returns
+    -------
+    Generator[Tuple[str, str], None, None]
+        generator over node indices and names
+    """
+    for line in lines:
+        parsed = parse_fvtr_line(line)
+        if parsed is not None:
+            yield parsed
+
+
+def index_key(index: str) -> str:
+    """Returns a key of the node index for the parent lookup:
+    the index without trailing dots, e.g. "1.2" for "1.2."
+
+    Parameters
+    ----------
+    index : str
+        the node index
+
+    Returns
+    -------
+    str
+        the key
+    """
+    return index.rstrip(".")
+
+
+def find_parent(index: str, nodes_by_key: Dict[str, BaseNode]) -> Union[BaseNode, None]:
+    """Finds the parent of a node by its index: the node whose key is the
+    longest proper prefix of the index (by whole components)
+
+    Parameters
+    ----------
+    index : str
+        the node index
+    nodes_by_key : Dict[str, BaseNode]
+        nodes seen before, by their keys
+
+    Returns
+    -------
+    Union[BaseNode, None]
+        the parent found or "None"
+    """
+    key = index_key(index)
+    while True:
+        position = key.rfind(".")
+        if position < 0:
+            return None
+        key = key[:position]
+        if key in nodes_by_key:
+            return nodes_by_key[key]
+
+
+def get_first_node(filename: str) -> Union[Tuple[str, str], None]:
+    """Returns the first node described in the file
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+
+    Returns
+    -------
+    Union[Tuple[str, str], None]
+        node index and name, or "None" if the file describes no nodes
+    """
+    with open(filename, 'r') as file_opened:
+        return next(iter_fvtr(file_opened), None)
+
+
+def find_section_starts(filename: str, number_of_chunks: int, section_depth: int) -> List[int]:
+    """Splits the file into chunks of about the same size at the lines
+    starting sections: nodes whose indices have at most "section_depth"
+    components. A chunk ends where the next one starts
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+    number_of_chunks : int
+        the desired number of chunks
+    section_depth : int
+        the maximal number of index components of a section start
+
+    Returns
+    -------
+    List[int]
+        byte offsets of the chunks (starting with 0) and the file size
+    """
+    size = os.path.getsize(filename)
+    starts = [0]
+    with open(filename, 'rb') as file_opened:
+        for chunk in range(1, number_of_chunks):
+            target = max(size * chunk // number_of_chunks, starts[-1] + 1)
+            if target >= size:
+                break
+            file_opened.seek(target - 1)
+            file_opened.readline()
+            while True:
+                position = file_opened.tell()
+                line = file_opened.readline()
+                if not line:
+                    break
+                parsed = parse_fvtr_line(line.decode(errors="replace"))
+                if parsed is not None and \
+                    index_key(parsed[0]).count(".") < section_depth:
+                    break
+            if position >= size:
+                break
+            starts.append(position)
+    starts.append(size)
+    return starts
+
+
+def parse_fvtr_chunk(filename: str, start: int, end: int, root_index: str) \
+    -> Tuple[List[str], List[str], List[int], List[int], int]:
+    """Parses a chunk of the file on its own: the parent of each node is
+    looked for among the nodes of the chunk only. The parent found is
+    final when it is the closest possible one (its key is the index
+    of the node without the last component); otherwise the node is
+    reported as pending, since an earlier chunk may contain a closer one
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+    start : int
+        byte offset of the chunk
+    end : int
+        byte offset after the chunk
+    root_index : str
+        index of the first node of the file
+
+    Returns
+    -------
+    Tuple[List[str], List[str], List[int], List[int], int]
+        node indices, node names, positions of the parents in the chunk
+        (-1 if there is no parent in the chunk), positions of the pending
+        nodes and the position of the first node whose index does not
+        start with "root_index" (-1 if there is no such a node)
+    """
+    with open(filename, 'rb') as file_opened:
+        file_opened.seek(start)
+        data = file_opened.read(end - start)
+
+    indices: List[str] = []
+    names: List[str] = []
+    parents: List[int] = []
+    pending: List[int] = []
+    outside_root = -1
+    positions_by_key: Dict[str, int] = {}
+
+    for position, (index, name) in enumerate(iter_fvtr(io.TextIOWrapper(io.BytesIO(data)))):
+        key = index_key(index)
+        parent = -1
+        closest = True
+        while True:
+            dot = key.rfind(".")
+            if dot < 0:
+                break
+            key = key[:dot]
+            if key in positions_by_key:
+                parent = positions_by_key[key]
+                break
+            closest = False
+        if not closest:
+            pending.append(position)
+        if outside_root < 0 and not index.startswith(root_index):
+            outside_root = position
+
+        indices.append(index)
+        names.append(name)
+        parents.append(parent)
+        positions_by_key[index_key(index)] = position
+
+    return indices, names, parents, pending, outside_root
+
+
+def parse_fvtr_parallel(filename: str, processes: Union[int, None] = None) -> TreeArrays:
+    """Builds the taxonomy from its description in the file parsing
+    chunks of the file in a process pool. The chunks start at the lines
+    of the top-level sections (the two upper levels of the indices, so
+    that a file with a single root is split as well); the subtrees
+    are stitched in the main process. The result is identical to the
+    one of Taxonomy.get_taxonomy_tree
+
+    Parameters
+    ----------
+    filename : str
+        taxonomy description in *.fvtr format
+    processes : Union[int, None], default=None
+        the number of worker processes, os.cpu_count() if "None"
+
+    Returns
+    -------
+    TreeArrays
+        array-backed representation of the taxonomy
+    """
+    first_node = get_first_node(filename)
+    if first_node is None:
+        return TreeArrays.from_parents([-1], [""], ["root"])
+    root_index = first_node[0]
+
+    processes = processes or os.cpu_count() or 1
+    section_depth = index_key(root_index).count(".") + 2
+    starts = find_section_starts(filename, 4 * processes, section_depth)
+    bounds = list(zip(starts[:-1], starts[1:]))
+    with ProcessPoolExecutor(processes) as executor:
+        chunks = list(executor.map(parse_fvtr_chunk, [filename] * len(bounds),
+                                   [start for start, _ in bounds], [end for _, end in bounds],
+                                   [root_index] * len(bounds)))
+
+    # the chunks whose pending nodes may have parents in the chunks before them
+    last_pending = max((number for number, chunk in enumerate(chunks) if chunk[3]), default=0)
+
+    indices: List[str] = []
+    names: List[str] = []
+    parents: List[int] = []
+    # the last position of every key in the chunks before the current one
+    positions_by_key: Dict[str, int] = {}
+    outside_root = -1
+    for number, (chunk_indices, chunk_names, chunk_parents, pending, chunk_outside) \
+        in enumerate(chunks):
+        offset = len(indices)
+        chunk_parents = [parent + offset if parent >= 0 else -1 for parent in chunk_parents]
+        for position in pending if number else []:
+            stop_key = index_key(chunk_indices[chunk_parents[position] - offset]) \
+                if chunk_parents[position] >= 0 else None
+            key = index_key(chunk_indices[position])
+            while True:
+                dot = key.rfind(".")
+                if dot < 0:
+                    break
+                key = key[:dot]
+                if key == stop_key:
+                    break
+                if key in positions_by_key:
+                    chunk_parents[position] = positions_by_key[key]
+                    break
+        if outside_root < 0 and chunk_outside >= 0:
+            outside_root = offset + chunk_outside
+
+        indices.extend(chunk_indices)
+        names.extend(chunk_names)
+        parents.extend(chunk_parents)
+        if number < last_pending:
+            positions_by_key.update((index_key(index), offset + position) \
+                                    for position, index in enumerate(chunk_indices))
+
+    # nodes without a parent are children of the root at the time they are read
+    parents[0] = -1
+    if outside_root < 0:
+        parents[1:] = [parent if parent >= 0 else 0 for parent in parents[1:]]
+        return TreeArrays.from_parents(parents, indices, names)
+
+    # an artificial root is added at the first node not under the first one
+    parents = [-1, 0] + [parent + 1 if parent >= 0 else (1 if position < outside_root else 0) \
+                         for position, parent in enumerate(parents[1:], 1)]
+    return TreeArrays.from_parents(parents, [""] + indices, ["root"] + names)
+
+
 def extract_leaves(tree: Node) -> List[Node]:
     """Returns all the leaves of the tree / sub-tree
 
@@ -437,16 +1147,15 @@ def extract_leaves(tree: Node) -> List[Node]:
            a list of the tree / sub-tree leaves
     """
     leaves = []
+    stack = [tree]
 
-    def find_leaves(node):
+    while stack:
+        node = stack.pop()
         if node.is_internal:
-            for child in node:
-                find_leaves(child)
+            stack.extend(reversed(node.children))
         else:
             leaves.append(node)
 
-    find_leaves(tree)
-
     return leaves
 
 def save_leaves(leaves: List[Node], filename: str = "taxonomy_leaves.txt") -> None:
@@ -473,10 +1182,15 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Working with taxonomy.")
     parser.add_argument("taxonomy_file", type=str,
                         help="taxonomy description in *.fvtr format")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of processes parsing the file")
+    parser.add_argument("--cache", action="store_true",
+                        help="store the compiled taxonomy next to the file; a stored one "
+                        "is loaded on the next runs")
 
     args = parser.parse_args()
 
-    TAXONOMY_GOT = Taxonomy(args.taxonomy_file)
+    TAXONOMY_GOT = Taxonomy(args.taxonomy_file, args.cache, processes=args.processes)
     print(f"Taxonomy was built from file: {args.taxonomy_file}.")
     print(f"Taxonomy leaves for {args.taxonomy_file}:")
     print(('\n'.join([' '.join([i.index, i.name]) for i in TAXONOMY_GOT.leaves])))
@@ -0,0 +1,136 @@
+""" Iterative traversals of taxonomy trees (safe for any tree depth)
+"""
+
+from typing import Callable, Generator, Tuple, Union
+
+try:
+    from got.taxonomies.taxonomy import Node
+except ImportError as e:
+    from taxonomy import Node
+
+
+def iter_preorder(node: Node) -> Generator[Node, None, None]:
+    """Iterates over the tree / sub-tree in preorder. Children of a node
+    are taken after the node is yielded, so the caller may replace
+    "node.children" of the current node, and the new children are
+    traversed
+
+    Parameters
+    ----------
+    node : Node
+        the root of the taxonomy tree / sub-tree
+
+    Returns
+    -------
+    Generator[Node, None, None]
+        generator over the nodes
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(current.children))
+
+
+def iter_postorder(node: Node) -> Generator[Node, None, None]:
+    """Iterates over the tree / sub-tree in postorder. Children of a node
+    are taken when the node is reached for the first time, so the caller
+    may replace "node.children" of the current node
+
+    Parameters
+    ----------
+    node : Node
+        the root of the taxonomy tree / sub-tree
+
+    Returns
+    -------
+    Generator[Node, None, None]
+        generator over the nodes
+    """
+    stack = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if expanded:
+            yield current
+            continue
+        stack.append((current, True))
+        stack.extend((child, False) for child in reversed(current.children))
+
+
+def iter_leaves(node: Node) -> Generator[Node, None, None]:
+    """Iterates over the leaves of the tree / sub-tree from left to right
+
+    Parameters
+    ----------
+    node : Node
+        the root of the taxonomy tree / sub-tree
+
+    Returns
+    -------
+    Generator[Node, None, None]
+        generator over the leaves
+    """
+    for current in iter_preorder(node):
+        if current.is_leaf:
+            yield current
+
+
+def iter_with_layers(node: Node, current_layer: int = 0) \
+    -> Generator[Tuple[Node, int], None, None]:
+    """Iterates over the tree / sub-tree in preorder together with
+    the layer numbers (nodes' levels)
+
+    Parameters
+    ----------
+    node : Node
+        the root of the taxonomy tree / sub-tree
+    current_layer : int, default=0
+        a layer number of the root
+
+    Returns
+    -------
+    Generator[Tuple[Node, int], None, None]
+        generator over the nodes and their layer numbers
+    """
+    stack = [(node, current_layer)]
+    while stack:
+        current, layer = stack.pop()
+        yield current, layer
+        stack.extend((child, layer + 1) for child in reversed(current.children))
+
+
+def sum_over_subtrees(node: Node, value: Callable[[Node], float], \
+                     on_subtree: Union[Callable[[Node, float], None], None] = None) -> float:
+    """Computes subtree sums s(x) = value(x) + s(c_1) + ... + s(c_k) in the same
+    order of floating-point additions as the recursive computation does.
+    "value" is called in preorder; "on_subtree" is called in postorder,
+    once the sum of the subtree is known
+
+    Parameters
+    ----------
+    node : Node
+        the root of the taxonomy tree / sub-tree
+    value : Callable[[Node], float]
+        the own value of a node
+    on_subtree : Union[Callable[[Node, float], None], None], default=None
+        a callback receiving a node and the sum over its subtree
+
+    Returns
+    -------
+    float
+        the sum over the tree / sub-tree
+    """
+    stack = [[node, iter(node.children), .0 + value(node)]]
+    while True:
+        frame = stack[-1]
+        child = next(frame[1], None)
+        if child is not None:
+            stack.append([child, iter(child.children), .0 + value(child)])
+            continue
+
+        stack.pop()
+        if on_subtree is not None:
+            on_subtree(frame[0], frame[2])
+        if not stack:
+            return frame[2]
+        stack[-1][2] += frame[2]
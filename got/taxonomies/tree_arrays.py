@@ -0,0 +1,510 @@
+""" Array-backed (CSR) representation of a taxonomy tree
+"""
+
+import sys
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+
+
+ID_DTYPE = np.int64
+DEPTH_DTYPE = np.int32
+
+
+class StringTable(Sequence):
+    """
+    A compact table of strings stored as a single UTF-8 buffer
+    with offsets. Strings are decoded (and interned) on the first
+    access only.
+
+    Initial attributes
+    ------------------
+    data : np.ndarray
+        uint8 buffer with all the strings encoded in UTF-8
+    offsets : np.ndarray
+        int64 array of size (number_of_strings + 1), the i-th string
+        occupies data[offsets[i]:offsets[i + 1]]
+
+    Main methods
+    ------------
+    __init__(data, offsets)
+        constructor
+
+    from_strings(strings) (classmethod)
+        builds a table from python strings
+
+    __getitem__(i)
+        returns the i-th string
+
+    __len__()
+        returns the number of strings in the table
+
+    """
+    def __init__(self, data: np.ndarray, offsets: np.ndarray) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        data : np.ndarray
+            uint8 buffer with all the strings encoded in UTF-8
+        offsets : np.ndarray
+            int64 array of string boundaries in the buffer
+
+        Returns
+        -------
+        None
+        """
+        self.data = data
+        self.offsets = offsets
+        self._decoded: List[Optional[str]] = [None] * (len(offsets) - 1)
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> 'StringTable':
+        """Builds a table from python strings
+
+        Parameters
+        ----------
+        strings : Iterable[str]
+            strings to store
+
+        Returns
+        -------
+        StringTable
+            the table built
+        """
+        strings = list(strings)
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=ID_DTYPE)
+        np.cumsum([len(s) for s in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+        table = cls(data, offsets)
+        table._decoded = [sys.intern(s) for s in strings]
+        return table
+
+    def __getitem__(self, i: int) -> str:
+        """Returns the i-th string
+
+        Parameters
+        ----------
+        i : int
+            position of the string in the table
+
+        Returns
+        -------
+        str
+            the string
+        """
+        value = self._decoded[i]
+        if value is None:
+            start, end = self.offsets[i], self.offsets[i + 1]
+            value = sys.intern(bytes(self.data[start:end]).decode("utf-8"))
+            self._decoded[i] = value
+        return value
+
+    def __len__(self) -> int:
+        """Returns the number of strings in the table
+
+        Returns
+        -------
+        int
+            the number of strings
+        """
+        return len(self._decoded)
+
+
+def intern_strings(strings: Iterable[str]) -> Tuple[np.ndarray, StringTable]:
+    """Replaces strings with ids in a table of unique strings
+
+    Parameters
+    ----------
+    strings : Iterable[str]
+        strings to intern
+
+    Returns
+    -------
+    Tuple[np.ndarray, StringTable]
+        an array of string ids and the table of unique strings
+    """
+    table: Dict[str, int] = {}
+    ids = [table.setdefault(s, len(table)) for s in strings]
+    return np.array(ids, dtype=ID_DTYPE), StringTable.from_strings(table)
+
+
+class TreeArrays:
+    """
+    A compact array-backed representation of a taxonomy tree.
+    Node ids are assigned in preorder, so the subtree of the node i
+    occupies ids i, i + 1, ..., i + size[i] - 1, and the leaves are
+    enumerated in the same order as in extract_leaves.
+
+    Initial attributes
+    ------------------
+    parent : np.ndarray
+        parent id of every node, -1 for the root
+    depth : np.ndarray
+        depth (layer number) of every node, 0 for the root
+    child_offsets : np.ndarray
+        CSR offsets: the children of the node i are
+        children[child_offsets[i]:child_offsets[i + 1]]
+    children : np.ndarray
+        CSR children ids
+    postorder : np.ndarray
+        node ids in postorder
+    name_ids : np.ndarray
+        id of the node name in the "names" table
+    names : StringTable
+        interned node names
+    index_ids : np.ndarray
+        id of the node index in the "indices" table
+    indices : StringTable
+        interned node indices
+    lookup : TaxonomyLookup or None
+        lookup indexes shared by all the users of the arrays, see
+        TaxonomyLookup.of
+    ancestry : AncestorIndex or None
+        Euler tour / LCA index shared by all the users of the arrays,
+        see AncestorIndex.of
+    buffer_owner : object or None
+        an object keeping the memory of the arrays alive, e.g. a
+        shared memory block the arrays are attached to
+
+    Main methods
+    ------------
+    __init__(parent, depth, child_offsets, children, postorder,
+             name_ids, names, index_ids, indices)
+        constructor
+
+    from_parents(parents, indices, names) (classmethod)
+        builds the arrays from a list of parents
+
+    from_tree(root) (classmethod)
+        builds the arrays from a tree of nodes
+
+    to_tree(node_class)
+        builds a tree of nodes from the arrays
+
+    to_dict() / from_dict(arrays) (classmethod)
+        converts the structure to a dict of plain arrays and back
+
+    """
+
+    ARRAY_FIELDS = ("parent", "depth", "child_offsets", "children", "postorder",
+                    "name_ids", "names_data", "names_offsets", "index_ids",
+                    "indices_data", "indices_offsets")
+
+    def __init__(self, parent: np.ndarray, depth: np.ndarray, child_offsets: np.ndarray, \
+                 children: np.ndarray, postorder: np.ndarray, name_ids: np.ndarray, \
+                 names: StringTable, index_ids: np.ndarray, indices: StringTable) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        parent : np.ndarray
+            parent id of every node, -1 for the root
+        depth : np.ndarray
+            depth of every node
+        child_offsets : np.ndarray
+            CSR offsets of the children
+        children : np.ndarray
+            CSR children ids
+        postorder : np.ndarray
+            node ids in postorder
+        name_ids : np.ndarray
+            ids of the node names
+        names : StringTable
+            interned node names
+        index_ids : np.ndarray
+            ids of the node indices
+        indices : StringTable
+            interned node indices
+
+        Returns
+        -------
+        None
+        """
+        self.parent = parent
+        self.depth = depth
+        self.child_offsets = child_offsets
+        self.children = children
+        self.postorder = postorder
+        self.name_ids = name_ids
+        self.names = names
+        self.index_ids = index_ids
+        self.indices = indices
+        self.lookup = None
+        self.ancestry = None
+        self.buffer_owner = None
+
+    def __len__(self) -> int:
+        """Returns the number of nodes
+
+        Returns
+        -------
+        int
+            the number of nodes
+        """
+        return len(self.parent)
+
+    @property
+    def preorder(self) -> np.ndarray:
+        """Node ids in preorder (ids are preorder positions)
+
+        Returns
+        -------
+        np.ndarray
+            node ids in preorder
+        """
+        return np.arange(len(self.parent), dtype=ID_DTYPE)
+
+    @property
+    def degree(self) -> np.ndarray:
+        """Outgoing degree (number of children) of every node
+
+        Returns
+        -------
+        np.ndarray
+            the degrees
+        """
+        return np.diff(self.child_offsets)
+
+    @property
+    def leaf_ids(self) -> np.ndarray:
+        """Ids of the leaves in the order of extract_leaves
+
+        Returns
+        -------
+        np.ndarray
+            leaf ids
+        """
+        return np.flatnonzero(self.child_offsets[1:] == self.child_offsets[:-1])
+
+    def children_of(self, node_id: int) -> np.ndarray:
+        """Returns the children ids of the node
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        np.ndarray
+            ids of the children
+        """
+        return self.children[self.child_offsets[node_id]:self.child_offsets[node_id + 1]]
+
+    def name(self, node_id: int) -> str:
+        """Returns the name of the node
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        str
+            the node name
+        """
+        return self.names[self.name_ids[node_id]]
+
+    def index(self, node_id: int) -> str:
+        """Returns the index of the node
+
+        Parameters
+        ----------
+        node_id : int
+            the node id
+
+        Returns
+        -------
+        str
+            the node index
+        """
+        return self.indices[self.index_ids[node_id]]
+
+    @classmethod
+    def from_parents(cls, parents: List[int], indices: List[str], \
+                     names: List[str]) -> 'TreeArrays':
+        """Builds the arrays from a list of parents. Nodes may be given in
+        any order where every parent precedes its children (e.g., in
+        the order of the lines of a file); children keep this order
+
+        Parameters
+        ----------
+        parents : List[int]
+            position of the parent of every node, -1 for the root
+        indices : List[str]
+            node indices
+        names : List[str]
+            node names
+
+        Returns
+        -------
+        TreeArrays
+            the arrays built
+        """
+        count = len(parents)
+        parents = np.asarray(parents, dtype=ID_DTYPE)
+        # children lists in the input order (stable bucketing by parent)
+        order = np.argsort(parents, kind="stable")
+        order = order[parents[order] >= 0]
+        offsets = np.zeros(count + 1, dtype=ID_DTYPE)
+        np.cumsum(np.bincount(parents[order], minlength=count), out=offsets[1:])
+
+        new_id = np.empty(count, dtype=ID_DTYPE)
+        old_id = np.empty(count, dtype=ID_DTYPE)
+        postorder = []
+        roots = np.flatnonzero(parents < 0)
+        stack = [(int(roots[0]), False)]
+        current = 0
+        while stack:
+            node, processed = stack.pop()
+            if processed:
+                postorder.append(new_id[node])
+                continue
+            new_id[node] = current
+            old_id[current] = node
+            current += 1
+            stack.append((node, True))
+            stack.extend((int(c), False) for c in order[offsets[node]:offsets[node + 1]][::-1])
+
+        parent = np.where(parents[old_id] >= 0, new_id[parents[old_id]], -1)
+        return cls._from_preorder_parents(parent, np.array(postorder, dtype=ID_DTYPE),
+                                          [indices[i] for i in old_id],
+                                          [names[i] for i in old_id])
+
+    @classmethod
+    def from_tree(cls, root) -> 'TreeArrays':
+        """Builds the arrays from a tree of nodes
+
+        Parameters
+        ----------
+        root : Node
+            the root of the tree
+
+        Returns
+        -------
+        TreeArrays
+            the arrays built
+        """
+        parents: List[int] = []
+        indices: List[str] = []
+        names: List[str] = []
+        postorder: List[int] = []
+        # for processed entries the second item is the id of the node itself
+        stack = [(root, -1, False)]
+        while stack:
+            node, node_ref, processed = stack.pop()
+            if processed:
+                postorder.append(node_ref)
+                continue
+            node_id = len(parents)
+            parents.append(node_ref)
+            indices.append(node.index or "")
+            names.append(node.name)
+            stack.append((node, node_id, True))
+            stack.extend((child, node_id, False) for child in reversed(node.children))
+
+        return cls._from_preorder_parents(np.array(parents, dtype=ID_DTYPE),
+                                          np.array(postorder, dtype=ID_DTYPE),
+                                          indices, names)
+
+    @classmethod
+    def _from_preorder_parents(cls, parent: np.ndarray, postorder: np.ndarray, \
+                               indices: List[str], names: List[str]) -> 'TreeArrays':
+        """Builds the arrays from the parents of the nodes numbered in preorder
+
+        Parameters
+        ----------
+        parent : np.ndarray
+            parent ids, -1 for the root
+        postorder : np.ndarray
+            node ids in postorder
+        indices : List[str]
+            node indices in preorder
+        names : List[str]
+            node names in preorder
+
+        Returns
+        -------
+        TreeArrays
+            the arrays built
+        """
+        count = len(parent)
+        depth = np.zeros(count, dtype=DEPTH_DTYPE)
+        for node_id in range(1, count):
+            depth[node_id] = depth[parent[node_id]] + 1
+
+        # preorder ids guarantee that a stable sort keeps the children order
+        children = np.argsort(parent, kind="stable")[1:].astype(ID_DTYPE)
+        child_offsets = np.zeros(count + 1, dtype=ID_DTYPE)
+        np.cumsum(np.bincount(parent[1:], minlength=count), out=child_offsets[1:])
+
+        name_ids, name_table = intern_strings(names)
+        index_ids, index_table = intern_strings(indices)
+        return cls(parent, depth, child_offsets, children, postorder,
+                   name_ids, name_table, index_ids, index_table)
+
+    def to_tree(self, node_class: Type) -> Tuple[object, List[object]]:
+        """Builds a tree of nodes from the arrays
+
+        Parameters
+        ----------
+        node_class : Type
+            a class of nodes to build, e.g. Node
+
+        Returns
+        -------
+        Tuple[Node, List[Node]]
+            the root of the tree and all the nodes ordered by id
+        """
+        nodes: List[object] = []
+        parent = self.parent.tolist()
+        name_ids = self.name_ids.tolist()
+        index_ids = self.index_ids.tolist()
+        for node_id in range(len(parent)):
+            parent_node = nodes[parent[node_id]] if parent[node_id] >= 0 else None
+            node = node_class(self.indices[index_ids[node_id]], \
+                              self.names[name_ids[node_id]], parent_node)
+            if parent_node is not None:
+                parent_node.children.append(node)
+            nodes.append(node)
+
+        return nodes[0], nodes
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """Converts the structure to a dict of plain arrays
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            arrays named as in ARRAY_FIELDS
+        """
+        return {"parent": self.parent, "depth": self.depth,
+                "child_offsets": self.child_offsets, "children": self.children,
+                "postorder": self.postorder, "name_ids": self.name_ids,
+                "names_data": self.names.data, "names_offsets": self.names.offsets,
+                "index_ids": self.index_ids, "indices_data": self.indices.data,
+                "indices_offsets": self.indices.offsets}
+
+    @classmethod
+    def from_dict(cls, arrays: Dict[str, np.ndarray]) -> 'TreeArrays':
+        """Builds the structure from a dict of plain arrays
+
+        Parameters
+        ----------
+        arrays : Dict[str, np.ndarray]
+            arrays named as in ARRAY_FIELDS
+
+        Returns
+        -------
+        TreeArrays
+            the structure built
+        """
+        return cls(arrays["parent"], arrays["depth"], arrays["child_offsets"],
+                   arrays["children"], arrays["postorder"], arrays["name_ids"],
+                   StringTable(arrays["names_data"], arrays["names_offsets"]),
+                   arrays["index_ids"],
+                   StringTable(arrays["indices_data"], arrays["indices_offsets"]))
@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+TEST_FILES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "got", "taxonomies", "test_files")
+
+
+def data_file(name: str) -> str:
+    """Returns the path of a file shipped in got/taxonomies/test_files"""
+    return os.path.join(TEST_FILES, name)
+
+
+def write_fvtr(directory, rows, name="taxonomy.fvtr") -> str:
+    """Writes (index, name) rows as an *.fvtr file and returns its path"""
+    path = os.path.join(str(directory), name)
+    with open(path, "w") as file_opened:
+        for index, node_name in rows:
+            depth = index.count(".")
+            file_opened.write(index + "," * depth + node_name + ",\n")
+    return path
+
+
+def arrays_rows(arrays) -> list:
+    """Returns (index, name, parent) of every node of TreeArrays in preorder"""
+    return [(arrays.index(i), arrays.name(i), int(arrays.parent[i])) for i in range(len(arrays))]
+
+
+LIFTING_ARRAYS = ("u", "kept", "parent", "e", "v", "V", "p", "chosen")
+
+
+def assert_same_lifting(result, expected) -> None:
+    """Asserts that two LiftingResult objects are equal (bitwise)"""
+    assert result.lifted == expected.lifted
+    assert np.array_equal(result.leaf_weights, expected.leaf_weights)
+    if not expected.lifted:
+        return
+    assert result.root_sum == expected.root_sum
+    for name in LIFTING_ARRAYS:
+        assert np.array_equal(getattr(result, name), getattr(expected, name)), name
+
+
+def read_clusters(name: str) -> tuple:
+    """Returns the leaf names and the membership matrix of a shipped data
+    set (e.g. "ds_modified"), read as pargenfs.run reads them"""
+    with open(data_file(f"taxonomy_leaves_{name}.txt")) as file_opened:
+        node_names = [line.split("\t")[-1].strip() for line in file_opened]
+    with open(data_file(f"clusters_{name}.dat")) as file_opened:
+        membership_matrix = [list(map(float, line.split())) for line in file_opened]
+    return node_names, membership_matrix
+
+
+@pytest.fixture
+def iab_fvtr(tmp_path) -> str:
+    """A copy of the IAB fragment taxonomy in a temporary directory, so
+    that no cache or index file is written next to the shipped one"""
+    path = os.path.join(str(tmp_path), "taxonomy_iab_fragment.fvtr")
+    shutil.copy(data_file("taxonomy_iab_fragment.fvtr"), path)
+    return path
+
+
+@pytest.fixture
+def ds_fvtr(tmp_path) -> str:
+    """A copy of the Data Science taxonomy in a temporary directory"""
+    path = os.path.join(str(tmp_path), "taxonomy_ds_modified.fvtr")
+    shutil.copy(data_file("taxonomy_ds_modified.fvtr"), path)
+    return path
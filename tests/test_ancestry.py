@@ -0,0 +1,65 @@
+import random
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.ancestry import AncestorIndex
+from got.taxonomies.tree_arrays import TreeArrays
+
+from .conftest import arrays_rows, data_file
+
+
+def ancestors(arrays, node_id):
+    chain = [node_id]
+    while arrays.parent[chain[-1]] >= 0:
+        chain.append(int(arrays.parent[chain[-1]]))
+    return chain
+
+
+def test_subtree_ranges_match_the_parent_chains():
+    arrays = Taxonomy(data_file("taxonomy_ds_modified.fvtr")).arrays
+    index = AncestorIndex.of(arrays)
+    assert AncestorIndex.of(arrays) is index
+    chains = [set(ancestors(arrays, i)) for i in range(len(arrays))]
+    leaf_ids = arrays.leaf_ids.tolist()
+    for node_id in range(len(arrays)):
+        subtree = [i for i in range(len(arrays)) if node_id in chains[i]]
+        assert list(range(len(arrays)))[index.subtree_slice(node_id)] == subtree
+        assert index.subtree_size(node_id) == len(subtree)
+        leaves = [i for i in leaf_ids if node_id in chains[i]]
+        assert leaf_ids[index.subtree_leaf_slice(node_id)] == leaves
+        assert index.subtree_leaf_count(node_id) == len(leaves)
+    for node_id in range(0, len(arrays), 7):
+        assert [bool(index.is_descendant(node_id, i)) for i in range(len(arrays))] == \
+            [i in chains[node_id] for i in range(len(arrays))]
+
+
+def test_lca_matches_the_parent_chains():
+    arrays = Taxonomy(data_file("taxonomy_ds_modified.fvtr")).arrays
+    index = AncestorIndex.of(arrays)
+    rng = random.Random(0)
+    pairs = [(rng.randrange(len(arrays)), rng.randrange(len(arrays))) for _ in range(500)]
+    for first_id, second_id in pairs + [(0, 0), (0, len(arrays) - 1)]:
+        first_chain = set(ancestors(arrays, first_id))
+        expected = next(i for i in ancestors(arrays, second_id) if i in first_chain)
+        assert index.lca(first_id, second_id) == expected
+
+
+def test_levels_group_the_nodes_by_depth():
+    arrays = Taxonomy(data_file("taxonomy_ds_modified.fvtr")).arrays
+    order, offsets = AncestorIndex.of(arrays).levels
+    for depth in range(len(offsets) - 1):
+        assert order[offsets[depth]:offsets[depth + 1]].tolist() == \
+            [i for i in range(len(arrays)) if arrays.depth[i] == depth]
+
+
+def test_subtree_arrays_match_a_rebuilt_subtree():
+    arrays = Taxonomy(data_file("taxonomy_iab_fragment.fvtr")).arrays
+    index = AncestorIndex.of(arrays)
+    for node_id in range(len(arrays)):
+        ids = list(range(len(arrays)))[index.subtree_slice(node_id)]
+        parents = [-1] + [int(arrays.parent[i]) - node_id for i in ids[1:]]
+        expected = TreeArrays.from_parents(parents, [arrays.index(i) for i in ids],
+                                           [arrays.name(i) for i in ids])
+        subtree = index.subtree_arrays(node_id)
+        assert arrays_rows(subtree) == arrays_rows(expected)
+        assert subtree.postorder.tolist() == expected.postorder.tolist()
+        assert subtree.depth.tolist() == expected.depth.tolist()
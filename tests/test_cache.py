@@ -0,0 +1,92 @@
+import os
+
+from got.taxonomies import cache, sections
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.sections import LazyTaxonomy, SECTION_INDEX_SUFFIX
+
+from .conftest import arrays_rows
+
+
+def touch(filename: str) -> None:
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def count_digests(monkeypatch, module) -> list:
+    calls = []
+    file_digest = cache.file_digest
+
+    def counting_digest(filename):
+        calls.append(filename)
+        return file_digest(filename)
+
+    monkeypatch.setattr(module, "file_digest", counting_digest)
+    return calls
+
+
+def test_nothing_is_written_by_default(iab_fvtr):
+    Taxonomy(iab_fvtr)
+    LazyTaxonomy(iab_fvtr).subtree(index="579.582.")
+    assert os.listdir(os.path.dirname(iab_fvtr)) == [os.path.basename(iab_fvtr)]
+
+
+def test_compiled_taxonomy_round_trip(iab_fvtr):
+    parsed = Taxonomy(iab_fvtr, use_cache=True)
+    assert os.path.exists(cache.cache_path(iab_fvtr))
+
+    loaded = cache.load_compiled(iab_fvtr)
+    assert loaded is not None
+    assert arrays_rows(loaded) == arrays_rows(parsed.arrays)
+    assert arrays_rows(Taxonomy(iab_fvtr, use_cache=True).arrays) == arrays_rows(parsed.arrays)
+
+
+def test_touched_file_is_hashed_once(iab_fvtr, monkeypatch):
+    Taxonomy(iab_fvtr, use_cache=True)
+    touch(iab_fvtr)
+    calls = count_digests(monkeypatch, cache)
+
+    assert cache.load_compiled(iab_fvtr, refresh=True) is not None
+    assert cache.load_compiled(iab_fvtr, refresh=True) is not None
+    assert len(calls) == 1
+
+
+def test_changed_file_is_not_loaded(iab_fvtr):
+    Taxonomy(iab_fvtr, use_cache=True)
+    with open(iab_fvtr) as file_opened:
+        content = file_opened.read()
+    with open(iab_fvtr, "w") as file_opened:
+        file_opened.write(content.replace("Men's Jewelry", "Men's Jewelly"))
+    touch(iab_fvtr)
+
+    assert cache.load_compiled(iab_fvtr) is None
+    assert "men's jewelly and watches" in Taxonomy(iab_fvtr, use_cache=True).arrays.names
+
+
+def test_touched_section_index_is_hashed_once(iab_fvtr, monkeypatch):
+    LazyTaxonomy(iab_fvtr, use_cache=True)
+    assert os.path.exists(iab_fvtr + SECTION_INDEX_SUFFIX)
+    touch(iab_fvtr)
+    calls = count_digests(monkeypatch, sections)
+
+    assert sections.SectionIndex.load(iab_fvtr, refresh=True) is not None
+    assert sections.SectionIndex.load(iab_fvtr, refresh=True) is not None
+    assert len(calls) == 1
+
+
+def test_valid_cache_is_read_without_the_option(iab_fvtr, monkeypatch):
+    parsed = Taxonomy(iab_fvtr, use_cache=True)
+    LazyTaxonomy(iab_fvtr, use_cache=True)
+    touch(iab_fvtr)
+    stamps = [os.stat(name).st_mtime_ns for name in
+              (cache.cache_path(iab_fvtr), iab_fvtr + SECTION_INDEX_SUFFIX)]
+
+    def no_parsing(*args):
+        raise AssertionError("the file is parsed")
+
+    monkeypatch.setattr(Taxonomy, "get_taxonomy_tree", no_parsing)
+    monkeypatch.setattr(sections.SectionIndex, "build", no_parsing)
+    assert arrays_rows(Taxonomy(iab_fvtr).arrays) == arrays_rows(parsed.arrays)
+    assert LazyTaxonomy(iab_fvtr).subtree(index="579.582.").root.index == "579.582."
+    # the stamps are not refreshed without the option
+    assert [os.stat(name).st_mtime_ns for name in
+            (cache.cache_path(iab_fvtr), iab_fvtr + SECTION_INDEX_SUFFIX)] == stamps
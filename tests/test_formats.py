@@ -0,0 +1,40 @@
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.tree_arrays import TreeArrays
+from got.taxonomies.formats import load_taxonomy, save_taxonomy, parse_newick
+
+from .conftest import arrays_rows, data_file
+
+
+@pytest.mark.parametrize("extension", [".jsonl", ".nwk", ".newick", ".npz"])
+@pytest.mark.parametrize("name", ["taxonomy_ds_modified.fvtr", "taxonomy_iab_fragment.fvtr"])
+def test_round_trip(tmp_path, name, extension):
+    taxonomy = Taxonomy(data_file(name))
+    filename = str(tmp_path / ("taxonomy" + extension))
+    save_taxonomy(taxonomy, filename)
+
+    loaded = load_taxonomy(filename)
+    assert arrays_rows(loaded.arrays) == arrays_rows(taxonomy.arrays)
+    assert loaded.arrays.postorder.tolist() == taxonomy.arrays.postorder.tolist()
+    assert [leaf.index for leaf in loaded.leaves] == [leaf.index for leaf in taxonomy.leaves]
+
+
+@pytest.mark.parametrize("extension", [".jsonl", ".nwk", ".npz"])
+def test_round_trip_of_awkward_labels(tmp_path, extension):
+    labels = ["it's (a) root", "a, b; c", "under_score", "[comment]", "", "réseaux"]
+    arrays = TreeArrays.from_parents([-1, 0, 0, 2, 2, 0], [f"1.{i}." for i in range(6)], labels)
+    filename = str(tmp_path / ("taxonomy" + extension))
+    save_taxonomy(arrays, filename)
+    assert arrays_rows(load_taxonomy(filename).arrays) == arrays_rows(arrays)
+
+
+def test_parse_newick():
+    arrays = parse_newick("((A_leaf:1.5,'B''s leaf')inner,C)root;")
+    assert arrays_rows(arrays) == [("", "root", -1), ("", "inner", 0), ("", "A leaf", 1),
+                                   ("", "B's leaf", 1), ("", "C", 0)]
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        save_taxonomy(Taxonomy(data_file("taxonomy_iab_fragment.fvtr")), str(tmp_path / "t.txt"))
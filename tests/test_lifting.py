@@ -0,0 +1,358 @@
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.tree_arrays import TreeArrays
+from got.taxonomies.ete3_functions import make_ete3_lifted
+from got.taxonomies.ancestry import AncestorIndex
+from got.taxonomies.traversal import iter_preorder, sum_over_subtrees
+from got.taxonomies.lifting import lift, lift_batch, lift_sparse, lift_taxonomy, subtree_sums, \
+    LiftingSession
+from got.taxonomies.pargenfs import enumerate_tree_layers, annotate_with_sum, \
+    normalize_and_return_leaf_weights, truncate_weights, set_internal_weights, prune_tree, \
+    set_gaps_for_tree, set_parameters, reduce_edges, make_init_step, make_recursive_step, \
+    indicate_offshoots, make_result_table, get_cluster_k, get_cluster_matrix, get_leaf_weights, \
+    pargenfs, GAMMA, LAMBDA, LIMIT
+
+from .conftest import assert_same_lifting, data_file, read_clusters
+from .test_traversal import deep_taxonomy
+
+NODE_ATTRIBUTES = ("index", "name", "u", "score", "G", "L", "V", "v", "p", "H")
+
+
+def lift_nodes(cluster, taxonomy, gamma_v, lambda_v):
+    # the stages of ParGenFS run over the nodes, as pargenfs() used to do
+    root = taxonomy.root
+    enumerate_tree_layers(root)
+    normalize_and_return_leaf_weights(root, annotate_with_sum(root, cluster))
+    normalize_and_return_leaf_weights(root, truncate_weights(root, LIMIT))
+    set_internal_weights(root)
+    prune_tree(root)
+    set_gaps_for_tree(root)
+    set_parameters(root)
+    reduce_edges(root)
+    make_init_step(root, gamma_v)
+    make_recursive_step(root, gamma_v, lambda_v)
+    indicate_offshoots(root)
+    return make_result_table(root), make_ete3_lifted(root)
+
+
+def node_state(taxonomy):
+    return [tuple(repr(getattr(node, attribute, None)) for attribute in NODE_ATTRIBUTES) +
+            (len(node.children), sorted(vars(node))) for node in taxonomy.nodes]
+
+
+@pytest.mark.parametrize("name", ["ds_modified", "iab_fragment"])
+def test_engine_matches_the_node_stages(name):
+    filename = data_file(f"taxonomy_{name}.fvtr")
+    taxonomy = Taxonomy(filename)
+    node_names, membership_matrix = read_clusters(name)
+    for k in range(len(membership_matrix[0])):
+        cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, k)
+        result = pargenfs(cluster, taxonomy, GAMMA, LAMBDA)
+        if not result.lifted:
+            continue
+        table, ete3 = lift_nodes(cluster, Taxonomy(filename), GAMMA, LAMBDA)
+        assert result.table() == table
+        assert result.ete3() == ete3
+
+
+def test_pargenfs_does_not_touch_the_taxonomy():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    node_names, membership_matrix = read_clusters("ds_modified")
+    state = node_state(taxonomy)
+    clusters = [get_cluster_k(taxonomy.leaves, node_names, membership_matrix, k)
+                for k in range(len(membership_matrix[0]))]
+
+    first = [pargenfs(cluster, taxonomy, GAMMA, LAMBDA) for cluster in clusters]
+    second = [pargenfs(cluster, taxonomy, GAMMA, LAMBDA) for cluster in clusters]
+
+    assert node_state(taxonomy) == state
+    for result, expected in zip(second, first):
+        assert result.lifted == expected.lifted
+        if result.lifted:
+            assert result.table() == expected.table()
+            assert result.tree is not taxonomy.root
+
+
+def test_batch_matches_single_runs():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    arrays = taxonomy.arrays
+    node_names, membership_matrix = read_clusters("ds_modified")
+    membership = get_cluster_matrix(arrays, node_names, membership_matrix)
+    rng = np.random.default_rng(0)
+    noise = rng.random((3, len(arrays.leaf_ids))) * (rng.random((3, len(arrays.leaf_ids))) < .1)
+    membership = np.vstack([membership, noise, np.zeros(len(arrays.leaf_ids))])
+
+    results = lift_batch(arrays, membership, GAMMA, LAMBDA)
+
+    assert len(results) == len(membership)
+    assert not results[-1].lifted
+    for result, leaf_weights in zip(results, membership):
+        assert_same_lifting(result, lift(arrays, leaf_weights, GAMMA, LAMBDA))
+
+
+@pytest.mark.parametrize("chain", [False, True], ids=["ds", "chain"])
+def test_subtree_sums_match_the_recursive_sums(chain):
+    taxonomy = deep_taxonomy(3000) if chain else Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    arrays = taxonomy.arrays
+    node_ids = dict((id(node), node_id) for node_id, node in enumerate(taxonomy.nodes))
+    leaf_position = dict((leaf_id, position) for position, leaf_id
+                         in enumerate(arrays.leaf_ids.tolist()))
+    leaf_values = np.random.default_rng(0).random((4, len(arrays.leaf_ids)))
+
+    sums = subtree_sums(arrays, leaf_values)
+
+    assert sums.shape == (4, len(arrays))
+    for row, values in zip(sums, leaf_values):
+        value = lambda node: values[leaf_position[node_ids[id(node)]]] if node.is_leaf else .0
+        expected = {}
+        sum_over_subtrees(taxonomy.root, value,
+                          lambda node, s: expected.setdefault(node_ids[id(node)], s))
+        assert row.tolist() == [expected[node_id] for node_id in range(len(arrays))]
+    assert subtree_sums(arrays, leaf_values[1]).tolist() == sums[1].tolist()
+
+
+def lifted_ds():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    node_names, membership_matrix = read_clusters("ds_modified")
+    membership = get_cluster_matrix(taxonomy.arrays, node_names, membership_matrix)
+    return taxonomy.arrays, lift_batch(taxonomy.arrays, membership, GAMMA, LAMBDA)
+
+
+def test_gaps_match_the_definition():
+    arrays, results = lifted_ds()
+    index = AncestorIndex.of(arrays)
+    parent = arrays.parent.tolist()
+    for result in results:
+        u = result.u.tolist()
+        # the zero-weight nodes left after the pruning: their parents have weight;
+        # a pruned internal node is a gap of its own
+        pruned_gaps = [i for i in range(1, len(arrays)) if u[i] == 0 and u[parent[i]] > 0]
+        own_gap = lambda node_id: arrays.degree[node_id] > 0 and u[node_id] == 0
+        for node_id in range(len(arrays)):
+            if node_id and u[parent[node_id]] == 0:
+                continue
+            gaps = result.gaps(node_id)
+            assert len(set(gaps)) == len(gaps)
+            assert set(gaps) == {gap for gap in pruned_gaps
+                                 if index.is_descendant(gap, node_id) and
+                                 (gap != node_id or own_gap(node_id))}
+            if u[node_id] > 0:
+                own = [child for child in arrays.children_of(node_id).tolist() if u[child] == 0]
+                assert gaps[:len(own)] == own
+            assert result.V[node_id] == pytest.approx(sum(u[parent[gap]] for gap in gaps))
+
+
+def comb_taxonomy(depth):
+    # a chain of "depth" nodes with a zero-weight leaf hanging off every one
+    parents = [-1] + list(range(depth - 1)) + list(range(depth))
+    indices = [f"{i}." for i in range(len(parents))]
+    return Taxonomy.from_arrays(TreeArrays.from_parents(parents, indices, indices), "comb")
+
+
+def comb_gaps(depth):
+    taxonomy = comb_taxonomy(depth)
+    root = taxonomy.root
+    # all the weight is in the bottom leaf
+    for node in iter_preorder(root):
+        node.u = 1. if node.index == f"{2 * depth - 1}." else .0
+    for node in reversed(list(iter_preorder(root))):
+        if node.is_internal:
+            node.u = sum(child.u for child in node)
+    start = time.perf_counter()
+    set_gaps_for_tree(root)
+    set_parameters(root)
+    return root, time.perf_counter() - start
+
+
+def test_gaps_of_a_comb():
+    depth = 2000
+    root, _ = comb_gaps(depth)
+    side_leaves = [f"{i}." for i in range(depth, 2 * depth - 1)]
+    assert [gap.index for gap in root.G] == side_leaves
+    assert root.V == pytest.approx(depth - 1)
+    # the gaps of all the nodes share one sequence of the size of the tree
+    nodes = list(iter_preorder(root))
+    assert len({id(node.G.gaps) for node in nodes}) == 1
+    assert len(root.G.gaps) == depth - 1
+    for node_id in range(depth):
+        assert [gap.index for gap in nodes[node_id].G] == side_leaves[node_id:]
+
+
+def test_gaps_of_a_comb_take_linear_time():
+    small = min(comb_gaps(2000)[1] for _ in range(3))
+    large = min(comb_gaps(8000)[1] for _ in range(3))
+    # 4 times the size: about 4 times the time (16 times if quadratic)
+    assert large < 8 * small
+
+
+def test_heads_and_losses_follow_the_recursive_step():
+    arrays, results = lifted_ds()
+    for result in results:
+        heads, losses = {}, {}
+        for node_id in reversed(np.flatnonzero(result.kept).tolist()):
+            children = result.children_of(node_id)
+            u, p = result.u[node_id], result.p[node_id]
+            if not children:
+                assert bool(result.chosen[node_id]) == (u > 0)
+                heads[node_id] = [node_id] if u > 0 else []
+                losses[node_id] = []
+                continue
+            sum_penalty = sum((result.p[child] for child in children), .0)
+            own_penalty = u + LAMBDA * result.V[node_id]
+            assert bool(result.chosen[node_id]) == (own_penalty < sum_penalty)
+            if result.chosen[node_id]:
+                assert p == own_penalty
+                heads[node_id] = [node_id]
+                losses[node_id] = result.gaps(node_id)
+            else:
+                assert p == sum_penalty
+                heads[node_id] = [head for child in children for head in heads[child]]
+                losses[node_id] = [loss for child in children for loss in losses[child]]
+        for node_id in heads:
+            assert result.heads(node_id) == heads[node_id]
+            assert result.losses(node_id) == losses[node_id]
+        assert result.heads(int(np.flatnonzero(~result.kept)[0])) == []
+
+
+def prune_recursively(node):
+    # prune_tree and reduce_edges as they were written before the single pass
+    if node.is_internal:
+        for child in node:
+            prune_recursively(child)
+        if not node.u:
+            node.children = []
+            node.G = [node]
+
+
+def reduce_recursively(node):
+    if len(node) == 1:
+        node.children = node.children[0].children
+
+        def update_layer_number(t_node):
+            t_node.e -= 1
+            for child in t_node:
+                update_layer_number(child)
+
+        for child in node:
+            update_layer_number(child)
+    for child in node:
+        reduce_recursively(child)
+
+
+def weighted_root(taxonomy, cluster):
+    root = taxonomy.root
+    enumerate_tree_layers(root)
+    normalize_and_return_leaf_weights(root, annotate_with_sum(root, cluster))
+    normalize_and_return_leaf_weights(root, truncate_weights(root, LIMIT))
+    set_internal_weights(root)
+    return root
+
+
+def tree_rows(root):
+    return [(node.index, node.e, [child.index for child in node],
+             [gap.index for gap in node.G or []]) for node in iter_preorder(root)]
+
+
+def test_prune_and_reduce_match_the_recursive_stages():
+    filename = data_file("taxonomy_ds_modified.fvtr")
+    node_names, membership_matrix = read_clusters("ds_modified")
+    leaves = Taxonomy(filename).leaves
+    for k in range(len(membership_matrix[0])):
+        cluster = get_cluster_k(leaves, node_names, membership_matrix, k)
+        root = weighted_root(Taxonomy(filename), cluster)
+        prune_tree(root)
+        reduce_edges(root)
+        expected = weighted_root(Taxonomy(filename), cluster)
+        prune_recursively(expected)
+        reduce_recursively(expected)
+        assert tree_rows(root) == tree_rows(expected)
+
+
+@pytest.mark.parametrize("depth", [300, 301])
+def test_reduce_a_chain(depth):
+    cluster = {f"{depth}.": .9, f"{depth + 1}.": .4}
+    root = weighted_root(deep_taxonomy(depth), cluster)
+    prune_tree(root)
+    reduce_edges(root)
+    expected = weighted_root(deep_taxonomy(depth), cluster)
+    prune_recursively(expected)
+    reduce_recursively(expected)
+    assert tree_rows(root) == tree_rows(expected)
+
+
+def test_reduce_a_deep_chain():
+    depth = sys.getrecursionlimit() + 500
+    root = weighted_root(deep_taxonomy(depth), {f"{depth}.": .9, f"{depth + 1}.": .4})
+    prune_tree(root)
+    reduce_edges(root)
+    for node in iter_preorder(root):
+        assert all(child.e == node.e + 1 for child in node)
+
+
+def test_session_updates_match_new_liftings():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    arrays = taxonomy.arrays
+    node_names, membership_matrix = read_clusters("ds_modified")
+    weights = get_cluster_matrix(arrays, node_names, membership_matrix)[0]
+    session = LiftingSession(arrays, weights, GAMMA, LAMBDA)
+    rng = np.random.default_rng(0)
+    for step in range(30):
+        numbers = rng.choice(len(weights), size=rng.integers(1, 4), replace=False).tolist()
+        values = rng.random(len(numbers)) * (rng.random(len(numbers)) < .7)
+        chosen_before = session.chosen()
+
+        session.update(dict(zip(numbers, values.tolist())))
+
+        weights[numbers] = values
+        fresh = LiftingSession(arrays, weights, GAMMA, LAMBDA)
+        expected = lift(arrays, weights, GAMMA, LAMBDA)
+        assert session.lifted == fresh.lifted == expected.lifted
+        assert session.chosen().tolist() == fresh.chosen().tolist()
+        assert session.penalty == fresh.penalty
+        assert session.changes == np.flatnonzero(chosen_before != session.chosen()).tolist()
+        if expected.lifted:
+            assert session.chosen().tolist() == expected.chosen.tolist()
+            assert session.head_subjects() == expected.heads(0)
+        assert_same_lifting(session.result(), expected)
+
+
+def assert_same_sets(result, expected):
+    assert_same_lifting(result, expected)
+    if not expected.lifted:
+        return
+    for node_id in np.flatnonzero(expected.kept).tolist():
+        assert result.gaps(node_id) == expected.gaps(node_id)
+        assert result.heads(node_id) == expected.heads(node_id)
+        assert result.losses(node_id) == expected.losses(node_id)
+
+
+def test_sparse_lifting_matches_lift():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    arrays = taxonomy.arrays
+    node_names, membership_matrix = read_clusters("ds_modified")
+    membership = list(get_cluster_matrix(arrays, node_names, membership_matrix))
+    rng = np.random.default_rng(0)
+    leaf_count = len(arrays.leaf_ids)
+    for size in (1, 2, 5, 20):
+        weights = np.zeros(leaf_count)
+        weights[rng.choice(leaf_count, size=size, replace=False)] = rng.random(size) + .01
+        membership.append(weights)
+    membership.append(np.zeros(leaf_count))
+    for weights in membership:
+        positions = np.flatnonzero(weights)
+        assert_same_sets(lift_sparse(arrays, positions, weights[positions], GAMMA, LAMBDA),
+                         lift(arrays, weights, GAMMA, LAMBDA))
+
+
+def test_taxonomy_lifting_matches_lift():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    node_names, membership_matrix = read_clusters("ds_modified")
+    for k in range(len(membership_matrix[0])):
+        cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, k)
+        expected = lift(taxonomy.arrays, get_leaf_weights(cluster, taxonomy.arrays), GAMMA, LAMBDA)
+        assert_same_sets(lift_taxonomy(taxonomy, cluster, GAMMA, LAMBDA), expected)
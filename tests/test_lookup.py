@@ -0,0 +1,72 @@
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.lookup import TaxonomyLookup
+
+from .conftest import data_file, write_fvtr
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+
+
+def test_lookups_match_a_scan(taxonomy):
+    arrays = taxonomy.arrays
+    lookup = taxonomy.lookup
+    leaf_ids = arrays.leaf_ids.tolist()
+    for name in set(arrays.names):
+        assert lookup.ids_by_name(name).tolist() == \
+            [i for i in range(len(arrays)) if arrays.name(i) == name]
+        assert lookup.leaf_positions_by_name(name).tolist() == \
+            [position for position, i in enumerate(leaf_ids) if arrays.name(i) == name]
+    for index in set(arrays.indices):
+        expected = [i for i in range(len(arrays)) if arrays.index(i) == index]
+        assert lookup.ids_by_index(index) == expected
+        assert lookup.id_by_index(index.rstrip(".")) == expected[0]
+    assert lookup.leaf_position[leaf_ids].tolist() == list(range(len(leaf_ids)))
+    assert (lookup.leaf_position >= 0).sum() == len(leaf_ids)
+
+
+def test_lookup_is_shared_by_the_arrays(taxonomy):
+    assert TaxonomyLookup.of(taxonomy.arrays) is taxonomy.lookup
+    assert taxonomy.lookup.ids_by_name("no such name").tolist() == []
+    assert taxonomy.find_by_index("0.0.") is None
+
+
+def test_find_by_name_and_index(tmp_path):
+    taxonomy = Taxonomy(write_fvtr(tmp_path, [("1.", "Root"),
+                                              ("1.1.", "Boosting"),
+                                              ("1.1.1.", "Boosting"),
+                                              ("1.2.", "Other")]))
+    assert [node.index for node in taxonomy.find_by_name("boosting")] == ["1.1.", "1.1.1."]
+    assert taxonomy.find_by_index("1.2").name == "other"
+
+
+def test_align_names(taxonomy):
+    arrays = taxonomy.arrays
+    leaf_names = [arrays.name(i) for i in arrays.leaf_ids.tolist()]
+    names = ["no such name", leaf_names[3], leaf_names[0], leaf_names[3]]
+
+    rows, positions = taxonomy.lookup.align_names(names)
+
+    pairs = sorted(zip(rows.tolist(), positions.tolist()))
+    expected = sorted((row, position) for row, name in [(2, leaf_names[0]), (3, leaf_names[3])]
+                      for position, leaf_name in enumerate(leaf_names) if leaf_name == name)
+    assert pairs == expected
+    assert taxonomy.lookup.align_names(names)[0] is rows
+
+
+def test_align_names_sees_changes_in_place(taxonomy):
+    arrays = taxonomy.arrays
+    names = [arrays.name(i) for i in arrays.leaf_ids.tolist()[:2]]
+    rows, positions = taxonomy.lookup.align_names(names)
+    first = list(zip(rows.tolist(), positions.tolist()))
+
+    names.reverse()
+    rows, positions = taxonomy.lookup.align_names(names)
+
+    assert sorted(zip(rows.tolist(), positions.tolist())) == \
+        sorted((1 - row, position) for row, position in first)
+    fresh = TaxonomyLookup(arrays).align_names(names)
+    assert rows.tolist() == fresh[0].tolist() and positions.tolist() == fresh[1].tolist()
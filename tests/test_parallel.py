@@ -0,0 +1,46 @@
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.lifting import lift, GAMMA, LAMBDA
+from got.taxonomies.parallel import LiftingPool, lift_parallel
+from got.taxonomies.pargenfs import get_cluster_matrix
+
+from .conftest import assert_same_lifting, data_file, read_clusters
+
+
+@pytest.fixture(scope="module")
+def jobs():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    membership = get_cluster_matrix(taxonomy.arrays, *read_clusters("ds_modified"))
+    return [(taxonomy, cluster, GAMMA, LAMBDA) for cluster in membership]
+
+
+def expected_results(jobs):
+    return [lift(taxonomy.arrays, cluster, gamma_v, lambda_v)
+            for taxonomy, cluster, gamma_v, lambda_v in jobs]
+
+
+def test_lift_parallel_matches_lift(jobs):
+    results = dict(lift_parallel(jobs, processes=2))
+    assert sorted(results) == list(range(len(jobs)))
+    for number, expected in enumerate(expected_results(jobs)):
+        assert_same_lifting(results[number], expected)
+        assert results[number].arrays is jobs[number][0].arrays
+
+
+def test_pool_keeps_workers_between_runs(jobs):
+    other = Taxonomy(data_file("taxonomy_iab_fragment.fvtr"))
+    other_jobs = [(other, [.5] * len(other.arrays.leaf_ids), GAMMA, LAMBDA)]
+    with LiftingPool(2) as pool:
+        first = dict(lift_parallel(jobs, pool=pool))
+        executor = pool._executor
+        second = dict(pool.lift(jobs + other_jobs))
+        assert pool._executor is executor
+        assert len(pool._published) == 2
+
+    assert pool._executor is None and not pool._published
+    expected = expected_results(jobs + other_jobs)
+    for number, result in first.items():
+        assert_same_lifting(result, expected[number])
+    for number, result in second.items():
+        assert_same_lifting(result, expected[number])
@@ -0,0 +1,32 @@
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy, parse_fvtr_parallel
+
+from .conftest import arrays_rows, data_file, write_fvtr
+
+
+@pytest.mark.parametrize("name", ["taxonomy_ds_modified.fvtr", "taxonomy_iab_fragment.fvtr"])
+@pytest.mark.parametrize("processes", [2, 3])
+def test_parallel_parse_matches_the_serial_one(name, processes):
+    filename = data_file(name)
+    expected = Taxonomy(filename).arrays
+    arrays = parse_fvtr_parallel(filename, processes)
+    assert arrays_rows(arrays) == arrays_rows(expected)
+    assert arrays.postorder.tolist() == expected.postorder.tolist()
+    assert arrays_rows(Taxonomy(filename, processes=processes).arrays) == arrays_rows(expected)
+
+
+def test_parallel_parse_of_several_roots(tmp_path):
+    rows = []
+    for top in range(1, 4):
+        rows.append((f"{top}.", f"Top {top}"))
+        for i in range(1, 6):
+            rows.append((f"{top}.{i}.", f"Node {top}.{i}"))
+            rows.extend((f"{top}.{i}.{j}.", f"Leaf {top}.{i}.{j}") for j in (1, 2))
+    filename = write_fvtr(tmp_path, rows)
+    assert arrays_rows(parse_fvtr_parallel(filename, 2)) == arrays_rows(Taxonomy(filename).arrays)
+
+
+def test_parallel_parse_of_an_empty_file(tmp_path):
+    filename = write_fvtr(tmp_path, [])
+    assert arrays_rows(parse_fvtr_parallel(filename, 2)) == arrays_rows(Taxonomy(filename).arrays)
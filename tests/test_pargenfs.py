@@ -0,0 +1,157 @@
+import logging
+import os
+
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.pargenfs import get_cluster_k, get_cluster_matrix, pargenfs, \
+    pargenfs_batch, pargenfs_sweep, pargenfs_threshold_path, print_result, GAMMA, LAMBDA
+
+from .conftest import assert_same_lifting, read_clusters
+
+
+@pytest.fixture
+def ds(ds_fvtr):
+    taxonomy = Taxonomy(ds_fvtr, use_cache=False)
+    node_names, membership_matrix = read_clusters("ds_modified")
+    return taxonomy, node_names, membership_matrix
+
+
+def test_pargenfs_is_quiet_and_lazy(ds, tmp_path, monkeypatch, capsys, caplog):
+    taxonomy, node_names, membership_matrix = ds
+    monkeypatch.chdir(tmp_path)
+    cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, 0)
+
+    with caplog.at_level(logging.DEBUG, logger="got.taxonomies.pargenfs"):
+        result = pargenfs(cluster, taxonomy, GAMMA, LAMBDA)
+
+    assert capsys.readouterr().out == ""
+    assert caplog.records
+    assert os.listdir(str(tmp_path)) == ["taxonomy_ds_modified.fvtr"]
+    assert result.lifted
+    assert result._tree is None and result._table is None
+    assert result.table() is result.table()
+    assert result._tree is not None and result.tree is result.tree
+
+
+def test_pargenfs_writes_files_on_request(ds, tmp_path):
+    taxonomy, node_names, membership_matrix = ds
+    cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, 0)
+    table_file = os.path.join(str(tmp_path), "result.csv")
+    ete3_file = os.path.join(str(tmp_path), "result.ete")
+
+    result = pargenfs(cluster, taxonomy, GAMMA, LAMBDA, table_file=table_file,
+                      ete3_file=ete3_file)
+
+    with open(ete3_file) as file_opened:
+        assert file_opened.read() == result.ete3()
+    with open(table_file) as file_opened:
+        assert len(file_opened.read().splitlines()) == len(result.table()) + 1
+
+
+def test_pargenfs_not_lifted(ds):
+    taxonomy, node_names, membership_matrix = ds
+    cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, 0)
+
+    result = pargenfs(cluster, taxonomy, GAMMA, LAMBDA, threshold=1.1)
+
+    assert not result.lifted
+    with pytest.raises(ValueError):
+        result.table()
+
+
+def test_print_result_prints_and_saves(ds, tmp_path, monkeypatch, capsys):
+    taxonomy, node_names, membership_matrix = ds
+    monkeypatch.chdir(tmp_path)
+    result = pargenfs(get_cluster_k(taxonomy.leaves, node_names, membership_matrix, 0),
+                      taxonomy, GAMMA, LAMBDA)
+
+    print_result(result)
+
+    output = capsys.readouterr().out.splitlines()
+    assert output[0] == f"Number of leaves: {len(taxonomy.arrays.leaf_ids)}"
+    assert "Table saved in the file: table.csv" in output
+    assert output[-1] == "Done."
+    with open("taxonomy_tree_lifted.ete") as file_opened:
+        assert file_opened.read() == result.ete3()
+
+
+def test_batch_is_quiet_and_matches_single_runs(ds, tmp_path, monkeypatch, capsys):
+    taxonomy, node_names, membership_matrix = ds
+    monkeypatch.chdir(tmp_path)
+    membership = get_cluster_matrix(taxonomy.arrays, node_names, membership_matrix)
+
+    results = pargenfs_batch(membership, taxonomy, GAMMA, LAMBDA)
+
+    assert capsys.readouterr().out == ""
+    assert os.listdir(str(tmp_path)) == ["taxonomy_ds_modified.fvtr"]
+    assert len(results) == len(membership)
+    for k, result in enumerate(results):
+        single = pargenfs(get_cluster_k(taxonomy.leaves, node_names, membership_matrix, k),
+                          taxonomy, GAMMA, LAMBDA)
+        assert result.lifted == single.lifted
+        if result.lifted:
+            assert result.table() == single.table()
+            assert result.ete3() == single.ete3()
+
+
+def test_batch_writes_files_on_request(ds, tmp_path):
+    taxonomy, node_names, membership_matrix = ds
+    membership = get_cluster_matrix(taxonomy.arrays, node_names, membership_matrix)
+    table_file = os.path.join(str(tmp_path), "batch.csv")
+    ete3_file = os.path.join(str(tmp_path), "cluster_{k}.ete")
+
+    results = pargenfs_batch(membership, taxonomy, GAMMA, LAMBDA, table_file=table_file,
+                             ete3_file=ete3_file)
+
+    lifted = [k for k, result in enumerate(results) if result.lifted]
+    assert lifted
+    for k in lifted:
+        with open(ete3_file.format(k=k)) as file_opened:
+            assert file_opened.read() == results[k].ete3()
+    with open(table_file) as file_opened:
+        rows = file_opened.read().splitlines()
+    assert rows[0].split("\t")[0] == "cluster"
+    assert len(rows) == 1 + sum(len(results[k].table()) for k in lifted)
+
+
+def test_parallel_batch_matches_the_vectorized_one(ds):
+    taxonomy, node_names, membership_matrix = ds
+    membership = get_cluster_matrix(taxonomy.arrays, node_names, membership_matrix)
+    expected = pargenfs_batch(membership, taxonomy, GAMMA, LAMBDA)
+    results = pargenfs_batch(membership, taxonomy, GAMMA, LAMBDA, processes=2)
+    for result, single in zip(results, expected):
+        assert_same_lifting(result.lifting, single.lifting)
+
+
+def test_sweep_is_quiet_and_matches_single_runs(ds, capsys):
+    taxonomy, node_names, membership_matrix = ds
+    cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, 1)
+    gammas, lambdas = [.1, .9], [.2, .5, 1.]
+
+    sweep = pargenfs_sweep(cluster, taxonomy, gammas, lambdas)
+
+    assert capsys.readouterr().out == ""
+    assert sweep.lifted
+    assert sweep.penalties.shape == (len(gammas), len(lambdas))
+    for i, gamma_v in enumerate(gammas):
+        for j, lambda_v in enumerate(lambdas):
+            single = pargenfs(cluster, taxonomy, gamma_v, lambda_v).lifting
+            assert sweep.penalties[i, j] == pytest.approx(single.p[0])
+            assert sweep.head_subjects[i][j] == single.heads(0)
+
+
+def test_threshold_path_is_quiet_and_matches_single_runs(ds, capsys):
+    taxonomy, node_names, membership_matrix = ds
+    cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, 2)
+
+    path = pargenfs_threshold_path(cluster, taxonomy, GAMMA, LAMBDA)
+
+    assert capsys.readouterr().out == ""
+    assert len(path.thresholds)
+    assert list(path.thresholds) == sorted(path.thresholds)
+    for k, threshold in enumerate(path.thresholds.tolist()):
+        single = pargenfs(cluster, taxonomy, GAMMA, LAMBDA, threshold=threshold).lifting
+        assert path.penalties[k] == pytest.approx(single.p[0])
+        assert path.head_subjects(k) == single.heads(0)
+        assert path.leaf_counts[k] == int((single.u[taxonomy.arrays.leaf_ids] > 0).sum())
@@ -0,0 +1,57 @@
+from got.taxonomies.taxonomy import Taxonomy
+
+from .conftest import arrays_rows, write_fvtr
+
+ROWS = [("1.", "Root"),
+        ("1.1.", "Kept"),
+        ("1.1.1.", "Kept leaf"),
+        ("1.1.2.", "Other kept leaf"),
+        ("1.2.", "Changed"),
+        ("1.2.1.", "Renamed leaf"),
+        ("1.2.2.", "Removed leaf"),
+        ("1.3.", "Last")]
+
+
+def node_rows(taxonomy):
+    return [(node.index, node.name, node.parent.index if node.parent else None)
+            for node in taxonomy.nodes]
+
+
+def test_reload_keeps_unchanged_subtrees(tmp_path):
+    filename = write_fvtr(tmp_path, ROWS)
+    taxonomy = Taxonomy(filename)
+    old_nodes = {node.index: node for node in taxonomy.nodes}
+    old_nodes["1.1."].u = .5
+
+    new_rows = ROWS[:5] + [("1.2.1.", "New name"), ("1.2.3.", "Added leaf")] + ROWS[7:]
+    write_fvtr(tmp_path, new_rows)
+    diff = taxonomy.reload()
+
+    assert diff.changed
+    assert (len(diff.added), len(diff.removed), len(diff.renamed)) == (1, 1, 1)
+    fresh = Taxonomy(filename)
+    assert node_rows(taxonomy) == node_rows(fresh)
+    assert arrays_rows(taxonomy.arrays) == arrays_rows(fresh.arrays)
+    assert [leaf.index for leaf in taxonomy.leaves] == [leaf.index for leaf in fresh.leaves]
+
+    nodes = {node.index: node for node in taxonomy.nodes}
+    for index in ("1.1.", "1.1.1.", "1.1.2.", "1.3."):
+        assert nodes[index] is old_nodes[index]
+    assert nodes["1.1."].u == .5
+    assert nodes["1.2.1."].name == "new name"
+    assert diff.id_map == {6: -1}
+    assert not diff.subtree_changed[taxonomy.lookup.id_by_index("1.1.")]
+    assert diff.subtree_changed[taxonomy.lookup.id_by_index("1.2.")]
+
+
+def test_reload_of_the_same_file(tmp_path):
+    filename = write_fvtr(tmp_path, ROWS)
+    taxonomy = Taxonomy(filename)
+    root, arrays = taxonomy.root, taxonomy.arrays
+
+    diff = taxonomy.reload()
+
+    assert not diff.changed
+    assert diff.id_map == {}
+    assert taxonomy.root is root
+    assert taxonomy.arrays is arrays
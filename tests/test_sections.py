@@ -0,0 +1,42 @@
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.sections import LazyTaxonomy, SectionIndex
+
+from .conftest import arrays_rows, write_fvtr
+
+
+DUPLICATED = [("1.", "Root"),
+              ("1.1.", "First"),
+              ("1.1.1.", "Group"),
+              ("1.1.1.1.", "Shared"),
+              ("1.1.1.1.1.", "Deep leaf"),
+              ("1.2.", "Shared"),
+              ("1.2.1.", "Section leaf")]
+
+
+def test_index_marks_duplicated_section_names(tmp_path):
+    sections = SectionIndex.build(write_fvtr(tmp_path, DUPLICATED))
+    assert sections.position_by_name("first") == sections.position("1.1.")
+    assert sections.position_by_name("shared") is None
+    assert sections.position_by_name("deep leaf") is None
+
+
+def test_lazy_subtree_by_duplicated_name_matches_taxonomy(tmp_path):
+    filename = write_fvtr(tmp_path, DUPLICATED)
+    expected = Taxonomy(filename, use_cache=False).subtree(name="Shared")
+    lazy = LazyTaxonomy(filename).subtree(name="Shared")
+    assert lazy.arrays.index(0) == expected.arrays.index(0) == "1.1.1.1."
+    assert len(lazy.arrays) == len(expected.arrays)
+
+
+def test_lazy_subtree_matches_taxonomy(iab_fvtr):
+    taxonomy = Taxonomy(iab_fvtr, use_cache=False)
+    lazy = LazyTaxonomy(iab_fvtr)
+    for index in ["579.", "579.582.", "579.582.585."]:
+        expected = taxonomy.subtree(index=index)
+        subtree = lazy.subtree(index=index)
+        assert arrays_rows(subtree.arrays) == arrays_rows(expected.arrays)
+    assert lazy.subtree(name="Men's Clothing Style").arrays.index(0) == "579.582."
+    with pytest.raises(KeyError):
+        lazy.subtree(index="580.")
@@ -0,0 +1,22 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.shared import publish_taxonomy, attach_taxonomy
+
+from .conftest import arrays_rows, data_file
+
+
+def test_publish_and_attach_round_trip():
+    arrays = Taxonomy(data_file("taxonomy_ds_modified.fvtr")).arrays
+    with publish_taxonomy(arrays) as shared:
+        attached = attach_taxonomy(shared.descriptor)
+        assert arrays_rows(attached) == arrays_rows(arrays)
+        assert attached.leaf_ids.tolist() == arrays.leaf_ids.tolist()
+        assert not attached.parent.flags.writeable
+        del attached
+        block_name = shared.descriptor[0]
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=block_name)
@@ -0,0 +1,43 @@
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy
+from got.taxonomies.pargenfs import get_cluster_k, pargenfs, select_subtree, GAMMA, LAMBDA
+
+from .conftest import arrays_rows, data_file, read_clusters, write_fvtr
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+
+
+def test_subtree_by_index_and_name(taxonomy):
+    subtree = taxonomy.subtree(index="5.2")
+    assert subtree.root.index == "5.2."
+    assert subtree.root.parent is None
+    assert arrays_rows(select_subtree(taxonomy, "machine learning").arrays) == \
+        arrays_rows(subtree.arrays)
+    assert [leaf.index for leaf in subtree.leaves] == \
+        [leaf.index for leaf in taxonomy.leaves if leaf.index.startswith("5.2.")]
+    with pytest.raises(KeyError):
+        taxonomy.subtree(index="9.9.")
+    with pytest.raises(KeyError):
+        taxonomy.subtree(name="no such name")
+
+
+@pytest.mark.parametrize("index", ["1.", "3.", "5.2."])
+def test_lifting_over_a_subtree_matches_a_parsed_branch(tmp_path, taxonomy, index):
+    subtree = taxonomy.subtree(index=index)
+    arrays = subtree.arrays
+    # the branch as a file of its own
+    branch = Taxonomy(write_fvtr(tmp_path, [(arrays.index(i), arrays.name(i))
+                                            for i in range(len(arrays))]))
+    assert arrays_rows(branch.arrays) == arrays_rows(arrays)
+
+    node_names, membership_matrix = read_clusters("ds_modified")
+    for k in range(len(membership_matrix[0])):
+        cluster = get_cluster_k(subtree.leaves, node_names, membership_matrix, k)
+        result = pargenfs(cluster, subtree, GAMMA, LAMBDA)
+        expected = pargenfs(cluster, branch, GAMMA, LAMBDA)
+        assert result.table() == expected.table()
+        assert result.ete3() == expected.ete3()
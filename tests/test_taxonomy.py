@@ -0,0 +1,68 @@
+import pytest
+
+from got.taxonomies.taxonomy import Taxonomy, CompactNode, parse_fvtr_line
+from got.taxonomies.pargenfs import get_cluster_k, pargenfs, GAMMA, LAMBDA
+
+from .conftest import data_file, read_clusters, write_fvtr
+
+
+def node_rows(taxonomy):
+    return [(node.index, node.name, node.parent.index if node.parent else None)
+            for node in taxonomy.nodes]
+
+
+def test_parents_are_found_by_whole_index_components(tmp_path):
+    filename = write_fvtr(tmp_path, [("1.", "Root"),
+                                     ("1.1.", "One"),
+                                     ("1.1.1.1.", "Skips a level"),
+                                     ("1.10.", "Ten"),
+                                     ("1.10.1.", "Under ten"),
+                                     ("1.1.2.", "Back under one")])
+    assert node_rows(Taxonomy(filename)) == [("1.", "root", None),
+                                             ("1.1.", "one", "1."),
+                                             ("1.1.1.1.", "skips a level", "1.1."),
+                                             ("1.1.2.", "back under one", "1.1."),
+                                             ("1.10.", "ten", "1."),
+                                             ("1.10.1.", "under ten", "1.10.")]
+
+
+def test_several_top_level_nodes_get_a_common_root(tmp_path):
+    filename = write_fvtr(tmp_path, [("1.", "First"), ("1.1.", "Leaf"), ("2.", "Second")])
+    taxonomy = Taxonomy(filename)
+    assert taxonomy.root.name == "root"
+    assert [child.index for child in taxonomy.root.children] == ["1.", "2."]
+    assert [leaf.name for leaf in taxonomy.leaves] == ["leaf", "second"]
+
+
+def test_parse_fvtr_line():
+    assert parse_fvtr_line("579.580.,,Men's Accessories,") == ("579.580.", "men's accessories")
+    assert parse_fvtr_line("1. + 0,Theory of computation,,,,") == ("1.", "theory of computation")
+    assert parse_fvtr_line(",,,") is None
+
+
+def test_compact_nodes():
+    filename = data_file("taxonomy_ds_modified.fvtr")
+    taxonomy = Taxonomy(filename)
+    compact = Taxonomy(filename, node_class=CompactNode)
+    assert node_rows(compact) == node_rows(taxonomy)
+
+    node = compact.root
+    assert isinstance(node, CompactNode)
+    assert not hasattr(node, "__dict__")
+    assert (node.u, node.H, node.e, node.of) == (.0, [], None, None)
+    with pytest.raises(AttributeError):
+        node.custom = 1
+
+
+def test_compact_nodes_give_the_same_lifting():
+    filename = data_file("taxonomy_ds_modified.fvtr")
+    node_names, membership_matrix = read_clusters("ds_modified")
+    taxonomy = Taxonomy(filename)
+    compact = Taxonomy(filename, node_class=CompactNode)
+    for k in range(len(membership_matrix[0])):
+        cluster = get_cluster_k(taxonomy.leaves, node_names, membership_matrix, k)
+        expected = pargenfs(cluster, taxonomy, GAMMA, LAMBDA)
+        result = pargenfs(cluster, compact, GAMMA, LAMBDA)
+        assert isinstance(result.tree, CompactNode)
+        assert result.table() == expected.table()
+        assert result.ete3() == expected.ete3()
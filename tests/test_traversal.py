@@ -0,0 +1,73 @@
+import random
+import sys
+
+from got.taxonomies.taxonomy import Taxonomy, Node
+from got.taxonomies.tree_arrays import TreeArrays
+from got.taxonomies.traversal import iter_preorder, iter_postorder, iter_leaves, \
+    iter_with_layers, sum_over_subtrees
+from got.taxonomies.pargenfs import pargenfs
+
+from .conftest import data_file
+
+
+def preorder(node):
+    return [node] + [descendant for child in node.children for descendant in preorder(child)]
+
+
+def postorder(node):
+    return [descendant for child in node.children for descendant in postorder(child)] + [node]
+
+
+def subtree_sum(node, value):
+    total = .0 + value(node)
+    for child in node.children:
+        total += subtree_sum(child, value)
+    return total
+
+
+def deep_taxonomy(depth):
+    # a chain of "depth" nodes with a leaf at the bottom and one under the root
+    parents = [-1] + list(range(depth - 1)) + [depth - 1, 0]
+    indices = [f"{i}." for i in range(len(parents))]
+    return Taxonomy.from_arrays(TreeArrays.from_parents(parents, indices, indices), "chain")
+
+
+def test_orders_match_the_recursive_ones():
+    root = Taxonomy(data_file("taxonomy_ds_modified.fvtr")).root
+    assert list(iter_preorder(root)) == preorder(root)
+    assert list(iter_postorder(root)) == postorder(root)
+    assert list(iter_leaves(root)) == [node for node in preorder(root) if node.is_leaf]
+    layers = dict((node.index, layer) for node, layer in iter_with_layers(root, 1))
+    for node in preorder(root):
+        if node.parent is not None:
+            assert layers[node.index] == layers[node.parent.index] + 1
+
+
+def test_sum_over_subtrees_adds_in_the_recursive_order():
+    root = Taxonomy(data_file("taxonomy_ds_modified.fvtr")).root
+    rng = random.Random(0)
+    values = {id(node): rng.random() for node in preorder(root)}
+    value = lambda node: values[id(node)]
+    sums = {}
+
+    total = sum_over_subtrees(root, value, lambda node, s: sums.setdefault(id(node), s))
+
+    assert total == subtree_sum(root, value)
+    for node in preorder(root):
+        assert sums[id(node)] == subtree_sum(node, value)
+
+
+def test_deep_chain():
+    depth = sys.getrecursionlimit() + 500
+    taxonomy = deep_taxonomy(depth)
+    root = taxonomy.root
+    assert sum(1 for _ in iter_preorder(root)) == depth + 2
+    assert next(iter_postorder(root)).index == f"{depth}."
+    assert [leaf.index for leaf in iter_leaves(root)] == [f"{depth}.", f"{depth + 1}."]
+    assert max(layer for _, layer in iter_with_layers(root)) == depth
+    assert sum_over_subtrees(root, lambda node: 1) == depth + 2
+
+    result = pargenfs({f"{depth}.": .9, f"{depth + 1}.": .4}, taxonomy, .9, .2)
+    assert result.lifted
+    assert result.table()
+    assert result.ete3()
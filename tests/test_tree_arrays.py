@@ -0,0 +1,62 @@
+import numpy as np
+
+from got.taxonomies.taxonomy import Taxonomy, Node
+from got.taxonomies.tree_arrays import StringTable, TreeArrays
+
+from .conftest import arrays_rows, data_file
+
+
+def test_from_parents_numbers_nodes_in_preorder():
+    # the lines of a file: every parent precedes its children
+    parents = [-1, 0, 0, 1, 2, 1]
+    indices = ["1.", "1.1.", "1.2.", "1.1.1.", "1.2.1.", "1.1.2."]
+    arrays = TreeArrays.from_parents(parents, indices, [index + " name" for index in indices])
+
+    assert [arrays.index(i) for i in range(len(arrays))] == \
+        ["1.", "1.1.", "1.1.1.", "1.1.2.", "1.2.", "1.2.1."]
+    assert arrays.parent.tolist() == [-1, 0, 1, 1, 0, 4]
+    assert arrays.depth.tolist() == [0, 1, 2, 2, 1, 2]
+    assert arrays.children_of(1).tolist() == [2, 3]
+    assert arrays.degree.tolist() == [2, 2, 0, 0, 1, 0]
+    assert arrays.leaf_ids.tolist() == [2, 3, 5]
+    assert arrays.postorder.tolist() == [2, 3, 1, 5, 4, 0]
+    assert arrays.name(4) == "1.2. name"
+
+
+def test_subtrees_are_contiguous():
+    arrays = Taxonomy(data_file("taxonomy_ds_modified.fvtr")).arrays
+    depth = arrays.depth.tolist()
+    for node_id in range(len(arrays)):
+        end = node_id + 1
+        while end < len(arrays) and depth[end] > depth[node_id]:
+            end += 1
+        descendants = set(range(node_id + 1, end))
+        children = arrays.children_of(node_id).tolist()
+        assert set(children) <= descendants
+        assert all(arrays.parent[child] == node_id for child in children)
+
+
+def test_leaves_match_the_node_tree():
+    taxonomy = Taxonomy(data_file("taxonomy_ds_modified.fvtr"))
+    arrays = taxonomy.arrays
+    assert [arrays.index(i) for i in arrays.leaf_ids.tolist()] == \
+        [leaf.index for leaf in taxonomy.leaves]
+
+
+def test_tree_and_dict_round_trips():
+    arrays = Taxonomy(data_file("taxonomy_iab_fragment.fvtr")).arrays
+    root, nodes = arrays.to_tree(Node)
+    assert len(nodes) == len(arrays)
+    assert arrays_rows(TreeArrays.from_tree(root)) == arrays_rows(arrays)
+
+    restored = TreeArrays.from_dict({name: np.array(array) for name, array
+                                     in arrays.to_dict().items()})
+    assert arrays_rows(restored) == arrays_rows(arrays)
+    assert restored.postorder.tolist() == arrays.postorder.tolist()
+
+
+def test_string_table():
+    strings = ["", "ontologies", "réseaux", "ontologies"]
+    table = StringTable.from_strings(strings)
+    assert list(table) == strings
+    assert list(StringTable(table.data, table.offsets)) == strings